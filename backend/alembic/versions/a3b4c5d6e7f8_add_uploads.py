@@ -0,0 +1,52 @@
+"""resumable uploads: uploads + received byte ranges
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "a3b4c5d6e7f8"
+down_revision = "f2a3b4c5d6e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "uploads",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("mime_type", sa.String(120), nullable=True),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        # expected hex sha256 of the whole file, verified on completion when given
+        sa.Column("sha256", sa.String(64), nullable=True),
+        sa.Column("storage_path", sa.String(500), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="UPLOADING"),
+        sa.Column("resource_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("resources.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+    op.create_index("ix_uploads_session", "uploads", ["session_id"])
+    op.create_index("ix_uploads_updated", "uploads", ["updated_at"])
+
+    op.create_table(
+        "upload_parts",
+        sa.Column("upload_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("uploads.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("start_byte", sa.BigInteger(), nullable=False),
+        # exclusive
+        sa.Column("end_byte", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("upload_id", "start_byte"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("upload_parts")
+    op.drop_index("ix_uploads_updated", table_name="uploads")
+    op.drop_index("ix_uploads_session", table_name="uploads")
+    op.drop_table("uploads")
@@ -0,0 +1,33 @@
+"""consolidate per-session lookup indexes on answers and resources
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "a7b8c9d0e1f2"
+down_revision = "f6a7b8c9d0e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (session_id, created_at, id) serves both the session filter and the
+    # newest-first ordering, so make sure it exists and drop the narrower
+    # single-column indexes it supersedes (one less index to maintain per write).
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_answers_session_created_id "
+        "ON answers (session_id, created_at, id);"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_resources_session_created_id "
+        "ON resources (session_id, created_at, id);"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_answers_session;")
+    op.execute("DROP INDEX IF EXISTS ix_resources_session;")
+
+
+def downgrade() -> None:
+    op.create_index("ix_resources_session", "resources", ["session_id"], unique=False)
+    op.create_index("ix_answers_session", "answers", ["session_id"], unique=False)
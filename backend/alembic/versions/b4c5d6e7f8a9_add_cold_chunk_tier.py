@@ -0,0 +1,74 @@
+"""cold tier for inactive sessions' chunks
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector, HALFVEC
+
+revision = "b4c5d6e7f8a9"
+down_revision = "a3b4c5d6e7f8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sessions", sa.Column("last_active_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")))
+    op.add_column("sessions", sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        """
+        UPDATE sessions s SET last_active_at = greatest(
+          s.created_at,
+          (SELECT max(asked_at) FROM questions q WHERE q.session_id = s.id),
+          (SELECT max(created_at) FROM answers a WHERE a.session_id = s.id)
+        );
+        """
+    )
+
+    # same columns as resource_chunks, but no FTS / vector / FK indexes: only
+    # read back in bulk when the session is rehydrated (app.tiering)
+    op.create_table(
+        "resource_chunks_cold",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("resource_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("resources.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("chunk_index", sa.Integer(), nullable=False),
+        sa.Column("page_ref", sa.String(50), nullable=True),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("embedding", Vector(768), nullable=True),
+        sa.Column("embedding_half", HALFVEC(768), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_chunks_cold_session", "resource_chunks_cold", ["session_id"])
+    op.create_index("ix_chunks_cold_resource", "resource_chunks_cold", ["resource_id"])
+    # lz4 compresses better and decompresses faster than the default pglz (PG 14+)
+    op.execute("ALTER TABLE resource_chunks_cold ALTER COLUMN text SET COMPRESSION lz4;")
+    op.execute("ALTER TABLE resource_chunks_cold ALTER COLUMN embedding SET COMPRESSION lz4;")
+    op.execute("ALTER TABLE resource_chunks_cold ALTER COLUMN embedding_half SET COMPRESSION lz4;")
+    op.create_index("ix_sessions_last_active", "sessions", ["last_active_at"], postgresql_where=sa.text("archived_at IS NULL"))
+
+
+def downgrade() -> None:
+    # bring everything back into the hot table first
+    op.execute(
+        """
+        INSERT INTO resource_chunks (id, session_id, resource_id, chunk_index, page_ref, text, embedding, embedding_half, created_at)
+        SELECT id, session_id, resource_id, chunk_index, page_ref, text, embedding, embedding_half, created_at
+        FROM resource_chunks_cold;
+        """
+    )
+    # chunk_count already included the cold rows; the insert trigger counted them again
+    op.execute(
+        """
+        UPDATE sessions s SET chunk_count = s.chunk_count - d.n
+        FROM (SELECT session_id, count(*) AS n FROM resource_chunks_cold GROUP BY session_id) d
+        WHERE s.id = d.session_id;
+        """
+    )
+    op.drop_index("ix_sessions_last_active", table_name="sessions")
+    op.drop_table("resource_chunks_cold")
+    op.drop_column("sessions", "archived_at")
+    op.drop_column("sessions", "last_active_at")
@@ -0,0 +1,76 @@
+"""denormalised per-session counters maintained by triggers
+
+Every write statement on a child table UPDATEs its session's row, and that
+row lock is held until the writer commits: concurrent writes to the same
+session serialise on it (writes to different sessions don't). Keep write
+transactions short; scripts/bench_session_writes.py measures the cost.
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b8c9d0e1f2a3"
+down_revision = "a7b8c9d0e1f2"
+branch_labels = None
+depends_on = None
+
+# child table -> counter column on sessions
+COUNTERS = {
+    "questions": "question_count",
+    "resources": "resource_count",
+    "resource_chunks": "chunk_count",
+    "answers": "answer_count",
+}
+
+
+def upgrade() -> None:
+    for col in COUNTERS.values():
+        op.add_column("sessions", sa.Column(col, sa.Integer(), nullable=False, server_default="0"))
+
+    for table, col in COUNTERS.items():
+        # statement-level triggers with transition tables: one UPDATE per
+        # statement (bulk inserts, chunk replacement, FK cascades), not per row
+        op.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {table}_session_count() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+              IF TG_OP = 'INSERT' THEN
+                UPDATE sessions s SET {col} = s.{col} + d.n
+                FROM (SELECT session_id, count(*) AS n FROM new_rows GROUP BY session_id) d
+                WHERE s.id = d.session_id;
+              ELSE
+                UPDATE sessions s SET {col} = s.{col} - d.n
+                FROM (SELECT session_id, count(*) AS n FROM old_rows GROUP BY session_id) d
+                WHERE s.id = d.session_id;
+              END IF;
+              RETURN NULL;
+            END $$;
+            """
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_session_count_ins AFTER INSERT ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_session_count();"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_session_count_del AFTER DELETE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {table}_session_count();"
+        )
+
+        # backfill
+        op.execute(
+            f"UPDATE sessions s SET {col} = d.n "
+            f"FROM (SELECT session_id, count(*) AS n FROM {table} GROUP BY session_id) d "
+            f"WHERE s.id = d.session_id;"
+        )
+
+
+def downgrade() -> None:
+    for table, col in COUNTERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_session_count_del ON {table};")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_session_count_ins ON {table};")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_session_count();")
+        op.drop_column("sessions", col)
@@ -0,0 +1,94 @@
+"""hash-partition resource_chunks by session_id
+
+Every retrieval query filters on session_id, so with partitions the planner
+prunes to one partition and the FTS / HNSW indexes it searches are 1/N of
+the corpus. Rewrites the table: run during a maintenance window.
+
+A partition still holds many sessions, and so does its HNSW graph: the
+session filter is applied to what the index walk returns, and a session
+that is a small part of its partition can come back short. Search therefore
+ranks sessions up to EMBED_EXACT_MAX_CHUNKS exactly, without the index;
+larger ones rely on EMBED_ITERATIVE_SCAN (pgvector >= 0.8).
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "c5d6e7f8a9b0"
+down_revision = "b4c5d6e7f8a9"
+branch_labels = None
+depends_on = None
+
+# changing this later means another rewrite like this one
+PARTITIONS = 16
+
+COLUMNS = "id, session_id, resource_id, chunk_index, page_ref, text, embedding, embedding_half, created_at"
+
+COLUMN_DDL = """
+    id uuid NOT NULL,
+    session_id uuid NOT NULL,
+    resource_id uuid NOT NULL,
+    chunk_index integer NOT NULL,
+    page_ref varchar(50),
+    text text NOT NULL,
+    embedding vector(768),
+    embedding_half halfvec(768),
+    created_at timestamptz NOT NULL,
+    CONSTRAINT resource_chunks_session_id_fkey FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE,
+    CONSTRAINT resource_chunks_resource_id_fkey FOREIGN KEY (resource_id) REFERENCES resources(id) ON DELETE CASCADE
+"""
+
+INDEXES = [
+    "CREATE INDEX ix_chunks_resource_order ON resource_chunks (resource_id, chunk_index);",
+    "CREATE INDEX ix_chunks_session ON resource_chunks (session_id);",
+    "CREATE INDEX ix_chunks_text_fts ON resource_chunks USING GIN (to_tsvector('english', text));",
+    "CREATE INDEX ix_chunks_embedding_half_hnsw ON resource_chunks USING hnsw (embedding_half halfvec_cosine_ops);",
+]
+
+# functions from b8c9d0e1f2a3 / e1f2a3b4c5d6 survive the table swap; only the triggers go
+TRIGGERS = [
+    "CREATE TRIGGER resource_chunks_session_count_ins AFTER INSERT ON resource_chunks "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION resource_chunks_session_count();",
+    "CREATE TRIGGER resource_chunks_session_count_del AFTER DELETE ON resource_chunks "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION resource_chunks_session_count();",
+    "CREATE TRIGGER resource_chunks_session_version_insert AFTER INSERT ON resource_chunks "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION resource_chunks_session_version_new_rows();",
+    "CREATE TRIGGER resource_chunks_session_version_update AFTER UPDATE ON resource_chunks "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION resource_chunks_session_version_new_rows();",
+    "CREATE TRIGGER resource_chunks_session_version_delete AFTER DELETE ON resource_chunks "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION resource_chunks_session_version_old_rows();",
+]
+
+
+def _swap(create_sql: list[str]) -> None:
+    # old table keeps its triggers, so the copy below doesn't touch the counters
+    op.execute("ALTER TABLE resource_chunks RENAME TO resource_chunks_old;")
+    # constraint names would clash with the new table's
+    op.execute("ALTER INDEX resource_chunks_pkey RENAME TO resource_chunks_old_pkey;")
+    for fk in ("resource_chunks_session_id_fkey", "resource_chunks_resource_id_fkey"):
+        op.execute(f"ALTER TABLE resource_chunks_old RENAME CONSTRAINT {fk} TO {fk}_old;")
+    for stmt in create_sql:
+        op.execute(stmt)
+    op.execute(f"INSERT INTO resource_chunks ({COLUMNS}) SELECT {COLUMNS} FROM resource_chunks_old;")
+    op.execute("DROP TABLE resource_chunks_old;")
+    # created after the copy: one bulk build per index instead of row-by-row inserts
+    for stmt in INDEXES + TRIGGERS:
+        op.execute(stmt)
+    op.execute("ANALYZE resource_chunks;")
+
+
+def upgrade() -> None:
+    # the partition key has to be part of the primary key
+    create = [f"CREATE TABLE resource_chunks ({COLUMN_DDL}, PRIMARY KEY (id, session_id)) PARTITION BY HASH (session_id);"]
+    for i in range(PARTITIONS):
+        create.append(
+            f"CREATE TABLE resource_chunks_p{i:02d} PARTITION OF resource_chunks "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i});"
+        )
+    _swap(create)
+
+
+def downgrade() -> None:
+    _swap([f"CREATE TABLE resource_chunks ({COLUMN_DDL}, PRIMARY KEY (id));"])
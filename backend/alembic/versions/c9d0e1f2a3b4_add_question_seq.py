@@ -0,0 +1,52 @@
+"""per-session question counter and unique question order
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c9d0e1f2a3b4"
+down_revision = "b8c9d0e1f2a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sessions", sa.Column("question_seq", sa.Integer(), nullable=False, server_default="0"))
+
+    # the old max()+1 allocation could hand out duplicates under concurrency;
+    # renumber those sessions (stable by order_index, then asked_at) before
+    # enforcing uniqueness
+    op.execute(
+        """
+        UPDATE questions q SET order_index = r.rn
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY session_id ORDER BY order_index, asked_at, id
+            ) AS rn
+            FROM questions
+            WHERE session_id IN (
+                SELECT session_id FROM questions
+                GROUP BY session_id, order_index HAVING count(*) > 1
+            )
+        ) r
+        WHERE q.id = r.id AND q.order_index <> r.rn;
+        """
+    )
+
+    op.execute(
+        "UPDATE sessions s SET question_seq = d.m "
+        "FROM (SELECT session_id, max(order_index) AS m FROM questions GROUP BY session_id) d "
+        "WHERE s.id = d.session_id;"
+    )
+
+    op.create_index("uq_questions_session_order", "questions", ["session_id", "order_index"], unique=True)
+    op.drop_index("ix_questions_session_order", table_name="questions")
+
+
+def downgrade() -> None:
+    op.create_index("ix_questions_session_order", "questions", ["session_id", "order_index"], unique=False)
+    op.drop_index("uq_questions_session_order", table_name="questions")
+    op.drop_column("sessions", "question_seq")
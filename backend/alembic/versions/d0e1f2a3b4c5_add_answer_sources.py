@@ -0,0 +1,54 @@
+"""answer_sources citation table and answers.stale_at
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.crud import SOURCES_ARRAY_SQL, backfill_sources_sql
+
+revision = "d0e1f2a3b4c5"
+down_revision = "c9d0e1f2a3b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "answer_sources",
+        sa.Column("answer_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("answers.id", ondelete="CASCADE"), nullable=False),
+        # bracket number in the answer: [1], [2], ...
+        sa.Column("rank", sa.Integer(), nullable=False),
+        # no FK: re-chunking replaces chunk ids, the citation row must survive that
+        sa.Column("chunk_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("resource_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("resources.id", ondelete="CASCADE"), nullable=False),
+        sa.PrimaryKeyConstraint("answer_id", "rank"),
+    )
+    op.create_index("ix_answer_sources_resource", "answer_sources", ["resource_id"])
+    op.create_index("ix_answer_sources_chunk", "answer_sources", ["chunk_id"])
+
+    op.add_column("answers", sa.Column("stale_at", sa.DateTime(timezone=True), nullable=True))
+
+    # backfill from sources_json; citations whose chunk is already gone
+    # (resource re-chunked since) can't be resolved to a resource, and rows
+    # that aren't a JSON array are skipped rather than aborting the upgrade
+    op.execute(backfill_sources_sql())
+
+    # ...and those answers are stale already
+    op.execute(
+        f"""
+        UPDATE answers a SET stale_at = now()
+        WHERE jsonb_array_length({SOURCES_ARRAY_SQL}) >
+              (SELECT count(*) FROM answer_sources s WHERE s.answer_id = a.id);
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("answers", "stale_at")
+    op.drop_index("ix_answer_sources_chunk", table_name="answer_sources")
+    op.drop_index("ix_answer_sources_resource", table_name="answer_sources")
+    op.drop_table("answer_sources")
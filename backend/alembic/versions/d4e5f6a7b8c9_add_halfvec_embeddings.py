@@ -0,0 +1,34 @@
+"""add halfvec embedding column for half-precision storage
+
+Revision ID: d4e5f6a7b8c9
+Revises: c08bcfcbc584
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "d4e5f6a7b8c9"
+down_revision = "c08bcfcbc584"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # halfvec needs pgvector >= 0.7
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+    op.execute("ALTER TABLE resource_chunks ADD COLUMN IF NOT EXISTS embedding_half halfvec(768);")
+
+    # migrate existing float32 vectors; the full column is kept for re-scoring
+    op.execute(
+        "UPDATE resource_chunks SET embedding_half = embedding::halfvec(768) "
+        "WHERE embedding IS NOT NULL AND embedding_half IS NULL;"
+    )
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chunks_embedding_half_hnsw "
+        "ON resource_chunks USING hnsw (embedding_half halfvec_cosine_ops);"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_half_hnsw;")
+    op.execute("ALTER TABLE resource_chunks DROP COLUMN IF EXISTS embedding_half;")
@@ -0,0 +1,61 @@
+"""page_num / source_type on chunks for filtered retrieval
+
+page_num is the number in page_ref ("slide 12" -> 12), source_type the
+resource's file type (pdf / pptx). The FTS index becomes a multi-column GIN
+(btree_gin) over the text and the filter columns, so resource / page / type
+conditions are checked inside the index scan instead of on the heap rows.
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d6e7f8a9b0c1"
+down_revision = "c5d6e7f8a9b0"
+branch_labels = None
+depends_on = None
+
+# same order as app.extract.extract_text
+SOURCE_TYPE_SQL = """
+    CASE
+      WHEN lower(r.filename) LIKE '%.pdf' OR r.mime_type = 'application/pdf' THEN 'pdf'
+      WHEN lower(r.filename) LIKE '%.pptx'
+        OR r.mime_type = 'application/vnd.openxmlformats-officedocument.presentationml.presentation' THEN 'pptx'
+    END
+"""
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin;")
+    for table in ("resource_chunks", "resource_chunks_cold"):
+        op.add_column(table, sa.Column("page_num", sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column("source_type", sa.String(10), nullable=True))
+        op.execute(
+            f"""
+            UPDATE {table} c
+            SET page_num = substring(c.page_ref FROM '(\\d+)')::int,
+                source_type = {SOURCE_TYPE_SQL}
+            FROM resources r
+            WHERE r.id = c.resource_id;
+            """
+        )
+
+    op.execute("DROP INDEX ix_chunks_text_fts;")
+    op.execute(
+        "CREATE INDEX ix_chunks_text_fts ON resource_chunks "
+        "USING GIN (to_tsvector('english', text), resource_id, page_num, source_type);"
+    )
+    # page ranges within a resource for the exact (non-HNSW) vector path
+    op.create_index("ix_chunks_resource_page", "resource_chunks", ["resource_id", "page_num"])
+    op.execute("ANALYZE resource_chunks;")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chunks_resource_page", table_name="resource_chunks")
+    op.execute("DROP INDEX ix_chunks_text_fts;")
+    op.execute("CREATE INDEX ix_chunks_text_fts ON resource_chunks USING GIN (to_tsvector('english', text));")
+    for table in ("resource_chunks", "resource_chunks_cold"):
+        op.drop_column(table, "source_type")
+        op.drop_column(table, "page_num")
@@ -0,0 +1,62 @@
+"""per-session list versions for ETag validation, bumped by triggers
+
+Like the counters (b8c9d0e1f2a3) these UPDATE the session's row on every
+write statement, including UPDATEs, so they add to the same row-lock
+contention between writers of one session; see
+scripts/bench_session_writes.py.
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e1f2a3b4c5d6"
+down_revision = "d0e1f2a3b4c5"
+branch_labels = None
+depends_on = None
+
+# child table -> version column on sessions
+VERSIONS = {
+    "questions": "questions_version",
+    "resources": "corpus_version",
+    "resource_chunks": "corpus_version",
+    "answers": "answers_version",
+}
+
+
+def upgrade() -> None:
+    for col in dict.fromkeys(VERSIONS.values()):
+        op.add_column("sessions", sa.Column(col, sa.BigInteger(), nullable=False, server_default="0"))
+
+    for table, col in VERSIONS.items():
+        # same statement-level shape as the counters: one bump per statement and session
+        for rows in ("new_rows", "old_rows"):
+            op.execute(
+                f"""
+                CREATE OR REPLACE FUNCTION {table}_session_version_{rows}() RETURNS trigger
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                  UPDATE sessions s SET {col} = s.{col} + 1
+                  WHERE s.id IN (SELECT DISTINCT session_id FROM {rows});
+                  RETURN NULL;
+                END $$;
+                """
+            )
+        for event, rows in (("INSERT", "new_rows"), ("UPDATE", "new_rows"), ("DELETE", "old_rows")):
+            ref = "NEW TABLE AS new_rows" if rows == "new_rows" else "OLD TABLE AS old_rows"
+            op.execute(
+                f"CREATE TRIGGER {table}_session_version_{event.lower()} AFTER {event} ON {table} "
+                f"REFERENCING {ref} FOR EACH STATEMENT EXECUTE FUNCTION {table}_session_version_{rows}();"
+            )
+
+
+def downgrade() -> None:
+    for table in VERSIONS:
+        for event in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_session_version_{event} ON {table};")
+        for rows in ("new_rows", "old_rows"):
+            op.execute(f"DROP FUNCTION IF EXISTS {table}_session_version_{rows}();")
+    for col in dict.fromkeys(VERSIONS.values()):
+        op.drop_column("sessions", col)
@@ -0,0 +1,40 @@
+"""move extracted_text out of resources into resource_texts
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "e5f6a7b8c9d0"
+down_revision = "d4e5f6a7b8c9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resource_texts",
+        sa.Column("resource_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("resources.id", ondelete="CASCADE"), primary_key=True, nullable=False),
+        sa.Column("extracted_text", sa.Text(), nullable=False),
+    )
+    # large decks always end up TOASTed; lz4 is faster than the default pglz (pg14+)
+    op.execute("ALTER TABLE resource_texts ALTER COLUMN extracted_text SET COMPRESSION lz4;")
+
+    op.execute(
+        "INSERT INTO resource_texts (resource_id, extracted_text) "
+        "SELECT id, extracted_text FROM resources WHERE extracted_text IS NOT NULL;"
+    )
+    op.drop_column("resources", "extracted_text")
+
+
+def downgrade() -> None:
+    op.add_column("resources", sa.Column("extracted_text", sa.Text(), nullable=True))
+    op.execute(
+        "UPDATE resources r SET extracted_text = t.extracted_text "
+        "FROM resource_texts t WHERE t.resource_id = r.id;"
+    )
+    op.drop_table("resource_texts")
@@ -0,0 +1,141 @@
+"""embedding model registry; chunk vectors move to chunk_embeddings
+
+Every vector now records the model that produced it, so vectors of two
+models (of any dimension) can coexist while scripts.reembed fills in a new
+one; search keeps using the "active" model until the job switches it.
+Vector columns are untyped; each model gets its own partial HNSW index on
+embedding_half::halfvec(dim). chunk_embeddings is hash-partitioned like
+resource_chunks.
+
+Rewrites the vectors: run during a maintenance window. The dropped columns'
+space comes back as resource_chunks rows are rewritten (or VACUUM FULL).
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-19
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e7f8a9b0c1d2"
+down_revision = "d6e7f8a9b0c1"
+branch_labels = None
+depends_on = None
+
+PARTITIONS = 16
+
+# the model the existing 768-d vectors came from
+SEED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_models",
+        sa.Column("id", sa.SmallInteger(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False, unique=True),
+        sa.Column("dim", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),  # building / active / retired
+        sa.Column("chunks_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("chunks_done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("activated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("retired_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # at most one active model: the switch is two UPDATEs in one transaction
+    op.create_index(
+        "ux_embedding_models_active",
+        "embedding_models",
+        ["status"],
+        unique=True,
+        postgresql_where=sa.text("status = 'active'"),
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO embedding_models (name, dim, status, activated_at) VALUES (:name, 768, 'active', now())"
+        ).bindparams(name=SEED_MODEL)
+    )
+
+    # (session_id, chunk_id) first: the FK cascade from resource_chunks and
+    # per-session scans are prefix lookups
+    op.execute(
+        """
+        CREATE TABLE chunk_embeddings (
+            chunk_id uuid NOT NULL,
+            session_id uuid NOT NULL,
+            model_id smallint NOT NULL REFERENCES embedding_models(id),
+            embedding vector,
+            embedding_half halfvec,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (session_id, chunk_id, model_id),
+            FOREIGN KEY (chunk_id, session_id) REFERENCES resource_chunks (id, session_id) ON DELETE CASCADE
+        ) PARTITION BY HASH (session_id);
+        """
+    )
+    for i in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE chunk_embeddings_p{i:02d} PARTITION OF chunk_embeddings "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i});"
+        )
+    op.execute(
+        """
+        INSERT INTO chunk_embeddings (chunk_id, session_id, model_id, embedding, embedding_half, created_at)
+        SELECT c.id, c.session_id, m.id, c.embedding, c.embedding_half, c.created_at
+        FROM resource_chunks c, embedding_models m
+        WHERE c.embedding IS NOT NULL OR c.embedding_half IS NOT NULL;
+        """
+    )
+    # created after the copy: one bulk build
+    op.execute(
+        "CREATE INDEX ix_chunk_embeddings_m1_half_hnsw ON chunk_embeddings "
+        "USING hnsw ((embedding_half::halfvec(768)) halfvec_cosine_ops) WHERE model_id = 1;"
+    )
+    op.execute("DROP INDEX ix_chunks_embedding_half_hnsw;")
+    op.drop_column("resource_chunks", "embedding_half")
+    op.drop_column("resource_chunks", "embedding")
+
+    # the cold tier keeps the active model's vector inline, tagged
+    op.add_column("resource_chunks_cold", sa.Column("embedding_model_id", sa.SmallInteger(), nullable=True))
+    op.execute(
+        """
+        ALTER TABLE resource_chunks_cold
+          ALTER COLUMN embedding TYPE vector,
+          ALTER COLUMN embedding_half TYPE halfvec;
+        UPDATE resource_chunks_cold SET embedding_model_id = 1
+        WHERE embedding IS NOT NULL OR embedding_half IS NOT NULL;
+        """
+    )
+    op.execute("ANALYZE chunk_embeddings;")
+
+
+def downgrade() -> None:
+    # only the active model's vectors survive, and only if it is 768-d
+    op.execute(
+        """
+        UPDATE resource_chunks_cold c SET embedding = NULL, embedding_half = NULL
+        WHERE NOT EXISTS (
+            SELECT 1 FROM embedding_models m
+            WHERE m.id = c.embedding_model_id AND m.status = 'active' AND m.dim = 768
+        );
+        ALTER TABLE resource_chunks_cold
+          ALTER COLUMN embedding TYPE vector(768),
+          ALTER COLUMN embedding_half TYPE halfvec(768);
+        """
+    )
+    op.drop_column("resource_chunks_cold", "embedding_model_id")
+
+    op.execute(
+        """
+        ALTER TABLE resource_chunks ADD COLUMN embedding vector(768), ADD COLUMN embedding_half halfvec(768);
+        UPDATE resource_chunks c SET embedding = e.embedding, embedding_half = e.embedding_half
+        FROM chunk_embeddings e
+        JOIN embedding_models m ON m.id = e.model_id AND m.status = 'active' AND m.dim = 768
+        WHERE e.session_id = c.session_id AND e.chunk_id = c.id;
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_chunks_embedding_half_hnsw ON resource_chunks USING hnsw (embedding_half halfvec_cosine_ops);"
+    )
+    op.execute("DROP TABLE chunk_embeddings;")
+    op.drop_table("embedding_models")
@@ -0,0 +1,24 @@
+"""per-session budget for speculative answer generation
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "f2a3b4c5d6e7"
+down_revision = "e1f2a3b4c5d6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL = PREFETCH_SESSION_BUDGET, 0 = never prefetch for this session
+    op.add_column("sessions", sa.Column("prefetch_budget", sa.Integer(), nullable=True))
+    op.add_column("sessions", sa.Column("prefetch_used", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("sessions", "prefetch_used")
+    op.drop_column("sessions", "prefetch_budget")
@@ -0,0 +1,25 @@
+"""add composite indexes backing keyset pagination
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "f6a7b8c9d0e1"
+down_revision = "e5f6a7b8c9d0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # questions already have ix_questions_session_order (session_id, order_index)
+    op.create_index("ix_sessions_created_id", "sessions", ["created_at", "id"], unique=False)
+    op.create_index("ix_resources_session_created_id", "resources", ["session_id", "created_at", "id"], unique=False)
+    op.create_index("ix_answers_session_created_id", "answers", ["session_id", "created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_answers_session_created_id", table_name="answers")
+    op.drop_index("ix_resources_session_created_id", table_name="resources")
+    op.drop_index("ix_sessions_created_id", table_name="sessions")
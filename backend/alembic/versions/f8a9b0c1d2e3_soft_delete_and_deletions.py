@@ -0,0 +1,59 @@
+"""soft delete for sessions / resources; deletions job table for the batched purge
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "f8a9b0c1d2e3"
+down_revision = "e7f8a9b0c1d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # nullable, no default: a metadata-only change on big tables
+    op.add_column("sessions", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("resources", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+
+    # no FKs: a job outlives the rows it deletes
+    op.create_table(
+        "deletions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("kind", sa.String(20), nullable=False),  # session / resource
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("resource_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),  # pending / running / done / failed
+        sa.Column("step", sa.String(20), nullable=True),
+        sa.Column("chunks_total", sa.Integer(), nullable=True),
+        sa.Column("chunks_done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("files_total", sa.Integer(), nullable=True),
+        sa.Column("files_done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_deletions_session", "deletions", ["session_id", "created_at"])
+    # the purge worker's queue
+    op.create_index(
+        "ix_deletions_open",
+        "deletions",
+        ["created_at"],
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+    # deleting a resource SET NULLs / deletes its uploads: needs a lookup by resource
+    op.create_index("ix_uploads_resource", "uploads", ["resource_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_uploads_resource", table_name="uploads")
+    op.drop_index("ix_deletions_open", table_name="deletions")
+    op.drop_index("ix_deletions_session", table_name="deletions")
+    op.drop_table("deletions")
+    op.drop_column("resources", "deleted_at")
+    op.drop_column("sessions", "deleted_at")
@@ -0,0 +1,154 @@
+"""
+Small per-worker caches with cross-worker invalidation.
+
+Each worker keeps its own LRU/TTL caches. Writers call invalidate() inside
+their transaction: the entry is evicted locally right after commit and a
+NOTIFY on CACHE_CHANNEL tells every other worker to do the same. A worker
+that loses its LISTEN connection drops everything, since it may have missed
+invalidations in the meantime.
+
+Kinds:
+  chunks  key=session_id   chunk set changed -> cached search results
+  answer  key=question_id  answer upserted   -> cached answer
+  model   key=model name   model re-pulled / active model switched
+                           -> query embeddings + search results + app.embed_models
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import event, text as sql_text
+from sqlalchemy.orm import Session
+
+from app import embed_models
+from app.metrics import record_cache
+
+CACHE_CHANNEL = os.getenv("CACHE_CHANNEL", "lc_cache")
+CACHE_TTL_S = float(os.getenv("CACHE_TTL_S", "600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+
+_MISSING = object()
+
+
+class LocalCache:
+    def __init__(self, name: str, maxsize: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_S):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        # sync routes run in the threadpool
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and item[0] < now:
+                del self._data[key]
+                item = _MISSING
+            if item is not _MISSING:
+                self._data.move_to_end(key)
+        record_cache(self.name, hit=item is not _MISSING)
+        return default if item is _MISSING else item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def evict(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def evict_prefix(self, head: Hashable) -> None:
+        """
+        Drops tuple keys whose first element is `head`.
+        """
+        with self._lock:
+            for k in [k for k in self._data if isinstance(k, tuple) and k and k[0] == head]:
+                del self._data[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+query_embeddings = LocalCache("query_embedding")   # (model, text) -> vector
+search_results = LocalCache("search")              # (session_id, kind, [model,] query, limit, ...) -> hits
+answers = LocalCache("answer_row")                 # question_id -> serialized answer
+
+_ALL = (query_embeddings, search_results, answers)
+
+
+def apply(kind: str, key: str | None) -> None:
+    if kind == "chunks":
+        if key is None:
+            search_results.clear()
+        else:
+            search_results.evict_prefix(key)
+    elif kind == "answer":
+        answers.evict(key)
+    elif kind == "model":
+        if key is None:
+            query_embeddings.clear()
+        else:
+            query_embeddings.evict_prefix(key)
+        search_results.clear()
+        embed_models.refresh()
+    else:
+        clear_all()
+
+
+def clear_all() -> None:
+    for c in _ALL:
+        c.clear()
+
+
+def handle_payload(payload: str) -> None:
+    msg = json.loads(payload)
+    apply(msg.get("kind", ""), msg.get("key"))
+
+
+def _apply_pending(session: Session) -> None:
+    pending = session.info["cache_pending"]
+    items, pending[:] = list(pending), []
+    for kind, key in items:
+        apply(kind, key)
+
+
+def _drop_pending(session: Session) -> None:
+    # the NOTIFYs were rolled back with the transaction; so are the local evictions
+    session.info["cache_pending"].clear()
+
+
+def invalidate(db: Session, kind: str, key: uuid.UUID | str | None) -> None:
+    """
+    Broadcasts an invalidation with the caller's transaction; the local
+    eviction runs on commit so this worker never serves the old value, and
+    is dropped if the transaction rolls back.
+    """
+    key = str(key) if key is not None else None
+    payload = json.dumps({"kind": kind, "key": key})
+    db.execute(sql_text("SELECT pg_notify(:ch, :payload)"), {"ch": CACHE_CHANNEL, "payload": payload})
+    pending = db.info.get("cache_pending")
+    if pending is None:
+        # one listener pair per Session, however many invalidations it makes
+        pending = db.info["cache_pending"] = []
+        event.listen(db, "after_commit", _apply_pending)
+        event.listen(db, "after_rollback", _drop_pending)
+    pending.append((kind, key))
+
+
+def stats() -> dict:
+    return {c.name: len(c) for c in _ALL}
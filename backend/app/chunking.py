@@ -5,6 +5,15 @@ from typing import Iterable, Tuple
 
 
 MARKER_RE = re.compile(r"^---\s+(page|slide)\s+(\d+)\s+---\s*$", re.IGNORECASE)
+PAGE_NUM_RE = re.compile(r"(\d+)")
+
+
+def page_number(page_ref: str | None) -> int | None:
+    """
+    "slide 12" -> 12; stored as resource_chunks.page_num for page-range filters.
+    """
+    m = PAGE_NUM_RE.search(page_ref) if page_ref else None
+    return int(m.group(1)) if m else None
 
 
 def split_by_markers(extracted_text: str) -> list[Tuple[str | None, str]]:
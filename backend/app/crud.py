@@ -1,52 +1,142 @@
+import json
+import logging
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from app.embeddings import embed_text
-from sqlalchemy import select, exists, func, text as sql_text
-from sqlalchemy.orm import Session
+from app.embeddings import (
+    embed_text, vector_columns, EMBED_STORAGE, EMBED_RESCORE_K, EMBED_ITERATIVE_SCAN, EMBED_EXACT_MAX_CHUNKS,
+)
+from app import cache, embed_models
+from app.embed_models import EmbedModel
+from app.chunking import page_number
+from app.events import publish, publish_many
+from app.extract import detect_source_type
+from app.tiering import ensure_hot
+from app.metrics import timed
+from sqlalchemy import delete, select, exists, func, tuple_, text as sql_text
+from sqlalchemy.orm import Session, load_only
 
 from app.models import (
     Session as SessionModel,
     Question as QuestionModel,
     Resource as ResourceModel,
+    ResourceText as ResourceTextModel,
     ResourceChunk as ResourceChunkModel,
+    ChunkEmbedding as ChunkEmbeddingModel,
     Answer as AnswerModel,
+    AnswerSource as AnswerSourceModel,
+    Upload as UploadModel,
+    UploadPart as UploadPartModel,
+    Deletion as DeletionModel,
 )
 
+log = logging.getLogger(__name__)
+
+# --------------------
+# Keyset pagination helpers
+# --------------------
+
+def _only(model, columns: list[str] | None, *keys: str):
+    """
+    load_only() option for a projected list; sort keys are always loaded so the
+    router can build the next cursor.
+    """
+    if not columns:
+        return None
+    names = [c for c in dict.fromkeys([*columns, *keys]) if c in model.__table__.c]
+    return load_only(*[getattr(model, c) for c in names])
+
+
+def _page(stmt, model, columns: list[str] | None, limit: int | None, *keys: str):
+    opt = _only(model, columns, *keys)
+    if opt is not None:
+        stmt = stmt.options(opt)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
 # --------------------
 # Sessions + Questions
 # --------------------
 
-def create_session(db: Session, title: str, topics: str | None):
-    s = SessionModel(title=title, topics=topics)
+def create_session(db: Session, title: str, topics: str | None, prefetch_budget: int | None = None):
+    s = SessionModel(title=title, topics=topics, prefetch_budget=prefetch_budget)
     db.add(s)
     db.commit()
     db.refresh(s)
     return s
 
 
-def list_sessions(db: Session):
+def list_sessions(
+    db: Session,
+    limit: int | None = None,
+    after: tuple[datetime, uuid.UUID] | None = None,
+):
+    """
+    Newest first. `after` is the (created_at, id) of the last row of the previous page.
+    Counts come from the trigger-maintained counter columns on sessions.
+    """
     stmt = (
-        select(
-            SessionModel,
-            func.count(QuestionModel.id).label("question_count"),
-        )
-        .outerjoin(QuestionModel, QuestionModel.session_id == SessionModel.id)
-        .group_by(SessionModel.id)
-        .order_by(SessionModel.created_at.desc())
+        select(SessionModel)
+        .where(SessionModel.deleted_at.is_(None))
+        .order_by(SessionModel.created_at.desc(), SessionModel.id.desc())
     )
-    return db.execute(stmt).all()
+    if after is not None:
+        stmt = stmt.where(tuple_(SessionModel.created_at, SessionModel.id) < tuple_(*after))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.execute(stmt).scalars().all()
+
+
+_CLAIM_PREFETCH_SQL = """
+    UPDATE sessions SET prefetch_used = prefetch_used + 1
+    WHERE id = :sid AND prefetch_used < COALESCE(prefetch_budget, :default_budget)
+    RETURNING prefetch_used
+"""
+
+
+def claim_prefetch_budget(db: Session, session_id: uuid.UUID, default_budget: int) -> bool:
+    """
+    Atomically takes one speculative-answer slot from the session's budget;
+    False when it is used up. Shared by all workers since it lives on the row.
+    """
+    row = db.execute(sql_text(_CLAIM_PREFETCH_SQL), {"sid": session_id, "default_budget": default_budget}).first()
+    db.commit()
+    return row is not None
+
+
+def refund_prefetch_budget(db: Session, session_id: uuid.UUID) -> None:
+    db.execute(
+        sql_text("UPDATE sessions SET prefetch_used = prefetch_used - 1 WHERE id = :sid AND prefetch_used > 0"),
+        {"sid": session_id},
+    )
+    db.commit()
 
 
 def get_session(db: Session, session_id: uuid.UUID):
-    return db.get(SessionModel, session_id)
+    s = db.get(SessionModel, session_id)
+    return s if s is not None and s.deleted_at is None else None
 
 
-def list_questions(db: Session, session_id: uuid.UUID):
+def list_questions(
+    db: Session,
+    session_id: uuid.UUID,
+    limit: int | None = None,
+    after: tuple[int, uuid.UUID] | None = None,
+    columns: list[str] | None = None,
+):
+    """
+    Ascending by order_index. `after` is the (order_index, id) of the last row of the previous page.
+    """
     stmt = (
         select(QuestionModel)
         .where(QuestionModel.session_id == session_id)
-        .order_by(QuestionModel.order_index.asc())
+        .order_by(QuestionModel.order_index.asc(), QuestionModel.id.asc())
     )
+    if after is not None:
+        stmt = stmt.where(tuple_(QuestionModel.order_index, QuestionModel.id) > tuple_(*after))
+    stmt = _page(stmt, QuestionModel, columns, limit, "order_index")
     return db.execute(stmt).scalars().all()
 
 
@@ -55,22 +145,52 @@ def list_questions_by_session(db: Session, session_id: uuid.UUID):
     return list_questions(db, session_id)
 
 
-def create_question(db: Session, session_id: uuid.UUID, text: str):
-    max_stmt = select(func.coalesce(func.max(QuestionModel.order_index), 0)).where(
-        QuestionModel.session_id == session_id
+_INSERT_QUESTIONS_SQL = """
+    WITH alloc AS (
+        -- row lock on the session serialises allocation; no read-then-write race.
+        -- A session deleted meanwhile matches nothing, so nothing is inserted.
+        UPDATE sessions SET question_seq = question_seq + :n, last_active_at = now()
+        WHERE id = :sid AND deleted_at IS NULL
+        RETURNING question_seq
     )
-    current_max = db.execute(max_stmt).scalar_one()
-    next_index = int(current_max) + 1
+    INSERT INTO questions (id, session_id, text, asked_at, order_index)
+    SELECT gen_random_uuid(), :sid, t.text, now(), alloc.question_seq - :n + t.ord
+    FROM alloc, unnest(CAST(:texts AS text[])) WITH ORDINALITY AS t(text, ord)
+    RETURNING id, session_id, text, asked_at, order_index
+"""
+
 
-    q = QuestionModel(session_id=session_id, text=text, order_index=next_index)
-    db.add(q)
+def create_questions(db: Session, session_id: uuid.UUID, texts: list[str]):
+    """
+    Inserts questions in one statement, allocating a contiguous order_index
+    range from the per-session counter. Returns rows in order_index order;
+    none when the session is gone or soft-deleted.
+    """
+    if not texts:
+        return []
+    rows = db.execute(
+        sql_text(_INSERT_QUESTIONS_SQL),
+        {"sid": session_id, "n": len(texts), "texts": list(texts)},
+    ).all()
+    rows = sorted(rows, key=lambda r: r.order_index)
+    # one NOTIFY statement for the batch, not one round trip per question
+    publish_many(db, session_id, "question.created", [dict(row._mapping) for row in rows])
     db.commit()
-    db.refresh(q)
-    return q
+    return rows
+
+
+def create_question(db: Session, session_id: uuid.UUID, text: str):
+    rows = create_questions(db, session_id=session_id, texts=[text])
+    return rows[0] if rows else None
 
 
 def get_question(db: Session, question_id: uuid.UUID):
-    return db.get(QuestionModel, question_id)
+    stmt = (
+        select(QuestionModel)
+        .join(SessionModel, SessionModel.id == QuestionModel.session_id)
+        .where(QuestionModel.id == question_id, SessionModel.deleted_at.is_(None))
+    )
+    return db.execute(stmt).scalar_one_or_none()
 
 
 # --------------------
@@ -93,50 +213,265 @@ def create_resource(
         mime_type=mime_type,
         storage_path=storage_path,
         status=status,
-        extracted_text=extracted_text if status == "EXTRACTED" else None,
         error=error if status == "FAILED" else None,
         extracted_at=datetime.now(timezone.utc) if status in {"EXTRACTED", "FAILED"} else None,
     )
+    if status == "EXTRACTED" and extracted_text is not None:
+        r.text_row = ResourceTextModel(extracted_text=extracted_text)
     db.add(r)
+    db.flush()
+    publish(db, session_id, "resource.extracted" if r.extracted_at else "resource.created", _resource_event(r))
     db.commit()
     db.refresh(r)
     return r
 
 
-def list_resources(db: Session, session_id: uuid.UUID):
+def _resource_event(r: ResourceModel) -> dict:
+    return {
+        "id": r.id,
+        "session_id": r.session_id,
+        "filename": r.filename,
+        "mime_type": r.mime_type,
+        "status": r.status,
+        "created_at": r.created_at,
+        "extracted_at": r.extracted_at,
+        "error": r.error,
+    }
+
+
+def list_resources(
+    db: Session,
+    session_id: uuid.UUID,
+    limit: int | None = None,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    columns: list[str] | None = None,
+):
+    # resource rows no longer carry the deck text, so this stays cheap as decks grow
     stmt = (
         select(ResourceModel)
-        .where(ResourceModel.session_id == session_id)
-        .order_by(ResourceModel.created_at.desc())
+        .where(ResourceModel.session_id == session_id, ResourceModel.deleted_at.is_(None))
+        .order_by(ResourceModel.created_at.desc(), ResourceModel.id.desc())
     )
+    if after is not None:
+        stmt = stmt.where(tuple_(ResourceModel.created_at, ResourceModel.id) < tuple_(*after))
+    stmt = _page(stmt, ResourceModel, columns, limit, "created_at")
     return db.execute(stmt).scalars().all()
 
 
 def get_resource(db: Session, resource_id: uuid.UUID):
-    return db.get(ResourceModel, resource_id)
+    stmt = (
+        select(ResourceModel)
+        .join(SessionModel, SessionModel.id == ResourceModel.session_id)
+        .where(ResourceModel.id == resource_id, ResourceModel.deleted_at.is_(None), SessionModel.deleted_at.is_(None))
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def get_resource_text(db: Session, resource_id: uuid.UUID) -> str | None:
+    stmt = select(ResourceTextModel.extracted_text).where(ResourceTextModel.resource_id == resource_id)
+    return db.execute(stmt).scalar_one_or_none()
 
 
 def list_extractable_resources(db: Session, session_id: uuid.UUID):
+    """
+    Lightweight rows (id, status, has_text) for chunking; the text itself is
+    fetched one resource at a time with get_resource_text().
+    """
+    has_text = exists().where(ResourceTextModel.resource_id == ResourceModel.id)
     stmt = (
-        select(ResourceModel)
-        .where(ResourceModel.session_id == session_id)
+        select(ResourceModel.id, ResourceModel.status, has_text.label("has_text"))
+        .where(ResourceModel.session_id == session_id, ResourceModel.deleted_at.is_(None))
         .order_by(ResourceModel.created_at.desc())
     )
-    return db.execute(stmt).scalars().all()
+    return db.execute(stmt).all()
+
+
+# --------------------
+# Resumable uploads
+# --------------------
+
+def create_upload(
+    db: Session,
+    upload_id: uuid.UUID,
+    session_id: uuid.UUID,
+    filename: str,
+    mime_type: str | None,
+    size: int,
+    sha256: str | None,
+    storage_path: str,
+):
+    u = UploadModel(
+        id=upload_id,
+        session_id=session_id,
+        filename=filename,
+        mime_type=mime_type,
+        size=size,
+        sha256=sha256,
+        storage_path=storage_path,
+    )
+    db.add(u)
+    db.commit()
+    db.refresh(u)
+    return u
+
+
+def get_upload(db: Session, upload_id: uuid.UUID):
+    """
+    None also once the upload's session is deleted, so its parts and
+    completion are refused.
+    """
+    return db.execute(
+        select(UploadModel)
+        .join(SessionModel, SessionModel.id == UploadModel.session_id)
+        .where(UploadModel.id == upload_id, SessionModel.deleted_at.is_(None))
+    ).scalar_one_or_none()
+
+
+_RECORD_PART_SQL = """
+    WITH part AS (
+      INSERT INTO upload_parts (upload_id, start_byte, end_byte, sha256)
+      VALUES (:uid, :start, :end, :sha256)
+      ON CONFLICT (upload_id, start_byte)
+      DO UPDATE SET end_byte = EXCLUDED.end_byte, sha256 = EXCLUDED.sha256, received_at = now()
+    )
+    UPDATE uploads SET updated_at = now() WHERE id = :uid
+"""
+
+
+def record_upload_part(db: Session, upload_id: uuid.UUID, start: int, end: int, sha256: str) -> None:
+    """
+    Marks [start, end) as written. Re-sending a part replaces its row.
+    """
+    db.execute(sql_text(_RECORD_PART_SQL), {"uid": upload_id, "start": start, "end": end, "sha256": sha256})
+    db.commit()
+
+
+def list_upload_ranges(db: Session, upload_id: uuid.UUID) -> list[tuple[int, int]]:
+    """
+    Received byte ranges, merged and sorted; end is exclusive.
+    """
+    stmt = (
+        select(UploadPartModel.start_byte, UploadPartModel.end_byte)
+        .where(UploadPartModel.upload_id == upload_id)
+        .order_by(UploadPartModel.start_byte)
+    )
+    merged: list[tuple[int, int]] = []
+    for start, end in db.execute(stmt):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def list_upload_parts(db: Session, upload_id: uuid.UUID) -> list[tuple[int, int, str]]:
+    """
+    Recorded parts as (start, end, sha256), by start.
+    """
+    stmt = (
+        select(UploadPartModel.start_byte, UploadPartModel.end_byte, UploadPartModel.sha256)
+        .where(UploadPartModel.upload_id == upload_id)
+        .order_by(UploadPartModel.start_byte)
+    )
+    return [tuple(row) for row in db.execute(stmt)]
+
+
+def set_upload_status(db: Session, upload_id: uuid.UUID, status: str, expect: str | None = None) -> bool:
+    """
+    Moves the upload to `status`; with `expect`, only from that status (so two
+    concurrent completions can't both win). False when nothing changed.
+    """
+    row = db.execute(
+        sql_text(
+            "UPDATE uploads SET status = :status, updated_at = now() "
+            "WHERE id = :uid AND (CAST(:expect AS text) IS NULL OR status = :expect) RETURNING id"
+        ),
+        {"uid": upload_id, "status": status, "expect": expect},
+    ).first()
+    db.commit()
+    return row is not None
+
+
+def complete_upload(db: Session, upload_id: uuid.UUID, resource_id: uuid.UUID) -> None:
+    db.execute(
+        sql_text("UPDATE uploads SET status = 'COMPLETE', resource_id = :rid, updated_at = now() WHERE id = :uid"),
+        {"uid": upload_id, "rid": resource_id},
+    )
+    db.execute(delete(UploadPartModel).where(UploadPartModel.upload_id == upload_id))
+    db.commit()
+
+
+def delete_upload(db: Session, upload_id: uuid.UUID) -> None:
+    db.execute(delete(UploadModel).where(UploadModel.id == upload_id))
+    db.commit()
+
+
+def expire_uploads(db: Session, older_than: datetime) -> list[str]:
+    """
+    Drops unfinished uploads untouched since `older_than` (completed ones just
+    lose their row). Returns the storage paths of the abandoned files.
+    """
+    rows = db.execute(
+        delete(UploadModel)
+        .where(UploadModel.updated_at < older_than)
+        .returning(UploadModel.storage_path, UploadModel.status)
+    ).all()
+    db.commit()
+    return [path for path, status in rows if status != "COMPLETE"]
+
+
+_MARK_STALE_SQL = """
+    UPDATE answers SET stale_at = now()
+    WHERE stale_at IS NULL
+      AND id IN (SELECT answer_id FROM answer_sources WHERE resource_id = :rid)
+    RETURNING session_id, question_id
+"""
+
+
+def mark_answers_stale_for_resource(db: Session, resource_id: uuid.UUID) -> int:
+    """
+    Flags only the answers that cite this resource; call it in the same
+    transaction that replaces the resource's chunks. Does not commit.
+    """
+    rows = db.execute(sql_text(_MARK_STALE_SQL), {"rid": resource_id}).all()
+    for row in rows:
+        publish(db, row.session_id, "answer.stale", {"question_id": row.question_id, "resource_id": resource_id})
+        cache.invalidate(db, "answer", row.question_id)
+    return len(rows)
 
 
 def delete_chunks_for_resource(db: Session, resource_id: uuid.UUID):
-    db.query(ResourceChunkModel).filter(ResourceChunkModel.resource_id == resource_id).delete()
+    r = get_resource(db, resource_id)
+    if r is not None:
+        ensure_hot(db, r.session_id)
+    mark_answers_stale_for_resource(db, resource_id=resource_id)
+    stmt = delete(ResourceChunkModel).where(ResourceChunkModel.resource_id == resource_id)
+    if r is not None:
+        # only that session's partition is scanned
+        stmt = stmt.where(ResourceChunkModel.session_id == r.session_id)
+    sessions = {row.session_id for row in db.execute(stmt.returning(ResourceChunkModel.session_id))}
+    for sid in sessions:
+        cache.invalidate(db, "chunks", sid)
     db.commit()
 
 
+def _resource_source_type(db: Session, resource_id: uuid.UUID) -> str | None:
+    r = get_resource(db, resource_id)
+    return detect_source_type(r.filename, r.mime_type) if r else None
+
+
 def create_chunks_for_resource(
     db: Session,
     session_id: uuid.UUID,
     resource_id: uuid.UUID,
     chunks: list[tuple[str | None, str]],
 ):
-    db.query(ResourceChunkModel).filter(ResourceChunkModel.resource_id == resource_id).delete()
+    ensure_hot(db, session_id)
+    kind = _resource_source_type(db, resource_id)
+    mark_answers_stale_for_resource(db, resource_id=resource_id)
+    db.query(ResourceChunkModel).filter(
+        ResourceChunkModel.session_id == session_id, ResourceChunkModel.resource_id == resource_id
+    ).delete()
     db.commit()
 
     rows = []
@@ -148,6 +483,8 @@ def create_chunks_for_resource(
                 resource_id=resource_id,
                 chunk_index=idx,
                 page_ref=ref,
+                page_num=page_number(ref),
+                source_type=kind,
                 text=txt,      
             )
         )
@@ -157,38 +494,112 @@ def create_chunks_for_resource(
     return len(rows)
 
 
+CHUNK_PROGRESS_EVERY = 16
+
+
 async def create_chunks_for_resource_with_embeddings(
     db: Session,
     session_id: uuid.UUID,
     resource_id: uuid.UUID,
     chunks: list[tuple[str | None, str]],
 ):
-    # delete existing
-    db.query(ResourceChunkModel).filter(ResourceChunkModel.resource_id == resource_id).delete()
+    total = len(chunks)
+    ensure_hot(db, session_id)
+    kind = _resource_source_type(db, resource_id)
+
+    # delete existing; answers citing the old chunks go stale
+    mark_answers_stale_for_resource(db, resource_id=resource_id)
+    db.query(ResourceChunkModel).filter(
+        ResourceChunkModel.session_id == session_id, ResourceChunkModel.resource_id == resource_id
+    ).delete()
+    publish(db, session_id, "chunking.progress", {"resource_id": resource_id, "done": 0, "total": total})
+    cache.invalidate(db, "chunks", session_id)
     db.commit()
 
-    rows = []
+    # while scripts.reembed builds a new model, new chunks get a vector from both
+    models = embed_models.live(db)
+    rows, vectors = [], []
     for idx, (ref, txt) in enumerate(chunks, start=1):
-        emb = await embed_text(txt)
-        rows.append(
-            ResourceChunkModel(
-                session_id=session_id,
-                resource_id=resource_id,
-                chunk_index=idx,
-                page_ref=ref,
-                text=txt,
-                embedding=emb,
-            )
+        if idx > 1 and (idx - 1) % CHUNK_PROGRESS_EVERY == 0:
+            # progress NOTIFYs go out on their own tiny commits
+            publish(db, session_id, "chunking.progress", {"resource_id": resource_id, "done": idx - 1, "total": total})
+            db.commit()
+        row = ResourceChunkModel(
+            id=uuid.uuid4(),
+            session_id=session_id,
+            resource_id=resource_id,
+            chunk_index=idx,
+            page_ref=ref,
+            page_num=page_number(ref),
+            source_type=kind,
+            text=txt,
         )
+        rows.append(row)
+        for m in models:
+            emb = await embed_text(txt, m.name)
+            vectors.append(
+                ChunkEmbeddingModel(session_id=session_id, chunk_id=row.id, model_id=m.id, **vector_columns(emb))
+            )
 
     db.add_all(rows)
+    db.flush()  # no ORM relationship orders the two inserts
+    db.add_all(vectors)
+    publish(db, session_id, "chunking.progress", {"resource_id": resource_id, "done": total, "total": total})
+    cache.invalidate(db, "chunks", session_id)
     db.commit()
     return len(rows)
 
 
-def search_chunks_fts(db: Session, session_id: uuid.UUID, query: str, limit: int = 6):
-    stmt = sql_text(
+@dataclass(frozen=True)
+class ChunkFilter:
+    """
+    Narrows a session's retrieval to some resources / a page or slide range /
+    a file type. The columns are in the FTS GIN index (btree_gin), so the
+    conditions are checked inside the index scan. On the vector path a
+    narrow filter is ranked exactly (ix_chunks_resource_page finds the rows);
+    source_type alone uses the HNSW scan with iterative scan.
+    """
+    resource_ids: tuple[uuid.UUID, ...] = ()
+    page_from: int | None = None
+    page_to: int | None = None
+    source_type: str | None = None
+
+    @property
+    def narrow(self) -> bool:
+        return bool(self.resource_ids) or self.page_from is not None or self.page_to is not None
+
+    def sql(self) -> tuple[str, dict]:
         """
+        Extra `AND ...` conditions on alias `c`, and their bind params.
+        """
+        clauses, params = [], {}
+        if self.resource_ids:
+            clauses.append("AND c.resource_id = ANY(CAST(:f_rids AS uuid[]))")
+            params["f_rids"] = [str(r) for r in self.resource_ids]
+        if self.page_from is not None:
+            clauses.append("AND c.page_num >= :f_page_from")
+            params["f_page_from"] = self.page_from
+        if self.page_to is not None:
+            clauses.append("AND c.page_num <= :f_page_to")
+            params["f_page_to"] = self.page_to
+        if self.source_type:
+            clauses.append("AND c.source_type = :f_type")
+            params["f_type"] = self.source_type
+        return " ".join(clauses), params
+
+
+@timed("search_chunks_fts")
+def search_chunks_fts(
+    db: Session,
+    session_id: uuid.UUID,
+    query: str,
+    limit: int = 6,
+    filters: ChunkFilter | None = None,
+):
+    ensure_hot(db, session_id)
+    where, params = (filters or ChunkFilter()).sql()
+    stmt = sql_text(
+        f"""
         SELECT
           c.id AS chunk_id,
           c.resource_id AS resource_id,
@@ -199,13 +610,15 @@ def search_chunks_fts(db: Session, session_id: uuid.UUID, query: str, limit: int
         FROM resource_chunks c
         JOIN resources r ON r.id = c.resource_id
         WHERE c.session_id = :sid
+          AND r.deleted_at IS NULL
           AND to_tsvector('english', c.text) @@ plainto_tsquery('english', :q)
+          {where}
         ORDER BY rank DESC
         LIMIT :lim
         """
     )
 
-    rows = db.execute(stmt, {"sid": str(session_id), "q": query, "lim": limit}).mappings().all()
+    rows = db.execute(stmt, {"sid": str(session_id), "q": query, "lim": limit, **params}).mappings().all()
     return [
         {
             "chunk_id": row["chunk_id"],
@@ -228,11 +641,73 @@ def get_answer_by_question(db: Session, question_id: uuid.UUID):
     return db.execute(stmt).scalars().first()
 
 
+def _answer_event(a: AnswerModel) -> dict:
+    return {
+        "id": a.id,
+        "session_id": a.session_id,
+        "question_id": a.question_id,
+        "answer_md": a.answer_md,
+        "sources_json": a.sources_json,
+        "created_at": a.created_at,
+        "stale_at": a.stale_at,
+    }
+
+
+_INSERT_SOURCES_SQL = """
+    INSERT INTO answer_sources (answer_id, rank, chunk_id, resource_id)
+    SELECT :aid, s.ord, c.id, c.resource_id
+    FROM unnest(CAST(:chunk_ids AS uuid[])) WITH ORDINALITY AS s(chunk_id, ord)
+    JOIN resource_chunks c ON c.id = s.chunk_id AND c.session_id = :sid
+"""
+
+# a.sources_json as a jsonb array; '[]' for legacy rows that are not a JSON
+# array (or not JSON at all). CASE keeps the cast off rows that fail the check.
+SOURCES_ARRAY_SQL = """
+    CASE WHEN left(a.sources_json, 1) = '[' AND pg_input_is_valid(a.sources_json, 'jsonb')
+         THEN a.sources_json::jsonb ELSE '[]'::jsonb END
+"""
+
+
+def backfill_sources_sql(where: str = "TRUE") -> str:
+    """
+    INSERT ... SELECT that rebuilds answer_sources from sources_json for the
+    answers matching `where` (SQL on `a`, no % other than placeholders).
+    Shared by the d0e1f2a3b4c5 backfill and scripts.session_archive import;
+    citations whose chunk is gone are skipped.
+    """
+    return f"""
+        INSERT INTO answer_sources (answer_id, rank, chunk_id, resource_id)
+        SELECT a.id, s.ord, c.id, c.resource_id
+        FROM answers a
+        CROSS JOIN LATERAL jsonb_array_elements({SOURCES_ARRAY_SQL}) WITH ORDINALITY AS s(elem, ord)
+        JOIN resource_chunks c ON c.id::text = s.elem->>'chunk_id' AND c.session_id = a.session_id
+        WHERE {where}
+        ON CONFLICT DO NOTHING
+    """
+
+
+def _replace_sources(db: Session, session_id: uuid.UUID, answer_id: uuid.UUID, sources_json: str) -> None:
+    # rank = position in sources_json = the [n] bracket number in the answer
+    try:
+        sources = json.loads(sources_json)
+    except ValueError:
+        sources = []
+    chunk_ids = [s["chunk_id"] for s in sources if isinstance(s, dict) and s.get("chunk_id")]
+    db.execute(delete(AnswerSourceModel).where(AnswerSourceModel.answer_id == answer_id))
+    if chunk_ids:
+        db.execute(sql_text(_INSERT_SOURCES_SQL), {"aid": answer_id, "sid": session_id, "chunk_ids": chunk_ids})
+
+
+@timed("upsert_answer")
 def upsert_answer(db: Session, session_id: uuid.UUID, question_id: uuid.UUID, answer_md: str, sources_json: str):
     existing = get_answer_by_question(db, question_id=question_id)
     if existing:
         existing.answer_md = answer_md
         existing.sources_json = sources_json
+        existing.stale_at = None
+        _replace_sources(db, session_id, existing.id, sources_json)
+        publish(db, session_id, "answer.ready", _answer_event(existing))
+        cache.invalidate(db, "answer", question_id)
         db.commit()
         db.refresh(existing)
         return existing
@@ -244,52 +719,227 @@ def upsert_answer(db: Session, session_id: uuid.UUID, question_id: uuid.UUID, an
         sources_json=sources_json,
     )
     db.add(a)
+    db.flush()
+    _replace_sources(db, session_id, a.id, sources_json)
+    publish(db, session_id, "answer.ready", _answer_event(a))
+    cache.invalidate(db, "answer", question_id)
     db.commit()
     db.refresh(a)
     return a
 
 
 def list_unanswered_questions(db: Session, session_id: uuid.UUID):
+    """
+    Questions with no answer, or whose answer went stale because a cited
+    resource was re-chunked.
+    """
     stmt = (
         select(QuestionModel)
         .where(QuestionModel.session_id == session_id)
-        .where(~exists().where(AnswerModel.question_id == QuestionModel.id))
+        .where(~exists().where(AnswerModel.question_id == QuestionModel.id, AnswerModel.stale_at.is_(None)))
         .order_by(QuestionModel.order_index.asc())
     )
     return db.execute(stmt).scalars().all()
 
 
-def list_answers_by_session(db: Session, session_id: uuid.UUID):
+def list_answers_by_session(
+    db: Session,
+    session_id: uuid.UUID,
+    limit: int | None = None,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    columns: list[str] | None = None,
+):
     # DESC so newest answers come first (nice for “regenerate” semantics)
     stmt = (
         select(AnswerModel)
         .where(AnswerModel.session_id == session_id)
-        .order_by(AnswerModel.created_at.desc())
+        .order_by(AnswerModel.created_at.desc(), AnswerModel.id.desc())
     )
+    if after is not None:
+        stmt = stmt.where(tuple_(AnswerModel.created_at, AnswerModel.id) < tuple_(*after))
+    stmt = _page(stmt, AnswerModel, columns, limit, "created_at")
     return db.execute(stmt).scalars().all()
 
-def search_chunks_semantic(db: Session, session_id: uuid.UUID, query_vec: list[float], limit: int = 6):
-    qvec_str = "[" + ",".join(str(float(x)) for x in query_vec) + "]"
+def list_answers_citing_resource(db: Session, resource_id: uuid.UUID):
+    cited = select(AnswerSourceModel.answer_id).where(AnswerSourceModel.resource_id == resource_id)
+    stmt = (
+        select(AnswerModel)
+        .where(AnswerModel.id.in_(cited))
+        .order_by(AnswerModel.created_at.desc(), AnswerModel.id.desc())
+    )
+    return db.execute(stmt).scalars().all()
 
-    stmt = sql_text("""
+
+def _semantic_sql(model: EmbedModel, storage: str, rescore_k: int, where: str = "", exact: bool = False) -> str:
+    # the model id and dimension are inlined so the planner can match the
+    # model's partial HNSW index (WHERE model_id = <id>, halfvec(<dim>))
+    dim, half = model.dim, model.half_expr("e")
+    base = f"""
+            FROM chunk_embeddings e
+            JOIN resource_chunks c ON c.id = e.chunk_id AND c.session_id = e.session_id
+            JOIN resources r ON r.id = c.resource_id
+            WHERE e.session_id = :sid
+              AND c.session_id = :sid
+              AND e.model_id = {model.id}
+              AND r.deleted_at IS NULL
+    """
+    if storage != "half":
+        return f"""
+            SELECT
+              c.id AS chunk_id,
+              c.resource_id AS resource_id,
+              r.filename AS filename,
+              c.page_ref AS page_ref,
+              c.text AS text,
+              (1 - (e.embedding::vector({dim}) <=> (:qvec)::vector({dim}))) AS rank
+            {base}
+              AND e.embedding IS NOT NULL
+              {where}
+            ORDER BY e.embedding::vector({dim}) <=> (:qvec)::vector({dim}) ASC
+            LIMIT :lim
+        """
+
+    if exact:
+        # MATERIALIZED keeps ORDER BY / LIMIT out of the scan, so the planner
+        # can't use the HNSW index: every row of the session (or of the
+        # filtered resources / pages, via their btree indexes) is ranked
+        return f"""
+            WITH scored AS MATERIALIZED (
+                SELECT
+                  c.id AS chunk_id,
+                  c.resource_id AS resource_id,
+                  r.filename AS filename,
+                  c.page_ref AS page_ref,
+                  c.text AS text,
+                  COALESCE(
+                      e.embedding::vector({dim}) <=> (:qvec)::vector({dim}),
+                      {half} <=> (:qvec)::halfvec({dim})
+                  ) AS dist
+                {base}
+                  {where}
+            )
+            SELECT chunk_id, resource_id, filename, page_ref, text, (1 - dist) AS rank
+            FROM scored
+            WHERE dist IS NOT NULL
+            ORDER BY dist ASC
+            LIMIT :lim
+        """
+
+    if rescore_k <= 0:
+        return f"""
+            SELECT
+              c.id AS chunk_id,
+              c.resource_id AS resource_id,
+              r.filename AS filename,
+              c.page_ref AS page_ref,
+              c.text AS text,
+              (1 - ({half} <=> (:qvec)::halfvec({dim}))) AS rank
+            {base}
+              AND e.embedding_half IS NOT NULL
+              {where}
+            ORDER BY {half} <=> (:qvec)::halfvec({dim}) ASC
+            LIMIT :lim
+        """
+
+    # halfvec candidates from the HNSW index, re-ranked with the float32 vectors
+    return f"""
+        WITH cand AS (
+            SELECT
+              c.id AS chunk_id,
+              c.resource_id AS resource_id,
+              r.filename AS filename,
+              c.page_ref AS page_ref,
+              c.text AS text,
+              e.embedding,
+              e.embedding_half
+            {base}
+              AND e.embedding_half IS NOT NULL
+              {where}
+            ORDER BY {half} <=> (:qvec)::halfvec({dim}) ASC
+            LIMIT :cand
+        )
         SELECT
-          c.id AS chunk_id,
-          c.resource_id AS resource_id,
-          r.filename AS filename,
-          c.page_ref AS page_ref,
-          c.text AS text,
-          (1 - (c.embedding <=> (:qvec)::vector(768))) AS rank
-        FROM resource_chunks c
-        JOIN resources r ON r.id = c.resource_id
-        WHERE c.session_id = :sid
-          AND c.embedding IS NOT NULL
-        ORDER BY c.embedding <=> (:qvec)::vector(768) ASC
+          chunk_id, resource_id, filename, page_ref, text,
+          (1 - COALESCE(
+              embedding::vector({dim}) <=> (:qvec)::vector({dim}),
+              embedding_half::halfvec({dim}) <=> (:qvec)::halfvec({dim})
+          )) AS rank
+        FROM cand
+        ORDER BY rank DESC
         LIMIT :lim
-    """)
+    """
+
+
+_iterative_scan: str | None = None
+
+
+def iterative_scan(db: Session) -> str:
+    """
+    EMBED_ITERATIVE_SCAN resolved against the installed pgvector ("" = off or
+    not supported). Checked once per worker; main does it at startup.
+    """
+    global _iterative_scan
+    if _iterative_scan is None:
+        mode = "" if EMBED_ITERATIVE_SCAN in ("", "off") else EMBED_ITERATIVE_SCAN
+        if mode:
+            version = db.execute(sql_text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+            major_minor = tuple(int(p) for p in (version or "0.0").split(".")[:2])
+            if major_minor < (0, 8):
+                log.warning("pgvector %s has no iterative index scans; filtered searches are ranked exactly", version)
+                mode = ""
+            elif mode == "auto":
+                mode = "relaxed_order"
+        _iterative_scan = mode
+    return _iterative_scan
+
+
+def _small_session(db: Session, session_id: uuid.UUID) -> bool:
+    count = db.execute(
+        sql_text("SELECT chunk_count FROM sessions WHERE id = :sid"), {"sid": session_id}
+    ).scalar()
+    return count is not None and count <= EMBED_EXACT_MAX_CHUNKS
+
+
+@timed("search_chunks_semantic")
+def search_chunks_semantic(
+    db: Session,
+    session_id: uuid.UUID,
+    query_vec: list[float],
+    limit: int = 6,
+    storage: str | None = None,
+    rescore_k: int | None = None,
+    filters: ChunkFilter | None = None,
+    model: EmbedModel | None = None,
+    exact: bool | None = None,
+):
+    """
+    Cosine search over chunk embeddings. `storage` / `rescore_k` default to the
+    EMBED_STORAGE / EMBED_RESCORE_K settings (overridable for benchmarks).
+    `query_vec` must come from `model` (default: the active one). In "half"
+    mode `exact` ranks the matching rows without the HNSW index; by default
+    for narrow filters, for any filter without iterative scan, and for
+    sessions up to EMBED_EXACT_MAX_CHUNKS.
+    """
+    ensure_hot(db, session_id)
+    model = model or embed_models.active(db)
+    storage = (storage or EMBED_STORAGE).lower()
+    rescore_k = EMBED_RESCORE_K if rescore_k is None else rescore_k
+    qvec_str = "[" + ",".join(str(float(x)) for x in query_vec) + "]"
+    filters = filters or ChunkFilter()
+    where, params = filters.sql()
+    iterative = iterative_scan(db)
+    if exact is None:
+        exact = storage == "half" and (
+            filters.narrow or (bool(where) and not iterative) or _small_session(db, session_id)
+        )
+
+    stmt = sql_text(_semantic_sql(model, storage, rescore_k, where, exact=exact))
+    if iterative and not exact:
+        db.execute(sql_text("SELECT set_config('hnsw.iterative_scan', :mode, true)"), {"mode": iterative})
 
     rows = db.execute(
         stmt,
-        {"sid": str(session_id), "qvec": qvec_str, "lim": limit},
+        {"sid": str(session_id), "qvec": qvec_str, "lim": limit, "cand": max(rescore_k, limit), **params},
     ).mappings().all()
 
     return [
@@ -304,7 +954,34 @@ def search_chunks_semantic(db: Session, session_id: uuid.UUID, query_vec: list[f
         }
         for row in rows
     ]
-    
+
+
+def backfill_half_embeddings(db: Session, batch_size: int = 5000) -> int:
+    """
+    Copies float32 embeddings into `embedding_half` for rows that don't have one yet.
+    Used when switching an existing corpus to EMBED_STORAGE=half.
+    """
+    total = 0
+    while True:
+        res = db.execute(
+            sql_text(
+                """
+                UPDATE chunk_embeddings SET embedding_half = embedding::halfvec
+                WHERE (session_id, chunk_id, model_id) IN (
+                    SELECT session_id, chunk_id, model_id FROM chunk_embeddings
+                    WHERE embedding IS NOT NULL AND embedding_half IS NULL
+                    LIMIT :lim
+                )
+                """
+            ),
+            {"lim": batch_size},
+        )
+        db.commit()
+        if not res.rowcount:
+            return total
+        total += res.rowcount
+
+@timed("search_chunks_hybrid")
 def search_chunks_hybrid(
     db: Session,
     session_id: uuid.UUID,
@@ -313,9 +990,13 @@ def search_chunks_hybrid(
     limit: int = 6,
     w_fts: float = 0.45,
     w_sem: float = 0.55,
+    filters: ChunkFilter | None = None,
+    model: EmbedModel | None = None,
 ):
-    fts_hits = search_chunks_fts(db, session_id=session_id, query=query, limit=limit)
-    sem_hits = search_chunks_semantic(db, session_id=session_id, query_vec=query_vec, limit=limit)
+    fts_hits = search_chunks_fts(db, session_id=session_id, query=query, limit=limit, filters=filters)
+    sem_hits = search_chunks_semantic(
+        db, session_id=session_id, query_vec=query_vec, limit=limit, filters=filters, model=model
+    )
 
     combined: dict[str, dict] = {}
 
@@ -341,4 +1022,92 @@ def search_chunks_hybrid(
         r.pop("score", None)
 
     return out
-    
\ No newline at end of file
+    
+
+# --------------------
+# Deletion (soft delete here; app.deletion purges in batches)
+# --------------------
+
+# its resources too: the search queries only look at r.deleted_at
+_HIDE_SESSION_SQL = """
+    WITH s AS (
+      UPDATE sessions SET deleted_at = now() WHERE id = :sid AND deleted_at IS NULL RETURNING id
+    ), r AS (
+      UPDATE resources SET deleted_at = now() WHERE session_id IN (SELECT id FROM s) AND deleted_at IS NULL
+    )
+    SELECT id FROM s
+"""
+
+_HIDE_RESOURCE_SQL = """
+    UPDATE resources r SET deleted_at = now()
+    FROM sessions s
+    WHERE r.id = :rid AND r.session_id = :sid AND r.deleted_at IS NULL
+      AND s.id = r.session_id AND s.deleted_at IS NULL
+    RETURNING r.id
+"""
+
+
+def delete_session(db: Session, session_id: uuid.UUID):
+    """
+    Hides the session from every read path and queues its purge. Repeating
+    it returns the existing job; None when there is no such session.
+    """
+    if db.execute(sql_text(_HIDE_SESSION_SQL), {"sid": session_id}).first() is None:
+        db.rollback()
+        return latest_deletion(db, session_id=session_id)
+    job = DeletionModel(kind="session", session_id=session_id)
+    db.add(job)
+    cache.invalidate(db, "chunks", session_id)
+    publish(db, session_id, "session.deleted", {"id": session_id})
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def delete_resource(db: Session, session_id: uuid.UUID, resource_id: uuid.UUID):
+    """
+    Same for one resource: its chunks drop out of search at once (the
+    UPDATE bumps corpus_version, so list and search ETags change too) and
+    answers citing it are marked stale.
+    """
+    if db.execute(sql_text(_HIDE_RESOURCE_SQL), {"sid": session_id, "rid": resource_id}).first() is None:
+        db.rollback()
+        return latest_deletion(db, session_id=session_id, resource_id=resource_id)
+    job = DeletionModel(kind="resource", session_id=session_id, resource_id=resource_id)
+    db.add(job)
+    mark_answers_stale_for_resource(db, resource_id=resource_id)
+    cache.invalidate(db, "chunks", session_id)
+    publish(db, session_id, "resource.deleted", {"id": resource_id, "session_id": session_id})
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def latest_deletion(db: Session, session_id: uuid.UUID, resource_id: uuid.UUID | None = None):
+    stmt = (
+        select(DeletionModel)
+        .where(DeletionModel.session_id == session_id)
+        .order_by(DeletionModel.created_at.desc())
+        .limit(1)
+    )
+    if resource_id is None:
+        stmt = stmt.where(DeletionModel.kind == "session")
+    else:
+        stmt = stmt.where(DeletionModel.resource_id == resource_id)
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def get_deletion(db: Session, deletion_id: uuid.UUID):
+    return db.get(DeletionModel, deletion_id)
+
+
+def list_deletions(db: Session, session_id: uuid.UUID | None = None, open_only: bool = False, limit: int = 50):
+    """
+    Newest first. `open_only` = still pending or running.
+    """
+    stmt = select(DeletionModel).order_by(DeletionModel.created_at.desc()).limit(limit)
+    if session_id is not None:
+        stmt = stmt.where(DeletionModel.session_id == session_id)
+    if open_only:
+        stmt = stmt.where(DeletionModel.status.in_(("pending", "running")))
+    return db.execute(stmt).scalars().all()
@@ -0,0 +1,257 @@
+"""
+Batched purge of deleted sessions and resources.
+
+DELETE only sets deleted_at (every read path skips the row from then on) and
+queues a row in `deletions`. A plain DELETE FROM sessions would cascade
+through hundreds of thousands of chunks and vectors in one transaction,
+holding locks and flooding the WAL; instead each step below deletes at most
+PURGE_BATCH rows per transaction, PURGE_PAUSE_MS apart:
+
+  chunks     resource_chunks (chunk_embeddings follow by FK cascade)
+  cold       resource_chunks_cold (the counter triggers don't see it)
+  files      UPLOAD_DIR/<session_id>/, or the resource's file
+  answers, questions, texts, uploads, resources   (sessions only; uploads
+             also for a resource)
+  row        the session / resource row, which cascades whatever is left
+
+The job row carries the step and progress (GET /api/deletions/{id}). All
+state is in the database and every step is idempotent, so a job whose worker
+stopped heartbeating for PURGE_STALE_S is resumed by another one.
+purge_loop() runs in each API worker unless PURGE_WORKER=0;
+scripts.purge_deleted drains the queue from the command line.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+import uuid
+from itertools import islice
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, text as sql_text
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import Deletion as DeletionModel
+
+log = logging.getLogger(__name__)
+
+PURGE_WORKER = os.getenv("PURGE_WORKER", "1") == "1"
+PURGE_BATCH = int(os.getenv("PURGE_BATCH", "1000"))
+PURGE_PAUSE_MS = int(os.getenv("PURGE_PAUSE_MS", "50"))
+PURGE_POLL_S = float(os.getenv("PURGE_POLL_S", "30"))
+PURGE_STALE_S = int(os.getenv("PURGE_STALE_S", "300"))
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/app/uploads")
+
+SESSION_STEPS = ("chunks", "cold", "files", "answers", "questions", "texts", "uploads", "resources", "row")
+RESOURCE_STEPS = ("chunks", "cold", "files", "uploads", "row")
+
+# {scope} narrows a session-wide statement to one resource
+_BATCH_SQL = {
+    # session_id on the outer DELETE too: only that partition is touched
+    "chunks": """
+        DELETE FROM resource_chunks WHERE session_id = :sid AND id IN (
+          SELECT id FROM resource_chunks WHERE session_id = :sid {scope} LIMIT :n
+        )
+    """,
+    "cold": """
+        DELETE FROM resource_chunks_cold WHERE id IN (
+          SELECT id FROM resource_chunks_cold WHERE session_id = :sid {scope} LIMIT :n
+        )
+    """,
+    "answers": "DELETE FROM answers WHERE id IN (SELECT id FROM answers WHERE session_id = :sid LIMIT :n)",
+    "questions": "DELETE FROM questions WHERE id IN (SELECT id FROM questions WHERE session_id = :sid LIMIT :n)",
+    "texts": """
+        DELETE FROM resource_texts WHERE resource_id IN (
+          SELECT t.resource_id FROM resource_texts t JOIN resources r ON r.id = t.resource_id
+          WHERE r.session_id = :sid LIMIT :n
+        )
+    """,
+    "uploads": "DELETE FROM uploads WHERE id IN (SELECT id FROM uploads WHERE session_id = :sid {scope} LIMIT :n)",
+    "resources": "DELETE FROM resources WHERE id IN (SELECT id FROM resources WHERE session_id = :sid LIMIT :n)",
+}
+
+_COUNT_CHUNKS_SQL = """
+    SELECT (SELECT count(*) FROM resource_chunks WHERE session_id = :sid {scope})
+         + (SELECT count(*) FROM resource_chunks_cold WHERE session_id = :sid {scope})
+"""
+
+_CLAIM_SQL = """
+    UPDATE deletions d
+    SET status = 'running', started_at = COALESCE(d.started_at, now()), heartbeat_at = now()
+    WHERE d.id = (
+      SELECT id FROM deletions
+      WHERE status = 'pending'
+         OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale))
+      ORDER BY created_at
+      LIMIT 1
+      FOR UPDATE SKIP LOCKED
+    )
+    RETURNING d.id
+"""
+
+
+def _scope(job: DeletionModel) -> tuple[str, dict]:
+    if job.kind == "resource":
+        return "AND resource_id = :rid", {"sid": job.session_id, "rid": job.resource_id}
+    return "", {"sid": job.session_id}
+
+
+# --------------------
+# Files
+# --------------------
+
+def _pending_files(db: Session, job: DeletionModel) -> list[Path]:
+    root = Path(UPLOAD_DIR).resolve()
+    if job.kind == "session":
+        folder = root / str(job.session_id)
+        return list(folder.iterdir()) if folder.is_dir() else []
+    # a completed upload's file is the resource's file; both rows point at it
+    rows = db.execute(
+        sql_text("SELECT storage_path FROM resources WHERE id = :rid UNION SELECT storage_path FROM uploads WHERE resource_id = :rid"),
+        {"rid": job.resource_id},
+    ).scalars()
+    paths = {Path(p).resolve() for p in rows if p}
+    # never outside UPLOAD_DIR (imported sessions may point anywhere)
+    return [p for p in paths if p.is_relative_to(root) and p.exists()]
+
+
+def _remove_files(db: Session, job: DeletionModel, n: int) -> int:
+    files = _pending_files(db, job)
+    if job.files_total is None:
+        job.files_total = len(files)
+    for path in islice(files, n):
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink(missing_ok=True)
+    if job.kind == "session" and len(files) <= n:
+        shutil.rmtree(Path(UPLOAD_DIR).resolve() / str(job.session_id), ignore_errors=True)
+    return min(len(files), n)
+
+
+# --------------------
+# Steps
+# --------------------
+
+def purge_batch(job_id: uuid.UUID) -> bool:
+    """
+    One batch of the job's current step, in its own transaction together
+    with the progress update. False once the job is finished.
+    """
+    with SessionLocal() as db:
+        job = db.get(DeletionModel, job_id, with_for_update=True)
+        if job is None or job.status != "running":
+            return False
+        steps = SESSION_STEPS if job.kind == "session" else RESOURCE_STEPS
+        step = job.step or steps[0]
+        scope, params = _scope(job)
+        if job.chunks_total is None:
+            job.chunks_total = db.execute(sql_text(_COUNT_CHUNKS_SQL.format(scope=scope)), params).scalar_one()
+
+        if step == "row":
+            if job.kind == "session":
+                db.execute(sql_text("DELETE FROM sessions WHERE id = :sid"), params)
+            else:
+                db.execute(sql_text("DELETE FROM resources WHERE id = :rid"), params)
+            job.step, job.status, job.finished_at = step, "done", func.now()
+            db.commit()
+            log.info("purged %s %s", job.kind, job.resource_id or job.session_id)
+            return False
+
+        if step == "files":
+            n = _remove_files(db, job, PURGE_BATCH)
+            job.files_done += n
+        else:
+            n = db.execute(sql_text(_BATCH_SQL[step].format(scope=scope)), {**params, "n": PURGE_BATCH}).rowcount
+            if step == "cold" and n:
+                # cold chunks are still in sessions.chunk_count (app.tiering)
+                db.execute(sql_text("UPDATE sessions SET chunk_count = chunk_count - :n WHERE id = :sid"), {**params, "n": n})
+            if step in ("chunks", "cold"):
+                job.chunks_done += n
+        # a short batch means the step is done; rows added meanwhile go with the final cascade
+        job.step = steps[steps.index(step) + 1] if n < PURGE_BATCH else step
+        job.heartbeat_at = func.now()
+        db.commit()
+        return True
+
+
+def _step(job_id: uuid.UUID) -> bool:
+    try:
+        return purge_batch(job_id)
+    except Exception as e:
+        log.exception("deletion %s failed", job_id)
+        with SessionLocal() as db:
+            db.execute(
+                sql_text("UPDATE deletions SET status = 'failed', error = :err, finished_at = now() WHERE id = :id"),
+                {"id": job_id, "err": f"{e.__class__.__name__}: {e}"[:2000]},
+            )
+            db.commit()
+        return False
+
+
+def claim() -> uuid.UUID | None:
+    """
+    Next pending job, or a running one whose worker went quiet.
+    """
+    with SessionLocal() as db:
+        row = db.execute(sql_text(_CLAIM_SQL), {"stale": PURGE_STALE_S}).first()
+        db.commit()
+    return row.id if row else None
+
+
+def run_pending(max_jobs: int | None = None) -> int:
+    """
+    Runs queued jobs to completion in this thread; returns how many ran.
+    """
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job_id = claim()
+        if job_id is None:
+            break
+        while _step(job_id):
+            time.sleep(PURGE_PAUSE_MS / 1000)
+        ran += 1
+    return ran
+
+
+# --------------------
+# In-process worker
+# --------------------
+
+_wake: asyncio.Event | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def wake() -> None:
+    """
+    Starts this worker's purge loop now instead of at its next poll.
+    Callable from threadpool handlers.
+    """
+    if _wake is not None and _loop is not None:
+        _loop.call_soon_threadsafe(_wake.set)
+
+
+async def purge_loop() -> None:
+    """
+    Lifespan task: runs queued deletions batch by batch in the threadpool,
+    woken by wake() or every PURGE_POLL_S.
+    """
+    global _wake, _loop
+    _wake, _loop = asyncio.Event(), asyncio.get_running_loop()
+    while True:
+        _wake.clear()
+        try:
+            while (job_id := await run_in_threadpool(claim)) is not None:
+                while await run_in_threadpool(_step, job_id):
+                    await asyncio.sleep(PURGE_PAUSE_MS / 1000)
+        except Exception:
+            log.exception("purge loop failed; retrying in %.0fs", PURGE_POLL_S)
+        try:
+            await asyncio.wait_for(_wake.wait(), PURGE_POLL_S)
+        except asyncio.TimeoutError:
+            pass
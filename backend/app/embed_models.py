@@ -0,0 +1,89 @@
+"""
+Embedding model registry (embedding_models).
+
+Every vector in chunk_embeddings carries the id of the model that produced
+it. Exactly one model is "active": search embeds the query with it and only
+looks at its vectors. scripts.reembed registers a new model as "building",
+fills in its vectors next to the active ones (new chunks get both while it
+runs), builds its HNSW index, then flips the two statuses in one
+transaction. The old vectors stay until `reembed --purge`, so a worker that
+still has the old model cached keeps getting consistent results.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text as sql_text
+
+# how long a worker may keep using the previous model after a switch
+EMBED_MODEL_REFRESH_S = float(os.getenv("EMBED_MODEL_REFRESH_S", "10"))
+
+
+@dataclass(frozen=True)
+class EmbedModel:
+    id: int
+    name: str
+    dim: int
+    status: str
+
+    @property
+    def index_name(self) -> str:
+        return f"ix_chunk_embeddings_m{self.id}_half_hnsw"
+
+    def half_expr(self, alias: str = "e") -> str:
+        """
+        The expression the model's partial HNSW index is built on; queries
+        have to repeat it verbatim (with `model_id = <id>` inlined) to use it.
+        """
+        return f"({alias}.embedding_half::halfvec({self.dim}))"
+
+
+_loaded_at = 0.0
+_live: list[EmbedModel] = []
+
+
+def refresh() -> None:
+    global _loaded_at
+    _loaded_at = 0.0
+
+
+def live(db) -> list[EmbedModel]:
+    """
+    Active + building models: new chunks are embedded with each of them.
+    Cached per worker for EMBED_MODEL_REFRESH_S.
+    """
+    global _loaded_at, _live
+    if time.monotonic() - _loaded_at > EMBED_MODEL_REFRESH_S:
+        rows = db.execute(
+            sql_text(
+                "SELECT id, name, dim, status FROM embedding_models "
+                "WHERE status IN ('active', 'building') ORDER BY id"
+            )
+        ).all()
+        _live = [EmbedModel(r.id, r.name, r.dim, r.status) for r in rows]
+        _loaded_at = time.monotonic()
+    return _live
+
+
+def active(db) -> EmbedModel:
+    for m in live(db):
+        if m.status == "active":
+            return m
+    raise RuntimeError("no active embedding model (embedding_models)")
+
+
+def stats(db) -> list[dict]:
+    rows = db.execute(
+        sql_text(
+            """
+            SELECT id, name, dim, status, chunks_total, chunks_done, created_at, activated_at, retired_at
+            FROM embedding_models ORDER BY id
+            """
+        )
+    ).mappings().all()
+    return [
+        {**r, "progress": round(r["chunks_done"] / r["chunks_total"], 4) if r["chunks_total"] else None}
+        for r in rows
+    ]
@@ -1,17 +1,73 @@
 from __future__ import annotations
 
 import os
+import time
 from typing import List
 import httpx
 
+from app import cache
+from app.metrics import timed
+
 OLLAMA_BASE = os.getenv("OLLAMA_BASE", "http://ollama:11434")
+# the model warmed up at start; search / chunking use the active one in
+# embedding_models (app.embed_models), switched by scripts.reembed
 EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+# how long Ollama keeps the model loaded after a call ("30m", seconds, or -1 = forever)
+EMBED_KEEP_ALIVE = os.getenv("OLLAMA_EMBED_KEEP_ALIVE", os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+
+last_used_at = 0.0  # read by app.warmup
+
+# Storage mode for chunk embeddings:
+#   "full" -> float32 `embedding` (default, ~3 KB per 768-d chunk)
+#   "half" -> float16 `embedding_half` with an HNSW index per model (~1.5 KB per chunk)
+EMBED_STORAGE = os.getenv("EMBED_STORAGE", "full").lower()
+# In "half" mode, also keep the float32 vector so top candidates can be re-scored.
+EMBED_KEEP_FULL = os.getenv("EMBED_KEEP_FULL", "1") == "1"
+# In "half" mode, number of halfvec candidates to re-score with full precision (0 = off).
+EMBED_RESCORE_K = int(os.getenv("EMBED_RESCORE_K", "0"))
+# pgvector >= 0.8: keep walking the HNSW graph until LIMIT rows pass the filters
+# ("relaxed_order" / "strict_order"; "off" or empty = off). "auto" turns on
+# relaxed_order if the installed pgvector has it (app.crud.iterative_scan).
+# Each chunk partition holds many sessions, so without it a session can come back short.
+EMBED_ITERATIVE_SCAN = os.getenv("EMBED_ITERATIVE_SCAN", "auto").lower()
+# In "half" mode, sessions with at most this many chunks skip the HNSW index and
+# are ranked exactly: their partition's graph mostly holds other sessions, and a
+# scan of a few thousand vectors is as fast as the index walk (0 = always HNSW).
+EMBED_EXACT_MAX_CHUNKS = int(os.getenv("EMBED_EXACT_MAX_CHUNKS", "20000"))
+
 
-async def embed_text(text: str) -> List[float]:
+def vector_columns(vec: List[float]) -> dict:
+    """
+    chunk_embeddings column values for one vector under EMBED_STORAGE.
+    """
+    return {
+        "embedding": vec if (EMBED_STORAGE != "half" or EMBED_KEEP_FULL) else None,
+        "embedding_half": vec if EMBED_STORAGE == "half" else None,
+    }
+
+
+@timed("embed_text")
+async def embed_text(text: str, model: str | None = None) -> List[float]:
+    global last_used_at
+    last_used_at = time.time()
     async with httpx.AsyncClient(timeout=60) as client:
         r = await client.post(
             f"{OLLAMA_BASE}/api/embeddings",
-            json={"model": EMBED_MODEL, "prompt": text},
+            json={"model": model or EMBED_MODEL, "prompt": text, "keep_alive": EMBED_KEEP_ALIVE},
         )
         r.raise_for_status()
         return r.json()["embedding"]
+
+
+async def embed_query(text: str, model: str | None = None) -> List[float]:
+    """
+    embed_text() for search queries, cached per worker; keyed by model so a
+    "model" invalidation (re-pulled weights) drops them.
+    """
+    model = model or EMBED_MODEL
+    key = (model, text)
+    vec = cache.query_embeddings.get(key)
+    if vec is None:
+        vec = await embed_text(text, model)
+        cache.query_embeddings.set(key, vec)
+    return vec
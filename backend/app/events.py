@@ -0,0 +1,158 @@
+"""
+Per-session change feed.
+
+Writers call publish() inside their transaction; Postgres delivers the
+NOTIFY to every backend worker on commit (and drops it on rollback). Each
+worker runs one LISTEN connection (listen_forever) and fans payloads out to
+its local SSE / WebSocket subscribers through `hub`. The same connection
+carries cache invalidations (app.cache).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "lc_events")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+EVENTS_HEARTBEAT_S = float(os.getenv("EVENTS_HEARTBEAT_S", "15"))
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD = 7900
+
+
+def _payload(session_id: uuid.UUID, type: str, data: dict) -> str:
+    body = {"session_id": str(session_id), "type": type, "data": jsonable_encoder(data)}
+    payload = json.dumps(body, separators=(",", ":"))
+    if len(payload.encode()) > MAX_PAYLOAD:
+        keep = {k: v for k, v in body["data"].items() if k in {"id", "question_id", "resource_id"}}
+        body["data"] = {**keep, "truncated": True}
+        payload = json.dumps(body, separators=(",", ":"))
+    return payload
+
+
+def publish(db: Session, session_id: uuid.UUID, type: str, data: dict) -> None:
+    """
+    Queues an event on the current transaction. Nothing is sent until the
+    caller commits. Oversized payloads are cut down to the ids plus
+    truncated=true; clients re-fetch the row.
+    """
+    db.execute(
+        sql_text("SELECT pg_notify(:ch, :payload)"),
+        {"ch": EVENTS_CHANNEL, "payload": _payload(session_id, type, data)},
+    )
+
+
+def publish_many(db: Session, session_id: uuid.UUID, type: str, rows: list[dict]) -> None:
+    """
+    publish() for each row, in one statement (batch inserts).
+    """
+    if not rows:
+        return
+    db.execute(
+        sql_text("SELECT pg_notify(:ch, p) FROM unnest(CAST(:payloads AS text[])) WITH ORDINALITY AS t(p, ord) ORDER BY ord"),
+        {"ch": EVENTS_CHANNEL, "payloads": [_payload(session_id, type, r) for r in rows]},
+    )
+
+
+class EventHub:
+    """
+    In-process fan-out from the LISTEN connection to subscriber queues.
+    A subscriber that falls behind gets its backlog replaced by a single
+    "resync" event instead of holding up everyone else.
+    """
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subs: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, session_id: uuid.UUID) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subs[str(session_id)].add(q)
+        return q
+
+    def unsubscribe(self, session_id: uuid.UUID, q: asyncio.Queue) -> None:
+        subs = self._subs.get(str(session_id))
+        if subs is None:
+            return
+        subs.discard(q)
+        if not subs:
+            del self._subs[str(session_id)]
+
+    def dispatch(self, event: dict) -> None:
+        for q in list(self._subs.get(event.get("session_id", ""), ())):
+            try:
+                q.put_nowait(event)
+            except asyncio.QueueFull:
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait({"session_id": event["session_id"], "type": "resync", "data": {}})
+
+    def handle_payload(self, payload: str) -> None:
+        self.dispatch(json.loads(payload))
+
+    def resync_all(self) -> None:
+        for sid in list(self._subs):
+            self.dispatch({"session_id": sid, "type": "resync", "data": {}})
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._subs), "subscribers": sum(len(s) for s in self._subs.values())}
+
+
+hub = EventHub()
+
+
+def _conninfo(url: str) -> str:
+    # psycopg wants a libpq URL, not the SQLAlchemy dialect+driver form
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def listen_forever(
+    url: str,
+    handlers: dict[str, Callable[[str], None]],
+    on_reconnect: Callable[[], None] | None = None,
+) -> None:
+    """
+    Holds one LISTEN connection for the life of the worker and routes each
+    channel's payloads to its handler, reconnecting with backoff. Anything
+    sent while disconnected is lost, so on_reconnect runs after every
+    reconnect (not the first connect).
+    """
+    import psycopg
+
+    backoff = 1.0
+    first = True
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(_conninfo(url), autocommit=True) as conn:
+                for channel in handlers:
+                    await conn.execute(f"LISTEN {channel}")
+                backoff = 1.0
+                if not first and on_reconnect:
+                    on_reconnect()
+                first = False
+                async for n in conn.notifies():
+                    handler = handlers.get(n.channel)
+                    if handler is None:
+                        continue
+                    try:
+                        handler(n.payload)
+                    except ValueError:
+                        log.warning("dropping malformed %s payload", n.channel)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("event listener disconnected (%s); retrying in %.0fs", e, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
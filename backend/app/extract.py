@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 from io import BytesIO
-from typing import Tuple
+from typing import BinaryIO, Tuple, Union
 from datetime import datetime, timezone
 
 from pypdf import PdfReader
 from pptx import Presentation
 
+# file contents, or a binary file open at its start (read lazily where the parser can)
+Source = Union[bytes, BinaryIO]
 
-def extract_pdf(data: bytes) -> str:
-    reader = PdfReader(BytesIO(data))
+
+def _stream(data: Source) -> BinaryIO:
+    return BytesIO(data) if isinstance(data, bytes) else data
+
+
+def extract_pdf(data: Source) -> str:
+    reader = PdfReader(_stream(data))
     parts: list[str] = []
     for i, page in enumerate(reader.pages, start=1):
         text = page.extract_text() or ""
@@ -18,8 +25,8 @@ def extract_pdf(data: bytes) -> str:
     return "\n".join(parts).strip()
 
 
-def extract_pptx(data: bytes) -> str:
-    prs = Presentation(BytesIO(data))
+def extract_pptx(data: Source) -> str:
+    prs = Presentation(_stream(data))
     parts: list[str] = []
     for i, slide in enumerate(prs.slides, start=1):
         slide_text: list[str] = []
@@ -33,18 +40,30 @@ def extract_pptx(data: bytes) -> str:
     return "\n".join(parts).strip()
 
 
-def extract_text(filename: str, mime_type: str | None, data: bytes) -> Tuple[str, str]:
+def detect_source_type(filename: str, mime_type: str | None) -> str | None:
     """
-    Returns: (status, extracted_text_or_error)
+    "pdf", "pptx" or None (unsupported). Stored on chunks for filtered search.
     """
     name = filename.lower()
+    if name.endswith(".pdf") or (mime_type == "application/pdf"):
+        return "pdf"
+    if name.endswith(".pptx") or (mime_type in {"application/vnd.openxmlformats-officedocument.presentationml.presentation"}):
+        return "pptx"
+    return None
+
+
+def extract_text(filename: str, mime_type: str | None, data: Source) -> Tuple[str, str]:
+    """
+    Returns: (status, extracted_text_or_error)
+    """
+    kind = detect_source_type(filename, mime_type)
 
     try:
-        if name.endswith(".pdf") or (mime_type == "application/pdf"):
+        if kind == "pdf":
             text = extract_pdf(data)
             return ("EXTRACTED", text)
 
-        if name.endswith(".pptx") or (mime_type in {"application/vnd.openxmlformats-officedocument.presentationml.presentation"}):
+        if kind == "pptx":
             text = extract_pptx(data)
             return ("EXTRACTED", text)
 
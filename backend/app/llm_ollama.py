@@ -1,24 +1,84 @@
 from __future__ import annotations
 
 import os
+import time
+import uuid
 import httpx
 
+from app.llm_scheduler import Priority, scheduler
+from app.metrics import timed, record_tokens
+
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+# how long Ollama keeps the model loaded after a call ("30m", seconds, or -1 = forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
 
+last_used_at = 0.0  # read by app.warmup
 
-async def ollama_generate(prompt: str) -> str:
-    """
-    Calls Ollama /api/generate and returns the full response text.
-    """
+
+async def _generate(prompt: str, model: str | None = None, options: dict | None = None) -> dict:
+    global last_used_at
+    last_used_at = time.time()
+    model = model or OLLAMA_MODEL
     payload = {
-        "model": OLLAMA_MODEL,
+        "model": model,
         "prompt": prompt,
         "stream": False,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
     }
+    if options:
+        payload["options"] = options
 
     async with httpx.AsyncClient(timeout=120.0) as client:
         r = await client.post(f"{OLLAMA_URL}/api/generate", json=payload)
         r.raise_for_status()
         data = r.json()
-        return data.get("response", "").strip()
+        record_tokens(model, data.get("prompt_eval_count"), data.get("eval_count"))
+        return {
+            "model": model,
+            "text": data.get("response", "").strip(),
+            # "length" = stopped by num_predict, i.e. the answer is cut off
+            "done_reason": data.get("done_reason"),
+        }
+
+
+@timed("ollama_generate")
+async def ollama_generate_full(
+    prompt: str,
+    session_id: uuid.UUID | str | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+    idle_only: bool = False,
+    model: str | None = None,
+    options: dict | None = None,
+) -> dict:
+    """
+    Like ollama_generate, for a specific model / options; returns
+    {"model", "text", "done_reason"}. Used by app.llm_router.
+    """
+    return await scheduler.run(
+        lambda: _generate(prompt, model=model, options=options),
+        session_key=str(session_id or ""),
+        priority=priority,
+        idle_only=idle_only,
+    )
+
+
+@timed("ollama_generate")
+async def ollama_generate(
+    prompt: str,
+    session_id: uuid.UUID | str | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+    idle_only: bool = False,
+) -> str:
+    """
+    Calls Ollama /api/generate and returns the full response text.
+    Goes through the generation scheduler; raises LLMBusyError when its queue
+    is full (or, with idle_only, when no slot is free right now).
+    """
+    out = await scheduler.run(
+        lambda: _generate(prompt),
+        session_key=str(session_id or ""),
+        priority=priority,
+        idle_only=idle_only,
+    )
+    return out["text"]
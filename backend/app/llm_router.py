@@ -0,0 +1,179 @@
+"""
+Adaptive model routing for answer generation.
+
+Questions are classified (regex + length, no model call) into two routes:
+  short  definitions, acronyms, "what is X" -> smallest model in the ladder,
+         brief prompt, fewer contexts, small num_predict / num_ctx
+  full   why / how / derivations / comparisons -> top of the ladder
+An answer that fails validation (empty, cut off by num_predict, no TL;DR,
+"I don't know", no citation although context was given) is regenerated one
+rung up with the full route's prompt and caps; with a single model, on that
+model. The last attempt's answer is always kept.
+
+Opt-in (LLM_ROUTING=1). Off, every question takes the full route on the top
+model, whose caps default to Ollama's own. LLM_MODEL_LADDER is comma
+separated, smallest first; the default is just OLLAMA_MODEL.
+"""
+from __future__ import annotations
+
+import os
+import re
+import time
+import uuid
+from typing import Callable
+
+from app.llm_ollama import OLLAMA_MODEL, ollama_generate_full
+from app.llm_scheduler import Priority
+from app.metrics import LLM_ESCALATIONS, LLM_LATENCY_SAVED, LLM_ROUTES
+
+LLM_ROUTING = os.getenv("LLM_ROUTING", "0") == "1"
+LLM_MODEL_LADDER = [m.strip() for m in os.getenv("LLM_MODEL_LADDER", OLLAMA_MODEL).split(",") if m.strip()]
+LLM_SIMPLE_MAX_WORDS = int(os.getenv("LLM_SIMPLE_MAX_WORDS", "14"))
+LLM_MIN_ANSWER_CHARS = int(os.getenv("LLM_MIN_ANSWER_CHARS", "40"))
+
+# per-route caps; 0 = leave Ollama's default
+ROUTES = {
+    "short": {
+        "num_predict": int(os.getenv("LLM_SHORT_NUM_PREDICT", "320")),
+        "num_ctx": int(os.getenv("LLM_SHORT_NUM_CTX", "2048")),
+        "contexts": int(os.getenv("LLM_SHORT_CONTEXTS", "3")),
+    },
+    "full": {
+        "num_predict": int(os.getenv("LLM_FULL_NUM_PREDICT", "0")),
+        "num_ctx": int(os.getenv("LLM_FULL_NUM_CTX", "0")),
+        "contexts": int(os.getenv("LLM_FULL_CONTEXTS", "6")),
+    },
+}
+
+_COMPLEX_RE = re.compile(
+    r"\b(why|how (?:does|do|is|are|can|could|would|should)|derive|derivation|prove|proof|compare|contrast|"
+    r"difference between|trade-?offs?|step[- ]by[- ]step|walk (?:me )?through|intuition|implications?|"
+    r"analy[sz]e|calculate|solve|design)\b",
+    re.IGNORECASE,
+)
+_SIMPLE_RE = re.compile(
+    r"(\bstand for\b|\bacronym\b|\babbreviation\b|\bdefin(?:e|ition)\b|"
+    r"^(?:what(?:'s| is| are| does)|who (?:is|was)|when (?:is|was|did))\b)",
+    re.IGNORECASE,
+)
+# formulas / code usually need the bigger model
+_SYMBOLS_RE = re.compile(r"[=^∑∫√]|```")
+
+_UNSURE_RE = re.compile(
+    r"\b(i (?:don't|do not) know|i'?m not sure|i (?:cannot|can't) answer|unable to answer)\b",
+    re.IGNORECASE,
+)
+_CITATION_RE = re.compile(r"\[\d+\]")
+
+# EWMA of the top model's latency on full-route answers (this worker); 0 = no sample yet
+_BASELINE_ALPHA = 0.2
+_baseline_s = float(os.getenv("LLM_BASELINE_S", "0"))
+
+
+def classify(question: str) -> str:
+    """
+    "short" or "full". Cheap enough to run on every request.
+    """
+    q = question.strip()
+    words = len(q.split())
+    if words > LLM_SIMPLE_MAX_WORDS or _COMPLEX_RE.search(q) or _SYMBOLS_RE.search(q):
+        return "full"
+    if _SIMPLE_RE.search(q) or words <= 6:
+        return "short"
+    return "full"
+
+
+def validate(result: dict, n_contexts: int) -> str | None:
+    """
+    Reason the answer should be escalated, or None when it is acceptable.
+    """
+    text = result["text"]
+    if len(text) < LLM_MIN_ANSWER_CHARS:
+        return "empty"
+    if result.get("done_reason") == "length":
+        return "truncated"
+    if "tl;dr" not in text.lower():
+        return "format"
+    if _UNSURE_RE.search(text):
+        return "unsure"
+    if n_contexts and not _CITATION_RE.search(text):
+        return "no_citation"
+    return None
+
+
+def _options(route: str, model: str) -> dict:
+    caps = ROUTES[route]
+    # the top model always gets the full num_ctx: Ollama reloads a model whose num_ctx changes
+    num_ctx = ROUTES["full"]["num_ctx"] if model == LLM_MODEL_LADDER[-1] else caps["num_ctx"]
+    options = {}
+    if caps["num_predict"] > 0:
+        options["num_predict"] = caps["num_predict"]
+    if num_ctx > 0:
+        options["num_ctx"] = num_ctx
+    return options
+
+
+def attempts(route: str) -> list[tuple[str, str]]:
+    """
+    (model, route) pairs to try in order. A short question starts on the
+    smallest model and escalates up the ladder on the full route; with a
+    one-model ladder it is retried once on the full route.
+    """
+    ladder = LLM_MODEL_LADDER
+    if route == "full":
+        return [(ladder[-1], "full")]
+    return [(ladder[0], "short")] + [(m, "full") for m in ladder[1:] or ladder]
+
+
+async def generate_answer(
+    question: str,
+    hits: list[dict],
+    build_prompt: Callable[..., str],
+    session_id: uuid.UUID | str | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+    idle_only: bool = False,
+) -> tuple[str, list[dict]]:
+    """
+    Routes, generates and escalates. Returns the answer text and the hits
+    that were actually given to the model (cite only those).
+    `build_prompt(question, contexts, brief=...)` renders the prompt.
+    """
+    global _baseline_s
+    route = classify(question) if LLM_ROUTING else "full"
+    plan = attempts(route)
+
+    started = time.perf_counter()
+    for step, (model, attempt) in enumerate(plan):
+        contexts = hits[: ROUTES[attempt]["contexts"]]
+        prompt = build_prompt(question, contexts, brief=attempt == "short")
+        t0 = time.perf_counter()
+        result = await ollama_generate_full(
+            prompt,
+            session_id=session_id,
+            priority=priority,
+            idle_only=idle_only,
+            model=model,
+            options=_options(attempt, model),
+        )
+        elapsed = time.perf_counter() - t0
+        reason = validate(result, len(contexts)) if step < len(plan) - 1 else None
+        if reason is None:
+            break
+        LLM_ESCALATIONS.labels(model=model, reason=reason).inc()
+    total = time.perf_counter() - started
+
+    if _baseline_s > 0:
+        LLM_LATENCY_SAVED.labels(route=route).observe(_baseline_s - total)
+    if route == "full":
+        _baseline_s = elapsed if _baseline_s <= 0 else _baseline_s + _BASELINE_ALPHA * (elapsed - _baseline_s)
+    LLM_ROUTES.labels(route=route, model=model, result="escalated" if step > 0 else "direct").inc()
+    return result["text"], contexts
+
+
+def stats() -> dict:
+    return {
+        "routing": LLM_ROUTING,
+        "ladder": LLM_MODEL_LADDER,
+        "routes": ROUTES,
+        "baseline_s": round(_baseline_s, 3),
+    }
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Awaitable, Callable, TypeVar
+
+from app.metrics import STAGE_SECONDS
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "1"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+
+QUEUE_WAIT_HEADER = "X-LLM-Queue-Wait-Ms"
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """
+    Lower value is served first.
+    """
+    INTERACTIVE = 0
+    BATCH = 1
+    SPECULATIVE = 2
+
+
+class LLMBusyError(Exception):
+    """
+    Raised instead of queueing when the scheduler is at LLM_MAX_QUEUE.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Ticket:
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class GenerationScheduler:
+    """
+    In-process admission control for generation calls.
+
+    At most `max_concurrency` calls run at once. Waiting calls are served by
+    priority class first, then round-robin across sessions within a class, so
+    one session's explain-all can't starve everyone else.
+    """
+
+    def __init__(self, max_concurrency: int = 1, max_queue: int = 32):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._running = 0
+        self._depth = 0
+        self._queues: dict[Priority, OrderedDict[str, deque[_Ticket]]] = {p: OrderedDict() for p in Priority}
+        self._avg_service_s = 5.0  # EMA of generation time, seeds Retry-After
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def has_idle_capacity(self) -> bool:
+        return self._running < self.max_concurrency and self._depth == 0
+
+    def retry_after(self) -> int:
+        waves = (self._depth + self._running) / self.max_concurrency
+        return max(1, math.ceil(waves * self._avg_service_s))
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "queued": self._depth,
+            "queued_by_priority": {p.name.lower(): sum(len(q) for q in self._queues[p].values()) for p in Priority},
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "avg_service_s": round(self._avg_service_s, 3),
+        }
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        session_key: str = "",
+        priority: Priority = Priority.INTERACTIVE,
+        idle_only: bool = False,
+    ) -> T:
+        """
+        idle_only: never queue; raise LLMBusyError unless a slot is free right now.
+        """
+        waited_s = await self._acquire(session_key, priority, idle_only)
+        record_queue_wait(waited_s * 1000)
+        STAGE_SECONDS.labels(stage="llm_queue_wait").observe(waited_s)
+        start = time.perf_counter()
+        try:
+            return await fn()
+        finally:
+            self._release(time.perf_counter() - start)
+
+    async def _acquire(self, session_key: str, priority: Priority, idle_only: bool = False) -> float:
+        if self.has_idle_capacity():
+            self._running += 1
+            return 0.0
+
+        if idle_only or self._depth >= self.max_queue:
+            raise LLMBusyError(self.retry_after())
+
+        ticket = _Ticket(future=asyncio.get_running_loop().create_future())
+        sessions = self._queues[priority]
+        sessions.setdefault(session_key, deque()).append(ticket)
+        self._depth += 1
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # slot was handed over just as we got cancelled: give it back
+                self._release(None)
+            else:
+                self._discard(priority, session_key, ticket)
+            raise
+
+        return time.perf_counter() - ticket.enqueued_at
+
+    def _discard(self, priority: Priority, session_key: str, ticket: _Ticket) -> None:
+        sessions = self._queues[priority]
+        dq = sessions.get(session_key)
+        if dq and ticket in dq:
+            dq.remove(ticket)
+            self._depth -= 1
+            if not dq:
+                del sessions[session_key]
+
+    def _release(self, duration_s: float | None) -> None:
+        if duration_s is not None:
+            self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * duration_s
+        self._running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency and self._depth > 0:
+            ticket = self._pop_next()
+            if ticket.future.done():
+                continue
+            self._running += 1
+            ticket.future.set_result(None)
+
+    def _pop_next(self) -> _Ticket:
+        for priority in Priority:
+            sessions = self._queues[priority]
+            if not sessions:
+                continue
+            key, dq = next(iter(sessions.items()))
+            ticket = dq.popleft()
+            if dq:
+                sessions.move_to_end(key)  # round-robin across sessions
+            else:
+                del sessions[key]
+            self._depth -= 1
+            return ticket
+        raise RuntimeError("scheduler queue is empty")
+
+
+scheduler = GenerationScheduler(max_concurrency=LLM_MAX_CONCURRENCY, max_queue=LLM_MAX_QUEUE)
+
+
+# --------------------
+# Per-request queue wait reporting
+# --------------------
+
+_queue_wait_ms: ContextVar[list | None] = ContextVar("llm_queue_wait_ms", default=None)
+
+
+def record_queue_wait(ms: float) -> None:
+    acc = _queue_wait_ms.get()
+    if acc is not None:
+        acc[0] += ms
+        acc[1] += 1
+
+
+class QueueWaitMiddleware:
+    """
+    Adds X-LLM-Queue-Wait-Ms (total time this request spent waiting for a
+    generation slot) to every HTTP response that made LLM calls.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        acc = [0.0, 0]  # total wait ms, generation calls
+        token = _queue_wait_ms.set(acc)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start" and acc[1]:
+                headers = list(message.get("headers", []))
+                headers.append((QUEUE_WAIT_HEADER.lower().encode(), f"{acc[0]:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _queue_wait_ms.reset(token)
@@ -1,5 +1,19 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, PlainTextResponse
+from app.db import DATABASE_URL, SessionLocal, engine
+from app import cache, crud, deletion, embed_models, llm_router, profiling, warmup
+from app.embeddings import EMBED_MODEL
+from app.events import EVENTS_CHANNEL, hub, listen_forever
+from app.metrics import MetricsMiddleware, install_db_hooks, render_latest
+from app.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, PROFILE_TOKEN, ProfileMiddleware
+from app.responses import CompressionMiddleware
+from app.llm_scheduler import LLMBusyError, QueueWaitMiddleware, QUEUE_WAIT_HEADER, scheduler
 from app.routers.resources import router as resources_router
 from app.routers.sessions import router as sessions_router
 from app.routers.chunks import router as chunks_router
@@ -7,8 +21,58 @@ from app.routers.explain import router as explain_router
 from app.routers.explain_all import router as explain_all_router
 from app.routers.answers import router as answers_router
 from app.routers.semantic_search import router as semantic_search_router
+from app.routers.events import router as events_router
+from app.routers.uploads import router as uploads_router
+from app.routers.deletions import router as deletions_router
+
+log = logging.getLogger(__name__)
+
+
+def _check_pgvector() -> None:
+    try:
+        with SessionLocal() as db:
+            log.info("hnsw.iterative_scan: %s", crud.iterative_scan(db) or "off")
+    except Exception:
+        log.exception("pgvector check failed; retried on the first vector search")
+
 
-app = FastAPI(title="Lecture Companion API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # EMBED_ITERATIVE_SCAN=auto: look at the pgvector version once, before traffic
+    await run_in_threadpool(_check_pgvector)
+    # one LISTEN connection per worker: SSE / WebSocket fan-out + cache invalidation
+    def reconnected():
+        hub.resync_all()
+        cache.clear_all()
+
+    listener = asyncio.create_task(
+        listen_forever(
+            DATABASE_URL,
+            {EVENTS_CHANNEL: hub.handle_payload, cache.CACHE_CHANNEL: cache.handle_payload},
+            on_reconnect=reconnected,
+        )
+    )
+    # preload both Ollama models and keep them resident while sessions are active
+    keeper = asyncio.create_task(warmup.keep_warm())
+    tasks = [listener, keeper]
+    # batched purge of deleted sessions / resources (several workers share the queue)
+    if deletion.PURGE_WORKER:
+        tasks.append(asyncio.create_task(deletion.purge_loop()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+app = FastAPI(title="Lecture Companion API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+app.add_middleware(QueueWaitMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfileMiddleware)
+install_db_hooks(engine)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +80,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Upload-Offset", "Location", QUEUE_WAIT_HEADER, PROFILE_ID_HEADER],
 )
 
 app.include_router(sessions_router)
@@ -25,11 +90,88 @@ app.include_router(explain_router)
 app.include_router(explain_all_router)
 app.include_router(answers_router)
 app.include_router(semantic_search_router)
+app.include_router(events_router)
+app.include_router(uploads_router)
+app.include_router(deletions_router)
+
+@app.exception_handler(LLMBusyError)
+async def llm_busy(request: Request, exc: LLMBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "LLM is busy, retry later", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.get("/llm/queue")
+def llm_queue():
+    return {**scheduler.stats(), "routing": llm_router.stats()}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return cache.stats()
+
+@app.post("/cache/invalidate")
+def cache_invalidate(kind: str = "model", key: str | None = None):
+    # e.g. after `ollama pull` replaced a model's weights under the same tag
+    if kind not in {"chunks", "answer", "model", "all"}:
+        raise HTTPException(status_code=400, detail="kind must be chunks, answer, model or all")
+    with SessionLocal() as db:
+        cache.invalidate(db, kind, key)
+        db.commit()
+    return {"kind": kind, "key": key}
+
+@app.get("/embeddings/models")
+def embedding_models():
+    # registry + re-embedding progress (scripts.reembed)
+    with SessionLocal() as db:
+        return {"configured": EMBED_MODEL, "models": embed_models.stats(db)}
+
+def require_profile_token(request: Request) -> None:
+    # profiles show code paths and request URLs; same token as X-Profile. Without
+    # one (PROFILE_SAMPLE_RATE alone) they stay on disk and are not served.
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=403, detail="Set PROFILE_TOKEN to read profiles")
+    if request.headers.get(PROFILE_HEADER) != PROFILE_TOKEN:
+        raise HTTPException(status_code=403, detail=f"{PROFILE_HEADER} header required")
+
+@app.get("/profiles")
+def list_profiles(request: Request, limit: int = 100):
+    require_profile_token(request)
+    return profiling.list_profiles(limit=min(max(limit, 1), 1000))
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, request: Request, format: str = "speedscope"):
+    require_profile_token(request)
+    if format not in {"speedscope", "collapsed"}:
+        raise HTTPException(status_code=400, detail="format must be speedscope or collapsed")
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profiling.collapsed(path))
+    return FileResponse(path, media_type="application/json", filename=path.name)
+
+@app.get("/events/stats")
+def events_stats():
+    return hub.stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready():
+    # /health = process is up; /ready = first request will be fast (DB reachable, models loaded)
+    db_ok, db_error = warmup.database_ready(engine)
+    body = {"database": {"ok": db_ok, "error": db_error}, **warmup.state.snapshot()}
+    body["ready"] = db_ok and warmup.state.warmed
+    return ORJSONResponse(body, status_code=200 if body["ready"] else 503)
+
 @app.get("/version")
 def version():
     return {"service": "lecture-companion-api", "version": "0.1.0"}
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    Summary,
+    generate_latest,
+    REGISTRY,
+)
+from starlette.routing import Match
+
+# Optional OpenTelemetry export: only when the SDK is installed and an OTLP endpoint is configured.
+OTEL_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+
+_tracer = None
+if OTEL_ENDPOINT:
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        _provider = TracerProvider(
+            resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "lecture-companion-api")})
+        )
+        _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        trace.set_tracer_provider(_provider)
+        _tracer = trace.get_tracer("lecture-companion")
+    except ImportError:
+        _tracer = None
+
+
+STAGE_SECONDS = Histogram(
+    "lc_stage_seconds",
+    "Time spent per pipeline stage",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+REQUEST_SECONDS = Histogram(
+    "lc_http_request_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+)
+DB_QUERIES = Histogram(
+    "lc_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+LLM_TOKENS = Counter(
+    "lc_llm_tokens_total",
+    "Tokens reported by Ollama",
+    ["direction", "model"],
+)
+PREFETCH_EVENTS = Counter(
+    "lc_prefetch_total",
+    "Speculative answer generation attempts by outcome",
+    ["result"],
+)
+LLM_ROUTES = Counter(
+    "lc_llm_route_total",
+    "Routed generations by route, final model and whether they escalated",
+    ["route", "model", "result"],
+)
+LLM_ESCALATIONS = Counter(
+    "lc_llm_escalations_total",
+    "Answers rejected by validation and retried on the next model in the ladder",
+    ["model", "reason"],
+)
+# mean saved = _sum / _count; negative when an escalation cost more than going straight to the big model
+LLM_LATENCY_SAVED = Summary(
+    "lc_llm_latency_saved_seconds",
+    "Generation time saved per answer versus the top model's recent average",
+    ["route"],
+)
+TIER_EVENTS = Counter(
+    "lc_tier_sessions_total",
+    "Sessions moved between the hot and cold chunk tiers",
+    ["action"],
+)
+CACHE_EVENTS = Counter(
+    "lc_cache_events_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+
+# --------------------
+# Stage timing
+# --------------------
+
+@contextmanager
+def stage(name: str):
+    """
+    Times a block into lc_stage_seconds{stage=name} (and an OTel span when enabled).
+    """
+    span_cm = _tracer.start_as_current_span(name) if _tracer else None
+    if span_cm:
+        span_cm.__enter__()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=name).observe(time.perf_counter() - start)
+        if span_cm:
+            span_cm.__exit__(None, None, None)
+
+
+def timed(name: str):
+    """
+    Decorator form of stage() for sync and async functions.
+    """
+    def deco(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def record_tokens(model: str, tokens_in: int | None, tokens_out: int | None) -> None:
+    if tokens_in:
+        LLM_TOKENS.labels(direction="in", model=model).inc(tokens_in)
+    if tokens_out:
+        LLM_TOKENS.labels(direction="out", model=model).inc(tokens_out)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_EVENTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+# --------------------
+# Per-request DB query counting
+# --------------------
+
+_db_queries: ContextVar[list[int] | None] = ContextVar("db_queries", default=None)
+
+
+def install_db_hooks(engine) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        acc = _db_queries.get()
+        if acc is not None:
+            acc[0] += 1
+
+
+def _route_template(app, scope) -> str:
+    for route in getattr(app, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records request latency and SQL statements per request, labelled by route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        acc = [0]
+        token = _db_queries.set(acc)
+        status = [500]
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _db_queries.reset(token)
+            route = _route_template(scope.get("app"), scope)
+            REQUEST_SECONDS.labels(method=scope["method"], route=route, status=str(status[0])).observe(
+                time.perf_counter() - start
+            )
+            DB_QUERIES.labels(route=route).observe(acc[0])
+
+
+def render_latest() -> tuple[bytes, str]:
+    """
+    Prometheus text exposition. Aggregates across workers when
+    PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,11 +1,11 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, Text, DateTime, ForeignKey, Integer, Index
+from sqlalchemy import String, Text, DateTime, ForeignKey, ForeignKeyConstraint, Integer, SmallInteger, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC
 
 
 from app.db import Base
@@ -23,6 +23,26 @@ class Session(Base):
     topics: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
 
+    # maintained by statement-level triggers on the child tables (see b8c9d0e1f2a3)
+    question_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    resource_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    chunk_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    answer_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # last allocated questions.order_index; bumped atomically by crud.create_questions
+    question_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # bumped once per write statement on the child tables (see e1f2a3b4c5d6); feed list ETags
+    questions_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    corpus_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    answers_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    # speculative answers: NULL budget = PREFETCH_SESSION_BUDGET, 0 = off (see app.prefetch)
+    prefetch_budget: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    prefetch_used: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # cold tier (app.tiering): archived sessions' chunks live in resource_chunks_cold
+    last_active_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    archived_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # set by DELETE; reads skip the session and app.deletion purges it in batches
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
     questions: Mapped[list["Question"]] = relationship(
         back_populates="session",
         cascade="all, delete-orphan",
@@ -68,31 +88,90 @@ class Resource(Base):
 
     status: Mapped[str] = mapped_column(String(20), nullable=False, default=ResourceStatus.UPLOADED.value)
 
-    extracted_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
     extracted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     session: Mapped["Session"] = relationship(backref="resources")
+
+    # full deck text lives in resource_texts and is only loaded when accessed
+    text_row: Mapped["ResourceText | None"] = relationship(
+        back_populates="resource",
+        uselist=False,
+        lazy="select",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    @property
+    def extracted_text(self) -> str | None:
+        return self.text_row.extracted_text if self.text_row else None
+
+
+class ResourceText(Base):
+    __tablename__ = "resource_texts"
+
+    resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    extracted_text: Mapped[str] = mapped_column(Text, nullable=False)
+
+    resource: Mapped["Resource"] = relationship(back_populates="text_row")
+
     
 class ResourceChunk(Base):
     __tablename__ = "resource_chunks"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False,)
+    # part of the key: the table is hash-partitioned by session_id
+    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True)
 
     resource_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("resources.id", ondelete="CASCADE"), nullable=False,)
 
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     page_ref: Mapped[str | None] = mapped_column(String(50), nullable=True)  # "page 3" / "slide 12"
+    page_num: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 3 / 12, for page-range filters
+    source_type: Mapped[str | None] = mapped_column(String(10), nullable=True)  # "pdf" / "pptx"
     text: Mapped[str] = mapped_column(Text, nullable=False)
-    embedding: Mapped[list[float] | None] = mapped_column(Vector(768), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
 
 
+class EmbeddingModel(Base):
+    __tablename__ = "embedding_models"
 
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    name: Mapped[str] = mapped_column(String(200), nullable=False, unique=True)  # Ollama model tag
+    dim: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # building / active / retired
+    chunks_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    chunks_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    activated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    retired_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class ChunkEmbedding(Base):
+    __tablename__ = "chunk_embeddings"
+    # hash-partitioned by session_id like resource_chunks; one row per chunk and model
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["chunk_id", "session_id"], ["resource_chunks.id", "resource_chunks.session_id"], ondelete="CASCADE"
+        ),
+    )
+
+    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    chunk_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    model_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey("embedding_models.id"), primary_key=True)
+    # untyped: the dimension is the model's (embedding_models.dim)
+    embedding: Mapped[list[float] | None] = mapped_column(Vector(), nullable=True)
+    embedding_half: Mapped[list[float] | None] = mapped_column(HALFVEC(), nullable=True)  # EMBED_STORAGE=half
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+
 
 class Answer(Base):
     __tablename__ = "answers"
@@ -109,6 +188,94 @@ class Answer(Base):
     answer_md: Mapped[str] = mapped_column(Text, nullable=False)
     sources_json: Mapped[str] = mapped_column(Text, nullable=False)  # store JSON string for MVP
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    # set when a cited resource is re-chunked; cleared when the answer is regenerated
+    stale_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
 
+class AnswerSource(Base):
+    """
+    One row per citation in an answer, so "which answers cite this resource"
+    is an index lookup instead of parsing every sources_json.
+    """
+    __tablename__ = "answer_sources"
 
-Index("ix_questions_session_order", Question.session_id, Question.order_index)
+    answer_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("answers.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)  # bracket number [1], [2], ...
+    chunk_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)  # no FK, chunks get replaced
+    resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("resources.id", ondelete="CASCADE"), nullable=False
+    )
+
+
+class Upload(Base):
+    """
+    Resumable upload (app.routers.uploads). Parts are written straight into
+    storage_path, which becomes the resource's file on completion.
+    """
+    __tablename__ = "uploads"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    session_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False
+    )
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    mime_type: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)  # expected parts_sha256, checked on completion
+    storage_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="UPLOADING")  # UPLOADING | COMPLETING | COMPLETE
+    resource_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("resources.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+
+    upload_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("uploads.id", ondelete="CASCADE"), primary_key=True
+    )
+    start_byte: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    end_byte: Mapped[int] = mapped_column(BigInteger, nullable=False)  # exclusive
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+class Deletion(Base):
+    """
+    Batched purge of a soft-deleted session or resource (app.deletion).
+    No FKs: the row outlives what it deletes and keeps the final progress.
+    """
+    __tablename__ = "deletions"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)  # session | resource
+    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    resource_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending | running | done | failed
+    step: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    chunks_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    chunks_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    files_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    files_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+Index("uq_questions_session_order", Question.session_id, Question.order_index, unique=True)
+Index("ix_sessions_created_id", Session.created_at, Session.id)
+Index("ix_resources_session_created_id", Resource.session_id, Resource.created_at, Resource.id)
+Index("ix_answers_session_created_id", Answer.session_id, Answer.created_at, Answer.id)
+Index("ix_answer_sources_resource", AnswerSource.resource_id)
+Index("ix_answer_sources_chunk", AnswerSource.chunk_id)
+Index("ix_uploads_session", Upload.session_id)
+Index("ix_uploads_updated", Upload.updated_at)
+Index("ix_uploads_resource", Upload.resource_id)
+Index("ix_deletions_session", Deletion.session_id, Deletion.created_at)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    """
+    Opaque keyset cursor: base64url(JSON list of the sort key of the last row).
+    """
+    raw = json.dumps(jsonable_encoder(list(values)), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def time_id_cursor(cursor: str | None) -> tuple[datetime, uuid.UUID] | None:
+    """
+    Decodes a (created_at, id) cursor.
+    """
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(values[0]), uuid.UUID(values[1])
+    except (IndexError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def index_id_cursor(cursor: str | None) -> tuple[int, uuid.UUID] | None:
+    """
+    Decodes an (order_index, id) cursor.
+    """
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    try:
+        return int(values[0]), uuid.UUID(values[1])
+    except (IndexError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: str | None, summary: bool, allowed: tuple[str, ...], summary_fields: tuple[str, ...]) -> list[str] | None:
+    """
+    Returns the projected field list, or None for the full representation.
+    `fields` wins over `summary`. "id" is always included.
+    """
+    if fields:
+        wanted = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in wanted if f not in allowed]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        if "id" not in wanted:
+            wanted.insert(0, "id")
+        return wanted
+    if summary:
+        return list(summary_fields)
+    return None
+
+
+def project(obj, fields: list[str], **extra) -> dict:
+    return {f: extra[f] if f in extra else getattr(obj, f) for f in fields}
+
+
+def page_response(items: list, next_cursor: str | None) -> ORJSONResponse:
+    """
+    JSON list response with the next-page cursor in a header, so the body keeps
+    the same plain-list shape as the unpaginated endpoints. Items go straight
+    to orjson (UUIDs and datetimes included), skipping jsonable_encoder.
+    """
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return ORJSONResponse(content=items, headers=headers)
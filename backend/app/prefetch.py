@@ -0,0 +1,99 @@
+"""
+Speculative answering (opt-in, PREFETCH_ANSWERS=1).
+
+When questions are created, each one is answered in the background at the
+lowest scheduler priority so that a later /explain usually finds a stored
+answer. Controls:
+  PREFETCH_IDLE_ONLY       only start when a generation slot is free right now
+                           (default on), never queue behind or ahead of users
+  PREFETCH_SESSION_BUDGET  max speculative answers per session (default 50);
+                           sessions.prefetch_budget overrides it, 0 disables
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import uuid
+
+from app import crud
+from app.db import SessionLocal
+from app.llm_scheduler import LLMBusyError, Priority, scheduler
+from app.metrics import PREFETCH_EVENTS
+
+log = logging.getLogger(__name__)
+
+PREFETCH_ANSWERS = os.getenv("PREFETCH_ANSWERS", "0") == "1"
+PREFETCH_IDLE_ONLY = os.getenv("PREFETCH_IDLE_ONLY", "1") == "1"
+PREFETCH_SESSION_BUDGET = int(os.getenv("PREFETCH_SESSION_BUDGET", "50"))
+
+# question_id -> future resolved when its speculative generation finishes (this worker only)
+_pending: dict[str, asyncio.Future] = {}
+_tasks: set[asyncio.Task] = set()
+
+
+async def schedule(question_ids: list[uuid.UUID]) -> None:
+    """
+    Starts prefetching in a detached task and returns immediately. Meant for
+    BackgroundTasks; the fresh context keeps the finished request's metrics
+    context out of it.
+    """
+    if not PREFETCH_ANSWERS or not question_ids:
+        return
+    task = asyncio.get_running_loop().create_task(_run(list(question_ids)), context=contextvars.Context())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def wait_pending(question_id: uuid.UUID) -> None:
+    fut = _pending.get(str(question_id))
+    if fut is not None:
+        await asyncio.shield(fut)
+
+
+async def _run(question_ids: list[uuid.UUID]) -> None:
+    # one at a time: a 500-question batch must not take every idle slot at once
+    for qid in question_ids:
+        await _prefetch_one(qid)
+
+
+async def _prefetch_one(question_id: uuid.UUID) -> None:
+    from app.routers.explain import answer_question
+
+    if PREFETCH_IDLE_ONLY and not scheduler.has_idle_capacity():
+        PREFETCH_EVENTS.labels(result="skipped_busy").inc()
+        return
+
+    key = str(question_id)
+    fut = asyncio.get_running_loop().create_future()
+    _pending[key] = fut
+    try:
+        with SessionLocal() as db:
+            q = crud.get_question(db, question_id=question_id)
+            if q is None:
+                return
+            existing = crud.get_answer_by_question(db, question_id=question_id)
+            if existing is not None and existing.stale_at is None:
+                PREFETCH_EVENTS.labels(result="skipped_answered").inc()
+                return
+            if not crud.claim_prefetch_budget(db, q.session_id, PREFETCH_SESSION_BUDGET):
+                PREFETCH_EVENTS.labels(result="skipped_budget").inc()
+                return
+            try:
+                await answer_question(db, q, priority=Priority.SPECULATIVE, idle_only=PREFETCH_IDLE_ONLY)
+            except LLMBusyError:
+                # someone took the slot between the check and the call
+                crud.refund_prefetch_budget(db, q.session_id)
+                PREFETCH_EVENTS.labels(result="skipped_busy").inc()
+                return
+            except Exception:
+                db.rollback()
+                crud.refund_prefetch_budget(db, q.session_id)
+                PREFETCH_EVENTS.labels(result="failed").inc()
+                log.exception("speculative answer for question %s failed", question_id)
+                return
+            PREFETCH_EVENTS.labels(result="generated").inc()
+    finally:
+        _pending.pop(key, None)
+        fut.set_result(None)
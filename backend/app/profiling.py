@@ -0,0 +1,338 @@
+"""
+On-demand sampling profiles of single requests.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is
+picked at random by PROFILE_SAMPLE_RATE. A sampler thread then records the
+request's stack every PROFILE_INTERVAL_MS:
+- while its task runs on the event loop: the loop thread's stack (pypdf,
+  chunk_text, SQLAlchemy called from async handlers);
+- while the task is suspended: its await chain, ending in "[await ...]"
+  (Ollama calls, the LLM scheduler queue, reading the request body);
+- while it awaits run_in_threadpool (plain `def` handlers included): the
+  worker thread running that call, under "[worker thread]".
+Samples are weighted by wall time, so a profile adds up to the request's
+latency. Profiles are written to PROFILE_DIR in speedscope format
+(https://www.speedscope.app); GET /profiles/{id}?format=collapsed returns
+folded stacks for flamegraph.pl / inferno.
+
+Requests that are not profiled cost a header lookup, plus one random()
+when PROFILE_SAMPLE_RATE > 0.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# header value that turns profiling on for a request; empty disables the header
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# fraction of all requests to profile (0 = header only)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# randomly sampled profiles of requests faster than this are not kept
+PROFILE_MIN_MS = float(os.getenv("PROFILE_MIN_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/app/profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+# worker threads keep the future they complete near the bottom of their stack
+_OWNER_DEPTH = 6
+
+
+# --------------------
+# Sampling
+# --------------------
+
+def _code_key(code) -> tuple[str, str, int]:
+    return (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+
+
+def _thread_stack(frame) -> list:
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _awaited(obj):
+    for attr in ("cr_await", "gi_yieldfrom", "ag_await"):
+        if hasattr(obj, attr):
+            return getattr(obj, attr)
+    return None
+
+
+def _obj_frame(obj):
+    for attr in ("cr_frame", "gi_frame", "ag_frame"):
+        frame = getattr(obj, attr, None)
+        if frame is not None:
+            return frame
+    return None
+
+
+class _Sampler(threading.Thread):
+    """
+    Samples one request's stack until stop(); consecutive identical stacks
+    are merged into one weighted sample.
+    """
+
+    def __init__(self, task: asyncio.Task, anchor, interval_s: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.task = task
+        self.anchor = anchor  # the middleware's frame: stacks start below it
+        self.loop_thread = threading.get_ident()
+        self.interval_s = interval_s
+        self.frames: dict[tuple, int] = {}
+        self.samples: list[list[int]] = []
+        self.weights: list[float] = []
+        self._halt = threading.Event()
+        self._owner: tuple[int, object] | None = None
+        self._result: tuple[str, dict] | None = None
+
+    def stop(self, profile_id: str | None = None, meta: dict | None = None) -> None:
+        """
+        Ends sampling; with an id the profile is then saved from this thread,
+        off the event loop.
+        """
+        if profile_id is not None:
+            self._result = (profile_id, meta)
+        self._halt.set()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._halt.wait(self.interval_s):
+            now = time.perf_counter()
+            self._add(self._sample(), (now - last) * 1000)
+            last = now
+        if self._result is not None:
+            profile_id, meta = self._result
+            _save(profile_id, self, {**meta, "samples": len(self.samples)})
+
+    def _add(self, keys: list[tuple], weight_ms: float) -> None:
+        stack = [self.frames.setdefault(k, len(self.frames)) for k in keys]
+        if self.samples and self.samples[-1] == stack:
+            self.weights[-1] += weight_ms
+        else:
+            self.samples.append(stack)
+            self.weights.append(weight_ms)
+
+    def _sample(self) -> list[tuple]:
+        current = sys._current_frames()
+        loop_frames = _thread_stack(current.get(self.loop_thread))
+        for i, frame in enumerate(loop_frames):
+            if frame is self.anchor:
+                # the request is running on the event loop right now
+                return [_code_key(f.f_code) for f in loop_frames[i + 1:]]
+
+        # suspended: follow the await chain down from the anchor
+        keys = []
+        below = False
+        obj = self.task.get_coro()
+        while obj is not None:
+            frame = _obj_frame(obj)
+            if frame is None:
+                break
+            if below:
+                keys.append(_code_key(frame.f_code))
+            below = below or frame is self.anchor
+            obj = _awaited(obj)
+
+        waiter = getattr(self.task, "_fut_waiter", None)
+        if waiter is None:
+            # ready to run, but the loop is busy with other tasks
+            return keys + [("[waiting for event loop]", "", 0)]
+        thread = self._thread_running(current, waiter)
+        if thread is None:
+            return keys + [(f"[await {type(waiter).__name__}]", "", 0)]
+        return keys + [("[worker thread]", "", 0)] + [_code_key(f.f_code) for f in thread]
+
+    def _thread_running(self, current: dict, waiter) -> list | None:
+        """
+        The worker thread whose stack holds `waiter` (the future a
+        run_in_threadpool call resolves), and its frames below that point.
+        """
+        candidates = current.items()
+        if self._owner is not None and self._owner[1] is waiter and self._owner[0] in current:
+            candidates = [(self._owner[0], current[self._owner[0]])]
+        for tid, leaf in candidates:
+            if tid in (self.loop_thread, self.ident):
+                continue
+            frames = _thread_stack(leaf)
+            for i, frame in enumerate(frames[:_OWNER_DEPTH]):
+                if any(v is waiter for v in frame.f_locals.values()):
+                    self._owner = (tid, waiter)
+                    return frames[i + 1:]
+        return None
+
+    def speedscope(self, name: str) -> dict:
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "lecture-companion",
+            "shared": {
+                "frames": [
+                    {"name": n, "file": _short_path(f), "line": line} if f else {"name": n}
+                    for n, f, line in self.frames
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": round(sum(self.weights), 3),
+                    "samples": self.samples,
+                    "weights": [round(w, 3) for w in self.weights],
+                }
+            ],
+        }
+
+
+def _short_path(path: str) -> str:
+    if "site-packages/" in path:
+        return path.split("site-packages/", 1)[1]
+    cwd = os.getcwd() + os.sep
+    return path[len(cwd):] if path.startswith(cwd) else path
+
+
+# --------------------
+# Storage
+# --------------------
+
+def _save(profile_id: str, sampler: _Sampler, meta: dict) -> None:
+    out = Path(PROFILE_DIR)
+    out.mkdir(parents=True, exist_ok=True)
+    name = f"{meta['method']} {meta['path']} {meta['status']} {meta['duration_ms']:.0f}ms"
+    (out / f"{profile_id}.speedscope.json").write_text(json.dumps(sampler.speedscope(name)))
+    # written last: list_profiles() only sees complete profiles
+    (out / f"{profile_id}.meta.json").write_text(json.dumps({"id": profile_id, **meta}))
+    _prune(out)
+
+
+def _prune(out: Path) -> None:
+    metas = sorted(out.glob("*.meta.json"))
+    for meta in metas[: max(0, len(metas) - PROFILE_KEEP)]:
+        profile_id = meta.name.removesuffix(".meta.json")
+        meta.unlink(missing_ok=True)
+        (out / f"{profile_id}.speedscope.json").unlink(missing_ok=True)
+
+
+def list_profiles(limit: int = 100) -> list[dict]:
+    """
+    Newest first (ids start with a UTC timestamp).
+    """
+    out = Path(PROFILE_DIR)
+    if not out.is_dir():
+        return []
+    profiles = []
+    for meta in sorted(out.glob("*.meta.json"), reverse=True)[:limit]:
+        try:
+            profiles.append(json.loads(meta.read_text()))
+        except (OSError, ValueError):
+            continue  # pruned meanwhile by another worker
+    return profiles
+
+
+def profile_path(profile_id: str) -> Path | None:
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = Path(PROFILE_DIR) / f"{profile_id}.speedscope.json"
+    return path if path.is_file() else None
+
+
+def collapsed(path: Path) -> str:
+    """
+    Folded stacks ("root;child;leaf <ms>"), one line per distinct stack.
+    """
+    doc = json.loads(path.read_text())
+    names = [
+        f"{f['name']} ({f['file']}:{f['line']})" if "file" in f else f["name"]
+        for f in doc["shared"]["frames"]
+    ]
+    totals: dict[str, float] = {}
+    profile = doc["profiles"][0]
+    for stack, weight in zip(profile["samples"], profile["weights"]):
+        key = ";".join(names[i].replace(";", ",") for i in stack) or "[idle]"
+        totals[key] = totals.get(key, 0.0) + weight
+    return "".join(f"{k} {max(1, round(v))}\n" for k, v in totals.items())
+
+
+# --------------------
+# Middleware
+# --------------------
+
+class ProfileMiddleware:
+    """
+    Profiles requests that ask for it (X-Profile: PROFILE_TOKEN) or are
+    sampled. Requested profiles get their id back in X-Profile-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._header = PROFILE_HEADER.lower().encode()
+        self._token = PROFILE_TOKEN.encode()
+
+    def _requested(self, scope) -> bool:
+        if not self._token:
+            return False
+        for name, value in scope["headers"]:
+            if name == self._header:
+                return value == self._token
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/profiles"):
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        if not requested and not (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        sampler = _Sampler(asyncio.current_task(), sys._getframe(), PROFILE_INTERVAL_MS / 1000)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if requested:
+                    headers = list(message.get("headers", []))
+                    headers.append((PROFILE_ID_HEADER.lower().encode(), profile_id.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        started_at = time.time()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if requested or duration_ms >= PROFILE_MIN_MS:
+                sampler.stop(
+                    profile_id,
+                    {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status[0],
+                        "duration_ms": round(duration_ms, 1),
+                        "started_at": started_at,
+                        "requested": requested,
+                        "pid": os.getpid(),
+                    },
+                )
+            else:
+                sampler.stop()
@@ -0,0 +1,69 @@
+"""
+Retrieval query and prompt for answer generation, shared by /explain,
+/explain-all and app.prefetch (through app.routers.explain.answer_question).
+"""
+from __future__ import annotations
+
+import re
+
+from app.metrics import timed
+
+STOP = set([
+    "the","a","an","and","or","but","so","to","of","in","on","for","with","as","at","by",
+    "is","are","was","were","be","been","being","do","does","did",
+    "why","what","how","when","where","which","who",
+    "this","that","these","those","it","we","you","i","they",
+    "can","could","should","would","may","might"
+])
+
+@timed("keywordize")
+def keywordize(q: str) -> str:
+    toks = re.sub(r"[^\w\s]", " ", q.lower()).split()
+    toks = [t for t in toks if len(t) >= 3 and t not in STOP]
+    out = []
+    for t in toks:
+        if t not in out:
+            out.append(t)
+        if len(out) >= 8:
+            break
+    return " ".join(out) if out else q.strip()
+
+@timed("build_prompt")
+def build_prompt(question: str, contexts: list[dict], brief: bool = False) -> str:
+    ctx_lines = []
+    for i, c in enumerate(contexts, start=1):
+        ref = f"{c['filename']}" + (f" • {c['page_ref']}" if c.get("page_ref") else "")
+        ctx_lines.append(f"[{i}] {ref}\n{c['text']}\n")
+
+    ctx_block = "\n".join(ctx_lines) if ctx_lines else "(No retrieved context.)"
+
+    if brief:
+        # short route (app.llm_router): small model, capped num_predict
+        sections = """- TL;DR (1–2 lines)
+- Explanation (one short paragraph)
+- Sources (list bracket numbers used)"""
+    else:
+        sections = """- TL;DR (2–3 lines)
+- Explanation
+- Example (if helpful)
+- Sources (list bracket numbers used)"""
+
+    return f"""
+You are a lecture companion helping a student understand course material.
+
+Guidelines:
+- Use the provided context as a helpful reference when it is relevant.
+- If the context directly answers the question, base your explanation on it and cite it.
+- If the context is partial or insufficient, say so briefly and then provide a clear general explanation.
+- Do NOT say that no context was provided if context is shown.
+- Cite sources using bracket numbers like [1], [2] when you rely on them.
+
+Return Markdown with sections:
+{sections}
+
+Question:
+{question}
+
+Context:
+{ctx_block}
+"""
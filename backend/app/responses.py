@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+# Optional brotli: used when installed and the client accepts "br", gzip otherwise.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# clients must revalidate, which with an ETag is a cheap 304
+CACHE_CONTROL = "private, no-cache"
+
+
+# --------------------
+# ETag / If-None-Match
+# --------------------
+
+def make_etag(*parts) -> str:
+    """
+    Weak validator over the given parts (list name, session id, version
+    counter, query string...). Weak because compression changes the bytes.
+    """
+    raw = "|".join(str(p) for p in parts).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """
+    304 response when If-None-Match matches, else None.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = {t.strip() for t in header.split(",")}
+    if "*" in tags or etag in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+# --------------------
+# Compression
+# --------------------
+
+def _pick_encoding(accept: str) -> str | None:
+    accepted = {part.split(";")[0].strip().lower() for part in accept.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    brotli / gzip for complete responses of at least COMPRESS_MIN_BYTES.
+    Streaming bodies (SSE, NDJSON) pass through untouched so events are not
+    held back in a compressor buffer.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _pick_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: dict | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                body = message.get("body", b"")
+                if (
+                    message.get("more_body", False)
+                    or "content-encoding" in headers
+                    or len(body) < self.minimum_size
+                ):
+                    passthrough = True
+                else:
+                    if encoding == "br":
+                        body = brotli.compress(body, quality=BROTLI_QUALITY)
+                    else:
+                        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+                await send(start)
+                start = None
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
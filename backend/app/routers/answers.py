@@ -1,24 +1,67 @@
 from __future__ import annotations
 import uuid
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import crud
+from app.pagination import MAX_PAGE_SIZE, encode_cursor, time_id_cursor, parse_fields, project, page_response
+from app.responses import make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/api", tags=["answers"])
 
+ANSWER_FIELDS = ("id", "session_id", "question_id", "answer_md", "sources_json", "created_at", "stale_at")
+ANSWER_SUMMARY_FIELDS = ("id", "question_id", "created_at")
+
+
 @router.get("/sessions/{session_id}/answers")
-def list_answers(session_id: uuid.UUID, db: Session = Depends(get_db)):
-    ans = crud.list_answers_by_session(db, session_id=session_id)
-    return [
-        {
-            "id": str(a.id),
-            "session_id": str(a.session_id),
-            "question_id": str(a.question_id),
-            "answer_md": a.answer_md,
-            "sources_json": a.sources_json,
-            "created_at": a.created_at.isoformat(),
-        }
-        for a in ans
-    ]
+def list_answers(
+    session_id: uuid.UUID,
+    request: Request,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor from the previous page"),
+    fields: str | None = Query(default=None, description="Comma-separated fields to return"),
+    summary: bool = Query(default=False, description="Skip answer_md/sources_json bodies"),
+    db: Session = Depends(get_db),
+):
+    # answers_version moves on every answer write, so an unchanged list is a 304
+    # without running the list query
+    s = crud.get_session(db, session_id=session_id)
+    if not s:
+        raise HTTPException(status_code=404, detail="Session not found")
+    etag = make_etag("answers", session_id, s.answers_version, request.url.query)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    projected = parse_fields(fields, summary, ANSWER_FIELDS, ANSWER_SUMMARY_FIELDS)
+    ans = crud.list_answers_by_session(
+        db,
+        session_id=session_id,
+        limit=limit + 1 if limit else None,
+        after=time_id_cursor(cursor),
+        columns=projected,
+    )
+
+    next_cursor = None
+    if limit and len(ans) > limit:
+        ans = ans[:limit]
+        next_cursor = encode_cursor(ans[-1].created_at, ans[-1].id)
+
+    resp = page_response([project(a, projected or list(ANSWER_FIELDS)) for a in ans], next_cursor)
+    return set_etag(resp, etag)
+
+
+@router.get("/resources/{resource_id}/answers")
+def list_answers_citing_resource(
+    resource_id: uuid.UUID,
+    summary: bool = Query(default=False, description="Skip answer_md/sources_json bodies"),
+    db: Session = Depends(get_db),
+):
+    r = crud.get_resource(db, resource_id=resource_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Resource not found")
+
+    ans = crud.list_answers_citing_resource(db, resource_id=resource_id)
+    fields = list(ANSWER_SUMMARY_FIELDS) + ["stale_at"] if summary else list(ANSWER_FIELDS)
+    return [project(a, fields) for a in ans]
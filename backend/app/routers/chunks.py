@@ -1,15 +1,36 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import crud, schemas
 from app.chunking import make_chunks
-from app.embeddings import embed_text
+from app import cache, embed_models
+from app.embeddings import embed_query
+from app.responses import make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/api/sessions", tags=["chunks"])
 
 
+def chunk_filter(
+    resource_id: list[uuid.UUID] = Query(default=[], description="Repeat to search several resources"),
+    page_from: int | None = Query(default=None, ge=0, description="First page / slide (inclusive)"),
+    page_to: int | None = Query(default=None, ge=0, description="Last page / slide (inclusive)"),
+    source_type: Literal["pdf", "pptx"] | None = Query(default=None),
+) -> crud.ChunkFilter:
+    if page_from is not None and page_to is not None and page_from > page_to:
+        raise HTTPException(status_code=400, detail="page_from must not be after page_to")
+    return crud.ChunkFilter(
+        resource_ids=tuple(sorted(set(resource_id))),
+        page_from=page_from,
+        page_to=page_to,
+        source_type=source_type,
+    )
+
+
 @router.post("/{session_id}/resources/{resource_id}/chunk")
 async def chunk_one_resource(session_id: uuid.UUID, resource_id: uuid.UUID, db: Session = Depends(get_db)):
     s = crud.get_session(db, session_id=session_id)
@@ -20,10 +41,11 @@ async def chunk_one_resource(session_id: uuid.UUID, resource_id: uuid.UUID, db:
     if not r or r.session_id != session_id:
         raise HTTPException(status_code=404, detail="Resource not found")
 
-    if r.status != "EXTRACTED" or not r.extracted_text:
+    extracted_text = crud.get_resource_text(db, resource_id=resource_id) if r.status == "EXTRACTED" else None
+    if not extracted_text:
         raise HTTPException(status_code=400, detail="Resource is not extracted yet")
 
-    chunks = make_chunks(r.extracted_text)
+    chunks = make_chunks(extracted_text)
     count = await crud.create_chunks_for_resource_with_embeddings(db, session_id=session_id, resource_id=resource_id, chunks=chunks)
     return {"resource_id": resource_id, "chunks_created": count}
 
@@ -41,10 +63,14 @@ async def chunk_all(session_id: uuid.UUID, db: Session = Depends(get_db)):
     skipped = 0
 
     for r in resources:
-        if r.status != "EXTRACTED" or not r.extracted_text:
+        if r.status != "EXTRACTED" or not r.has_text:
+            skipped += 1
+            continue
+        extracted_text = crud.get_resource_text(db, resource_id=r.id)
+        if not extracted_text:
             skipped += 1
             continue
-        chunks = make_chunks(r.extracted_text)
+        chunks = make_chunks(extracted_text)
         total += await crud.create_chunks_for_resource_with_embeddings(db, session_id=session_id, resource_id=r.id, chunks=chunks)
         processed += 1
 
@@ -54,14 +80,29 @@ async def chunk_all(session_id: uuid.UUID, db: Session = Depends(get_db)):
 @router.get("/{session_id}/chunks/search", response_model=list[schemas.ChunkHitOut])
 async def search_chunks(
     session_id: uuid.UUID,
+    request: Request,
     q: str = Query(min_length=1),
     limit: int = Query(default=6, ge=1, le=20),
+    filters: crud.ChunkFilter = Depends(chunk_filter),
     db: Session = Depends(get_db),
 ):
     s = crud.get_session(db, session_id=session_id)
     if not s:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    qvec = await embed_text(q)
-    hits = crud.search_chunks_hybrid(db, session_id=session_id, query=q, query_vec=qvec, limit=limit)
-    return hits
+    # same corpus + same model + same query -> same hits
+    model = embed_models.active(db)
+    etag = make_etag("search", session_id, s.corpus_version, model.name, q, limit, filters)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    key = (str(session_id), "hybrid", model.name, q, limit, filters)
+    hits = cache.search_results.get(key)
+    if hits is None:
+        qvec = await embed_query(q, model.name)
+        hits = crud.search_chunks_hybrid(
+            db, session_id=session_id, query=q, query_vec=qvec, limit=limit, filters=filters, model=model
+        )
+        cache.search_results.set(key, hits)
+    return set_etag(ORJSONResponse(hits), etag)
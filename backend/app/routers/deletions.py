@@ -0,0 +1,27 @@
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app import crud, schemas
+
+router = APIRouter(prefix="/api/deletions", tags=["deletions"])
+
+
+@router.get("", response_model=list[schemas.DeletionOut])
+def list_deletions(
+    session_id: uuid.UUID | None = Query(default=None),
+    open_only: bool = Query(default=False, description="Only pending / running jobs"),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    return crud.list_deletions(db, session_id=session_id, open_only=open_only, limit=limit)
+
+
+@router.get("/{deletion_id}", response_model=schemas.DeletionOut)
+def get_deletion(deletion_id: uuid.UUID, db: Session = Depends(get_db)):
+    # progress of a DELETE /api/sessions/{id} or .../resources/{id}
+    job = crud.get_deletion(db, deletion_id=deletion_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion not found")
+    return job
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import uuid
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket
+from fastapi.responses import StreamingResponse
+
+from app.db import SessionLocal
+from app import crud
+from app.events import EVENTS_HEARTBEAT_S, hub
+
+router = APIRouter(prefix="/api/sessions", tags=["events"])
+
+
+def _session_exists(session_id: uuid.UUID) -> bool:
+    # short-lived session: a stream must not pin a pooled connection for its lifetime
+    with SessionLocal() as db:
+        return crud.get_session(db, session_id=session_id) is not None
+
+
+@router.get("/{session_id}/events")
+async def session_events(session_id: uuid.UUID, request: Request):
+    """
+    Server-Sent Events: question.created, resource.extracted, chunking.progress,
+    answer.ready, and resync (client should re-fetch the lists).
+    """
+    if not _session_exists(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    q = hub.subscribe(session_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(q.get(), timeout=EVENTS_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            hub.unsubscribe(session_id, q)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/{session_id}/ws")
+async def session_ws(websocket: WebSocket, session_id: uuid.UUID):
+    """
+    Same feed as /events, as {"type", "data"} JSON messages.
+    """
+    if not _session_exists(session_id):
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    q = hub.subscribe(session_id)
+
+    async def drain_client():
+        # the socket is push-only; reading just notices the disconnect
+        while True:
+            await websocket.receive_text()
+
+    async def push():
+        while True:
+            try:
+                event = await asyncio.wait_for(q.get(), timeout=EVENTS_HEARTBEAT_S)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping", "data": {}})
+                continue
+            await websocket.send_json({"type": event["type"], "data": event["data"]})
+
+    tasks = [asyncio.create_task(drain_client()), asyncio.create_task(push())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hub.unsubscribe(session_id, q)
+        for t in tasks:
+            t.cancel()
+        # WebSocketDisconnect and friends end up here; nothing left to report to
+        await asyncio.gather(*tasks, return_exceptions=True)
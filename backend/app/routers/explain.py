@@ -1,68 +1,20 @@
 from __future__ import annotations
 
 import json
-import re
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app import crud
-from app.llm_ollama import ollama_generate
+from app import cache, crud, prefetch
+from app.llm_router import generate_answer
+from app.llm_scheduler import Priority
+from app.metrics import record_cache
+from app.prompts import build_prompt, keywordize
 
 router = APIRouter(prefix="/api", tags=["explain"])
 
-STOP = set([
-    "the","a","an","and","or","but","so","to","of","in","on","for","with","as","at","by",
-    "is","are","was","were","be","been","being","do","does","did",
-    "why","what","how","when","where","which","who",
-    "this","that","these","those","it","we","you","i","they",
-    "can","could","should","would","may","might"
-])
-
-def keywordize(q: str) -> str:
-    toks = re.sub(r"[^\w\s]", " ", q.lower()).split()
-    toks = [t for t in toks if len(t) >= 3 and t not in STOP]
-    out = []
-    for t in toks:
-        if t not in out:
-            out.append(t)
-        if len(out) >= 8:
-            break
-    return " ".join(out) if out else q.strip()
-
-def build_prompt(question: str, contexts: list[dict]) -> str:
-    ctx_lines = []
-    for i, c in enumerate(contexts, start=1):
-        ref = f"{c['filename']}" + (f" • {c['page_ref']}" if c.get("page_ref") else "")
-        ctx_lines.append(f"[{i}] {ref}\n{c['text']}\n")
-
-    ctx_block = "\n".join(ctx_lines) if ctx_lines else "(No retrieved context.)"
-
-    return f"""
-You are a lecture companion helping a student understand course material.
-
-Guidelines:
-- Use the provided context as a helpful reference when it is relevant.
-- If the context directly answers the question, base your explanation on it and cite it.
-- If the context is partial or insufficient, say so briefly and then provide a clear general explanation.
-- Do NOT say that no context was provided if context is shown.
-- Cite sources using bracket numbers like [1], [2] when you rely on them.
-
-Return Markdown with sections:
-- TL;DR (2–3 lines)
-- Explanation
-- Example (if helpful)
-- Sources (list bracket numbers used)
-
-Question:
-{question}
-
-Context:
-{ctx_block}
-"""
-
 
 def serialize_answer(a) -> dict:
     return {
@@ -72,34 +24,23 @@ def serialize_answer(a) -> dict:
         "answer_md": a.answer_md,
         "sources_json": a.sources_json,
         "created_at": a.created_at.isoformat(),
+        "stale_at": a.stale_at.isoformat() if a.stale_at else None,
     }
 
-@router.get("/sessions/{session_id}/answers")
-def list_answers(session_id: uuid.UUID, db: Session = Depends(get_db)):
-    answers = crud.list_answers_by_session(db, session_id=session_id)
-    return [serialize_answer(a) for a in answers]
-
-@router.post("/questions/{question_id}/explain")
-async def explain_question(
-    question_id: uuid.UUID,
-    force: bool = Query(False, description="If true, re-generate even if an answer exists."),
-    db: Session = Depends(get_db),
-):
-    q = crud.get_question(db, question_id=question_id)
-    if not q:
-        raise HTTPException(status_code=404, detail="Question not found")
-
-    if not force:
-        existing = crud.get_answer_by_question(db, question_id=question_id)
-        if existing:
-            return serialize_answer(existing)
-
-    # retrieve context
+async def answer_question(db: Session, q, priority: Priority = Priority.INTERACTIVE, idle_only: bool = False):
+    """
+    Retrieval + generation + upsert for one question. Shared with app.prefetch.
+    """
     query = keywordize(q.text)
-    hits = crud.search_chunks_fts(db, session_id=q.session_id, query=query, limit=6)
-
-    prompt = build_prompt(q.text, hits)
-    answer_md = await ollama_generate(prompt)
+    key = (str(q.session_id), "fts", query, 6)
+    hits = cache.search_results.get(key)
+    if hits is None:
+        hits = crud.search_chunks_fts(db, session_id=q.session_id, query=query, limit=6)
+        cache.search_results.set(key, hits)
+
+    answer_md, hits = await generate_answer(
+        q.text, hits, build_prompt, session_id=q.session_id, priority=priority, idle_only=idle_only
+    )
 
     sources = [
         {
@@ -111,11 +52,39 @@ async def explain_question(
         for h in hits
     ]
 
-    saved = crud.upsert_answer(
+    return crud.upsert_answer(
         db,
         session_id=q.session_id,
         question_id=q.id,
         answer_md=answer_md,
         sources_json=json.dumps(sources),
     )
+
+
+@router.post("/questions/{question_id}/explain")
+async def explain_question(
+    question_id: uuid.UUID,
+    force: bool = Query(False, description="If true, re-generate even if an answer exists."),
+    db: Session = Depends(get_db),
+):
+    q = crud.get_question(db, question_id=question_id)
+    if not q:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    if not force:
+        cached = cache.answers.get(str(question_id))
+        if cached is not None:
+            return cached
+        # a speculative generation for this question may be running in this worker
+        await prefetch.wait_pending(question_id)
+        existing = crud.get_answer_by_question(db, question_id=question_id)
+        if existing is not None and existing.stale_at is not None:
+            existing = None  # a cited resource was re-chunked; regenerate
+        record_cache("answer", hit=existing is not None)
+        if existing:
+            out = serialize_answer(existing)
+            cache.answers.set(str(question_id), out)
+            return out
+
+    saved = await answer_question(db, q, priority=Priority.INTERACTIVE)
     return serialize_answer(saved)
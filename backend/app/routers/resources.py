@@ -2,12 +2,14 @@ import os
 import uuid
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app import crud, schemas
-from app.extract import extract_text
+from app import crud, deletion, schemas
+from app.extract import Source, extract_text
+from app.pagination import MAX_PAGE_SIZE, encode_cursor, time_id_cursor, parse_fields, project, page_response
+from app.responses import make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/api/sessions", tags=["resources"])
 
@@ -22,12 +24,67 @@ def safe_filename(name: str) -> str:
     return name
 
 
+def create_extracted_resource(db: Session, session_id: uuid.UUID, filename: str, mime_type: str | None, path: Path, data: Source):
+    """
+    Extracts text from a stored file and creates its resource row. Shared with
+    the resumable upload completion (app.routers.uploads), which passes the
+    open file instead of its bytes.
+    """
+    status, out = extract_text(filename, mime_type, data)
+    return crud.create_resource(
+        db=db,
+        session_id=session_id,
+        filename=filename,
+        mime_type=mime_type,
+        storage_path=str(path),
+        status=status,
+        extracted_text=out if status == "EXTRACTED" else None,
+        error=None if status == "EXTRACTED" else out,
+    )
+
+
+RESOURCE_FIELDS = ("id", "session_id", "filename", "mime_type", "status", "created_at", "extracted_at", "error")
+RESOURCE_SUMMARY_FIELDS = ("id", "filename", "status", "created_at")
+
+
 @router.get("/{session_id}/resources", response_model=list[schemas.ResourceOut])
-def list_resources(session_id: uuid.UUID, db: Session = Depends(get_db)):
+def list_resources(
+    session_id: uuid.UUID,
+    request: Request,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor from the previous page"),
+    fields: str | None = Query(default=None, description="Comma-separated fields to return"),
+    summary: bool = Query(default=False, description="Return id/filename/status/created_at only"),
+    db: Session = Depends(get_db),
+):
     s = crud.get_session(db, session_id=session_id)
     if not s:
         raise HTTPException(status_code=404, detail="Session not found")
-    return crud.list_resources(db, session_id=session_id)
+
+    etag = make_etag("resources", session_id, s.corpus_version, request.url.query)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    projected = parse_fields(fields, summary, RESOURCE_FIELDS, RESOURCE_SUMMARY_FIELDS)
+    rs = crud.list_resources(
+        db,
+        session_id=session_id,
+        limit=limit + 1 if limit else None,
+        after=time_id_cursor(cursor),
+        columns=projected,
+    )
+
+    next_cursor = None
+    if limit and len(rs) > limit:
+        rs = rs[:limit]
+        next_cursor = encode_cursor(rs[-1].created_at, rs[-1].id)
+
+    if projected is None and next_cursor is None:
+        set_etag(response, etag)
+        return rs
+    return set_etag(page_response([project(r, projected or list(RESOURCE_FIELDS)) for r in rs], next_cursor), etag)
 
 
 @router.post("/{session_id}/resources", response_model=list[schemas.ResourceOut])
@@ -54,31 +111,16 @@ async def upload_resources(
         path.write_bytes(data)
 
         # extract text (sync MVP)
-        status, out = extract_text(original, f.content_type, data)
-
-        if status == "EXTRACTED":
-            r = crud.create_resource(
-                db=db,
-                session_id=session_id,
-                filename=original,
-                mime_type=f.content_type,
-                storage_path=str(path),
-                status=status,
-                extracted_text=out,
-                error=None,
-            )
-        else:
-            r = crud.create_resource(
-                db=db,
-                session_id=session_id,
-                filename=original,
-                mime_type=f.content_type,
-                storage_path=str(path),
-                status=status,
-                extracted_text=None,
-                error=out,
-            )
-
-        created.append(r)
+        created.append(create_extracted_resource(db, session_id, original, f.content_type, path, data))
 
     return created
+
+
+@router.delete("/{session_id}/resources/{resource_id}", response_model=schemas.DeletionOut, status_code=202)
+def delete_resource(session_id: uuid.UUID, resource_id: uuid.UUID, response: Response, db: Session = Depends(get_db)):
+    job = crud.delete_resource(db, session_id=session_id, resource_id=resource_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    deletion.wake()
+    response.headers["Location"] = f"/api/deletions/{job.id}"
+    return job
@@ -1,14 +1,36 @@
 import uuid
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app.embeddings import embed_text
-from app import crud
+from app.embeddings import embed_query
+from app.responses import make_etag, not_modified, set_etag
+from app import crud, embed_models
+from app.routers.chunks import chunk_filter
 
 router = APIRouter(prefix="/api", tags=["semantic-search"])
 
 @router.get("/sessions/{session_id}/chunks/semantic-search")
-async def semantic_search(session_id: uuid.UUID, q: str, limit: int = 6, db: Session = Depends(get_db)):
-    qvec = await embed_text(q)
-    return crud.search_chunks_semantic(db, session_id=session_id, query_vec=qvec, limit=limit)
+async def semantic_search(
+    session_id: uuid.UUID,
+    q: str,
+    request: Request,
+    limit: int = 6,
+    filters: crud.ChunkFilter = Depends(chunk_filter),
+    db: Session = Depends(get_db),
+):
+    s = crud.get_session(db, session_id=session_id)
+    if not s:
+        raise HTTPException(status_code=404, detail="Session not found")
+    model = embed_models.active(db)
+    etag = make_etag("semantic", session_id, s.corpus_version, model.name, q, limit, filters)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    qvec = await embed_query(q, model.name)
+    resp = ORJSONResponse(
+        crud.search_chunks_semantic(db, session_id=session_id, query_vec=qvec, limit=limit, filters=filters, model=model)
+    )
+    return set_etag(resp, etag)
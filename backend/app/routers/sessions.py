@@ -1,30 +1,57 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app import schemas, crud
+from app import schemas, crud, deletion, prefetch
+from app.pagination import (
+    MAX_PAGE_SIZE,
+    encode_cursor,
+    time_id_cursor,
+    index_id_cursor,
+    parse_fields,
+    project,
+    page_response,
+)
+from app.responses import make_etag, not_modified, set_etag
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
+SESSION_FIELDS = (
+    "id", "title", "topics", "created_at",
+    "question_count", "resource_count", "chunk_count", "answer_count", "archived_at",
+)
+SESSION_SUMMARY_FIELDS = ("id", "title", "question_count", "resource_count", "chunk_count", "answer_count")
+
+QUESTION_FIELDS = ("id", "session_id", "text", "asked_at", "order_index")
+QUESTION_SUMMARY_FIELDS = ("id", "order_index", "asked_at")
+
 
 @router.post("", response_model=schemas.SessionOut)
 def create_session(payload: schemas.SessionCreate, db: Session = Depends(get_db)):
-    s = crud.create_session(db, title=payload.title, topics=payload.topics)
-    out = schemas.SessionOut.model_validate(s)
-    out.question_count = 0
-    return out
+    s = crud.create_session(db, title=payload.title, topics=payload.topics, prefetch_budget=payload.prefetch_budget)
+    return schemas.SessionOut.model_validate(s)
 
 
 @router.get("", response_model=list[schemas.SessionOut])
-def list_sessions(db: Session = Depends(get_db)):
-    rows = crud.list_sessions(db)
-    result: list[schemas.SessionOut] = []
-    for s, count in rows:
-        out = schemas.SessionOut.model_validate(s)
-        out.question_count = int(count)
-        result.append(out)
-    return result
+def list_sessions(
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor from the previous page"),
+    fields: str | None = Query(default=None, description="Comma-separated fields to return"),
+    summary: bool = Query(default=False, description="Return a compact summary per session"),
+    db: Session = Depends(get_db),
+):
+    projected = parse_fields(fields, summary, SESSION_FIELDS, SESSION_SUMMARY_FIELDS)
+    rows = crud.list_sessions(db, limit=limit + 1 if limit else None, after=time_id_cursor(cursor))
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    if projected is None and next_cursor is None:
+        return rows
+    return page_response([project(s, projected or list(SESSION_FIELDS)) for s in rows], next_cursor)
 
 
 @router.get("/{session_id}", response_model=schemas.SessionOut)
@@ -32,29 +59,90 @@ def get_session(session_id: uuid.UUID, db: Session = Depends(get_db)):
     s = crud.get_session(db, session_id=session_id)
     if not s:
         raise HTTPException(status_code=404, detail="Session not found")
+    return s
 
-    # count questions
-    questions = crud.list_questions(db, session_id=session_id)
-    out = schemas.SessionOut.model_validate(s)
-    out.question_count = len(questions)
-    return out
+
+@router.delete("/{session_id}", response_model=schemas.DeletionOut, status_code=202)
+def delete_session(session_id: uuid.UUID, response: Response, db: Session = Depends(get_db)):
+    # hidden right away; chunks, files and rows are purged in the background
+    job = crud.delete_session(db, session_id=session_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    deletion.wake()
+    response.headers["Location"] = f"/api/deletions/{job.id}"
+    return job
 
 
 @router.get("/{session_id}/questions", response_model=list[schemas.QuestionOut])
-def list_questions(session_id: uuid.UUID, db: Session = Depends(get_db)):
+def list_questions(
+    session_id: uuid.UUID,
+    request: Request,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor from the previous page"),
+    fields: str | None = Query(default=None, description="Comma-separated fields to return"),
+    summary: bool = Query(default=False, description="Return id/order_index/asked_at only"),
+    db: Session = Depends(get_db),
+):
     s = crud.get_session(db, session_id=session_id)
     if not s:
         raise HTTPException(status_code=404, detail="Session not found")
-    return crud.list_questions(db, session_id=session_id)
+
+    etag = make_etag("questions", session_id, s.questions_version, request.url.query)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    projected = parse_fields(fields, summary, QUESTION_FIELDS, QUESTION_SUMMARY_FIELDS)
+    qs = crud.list_questions(
+        db,
+        session_id=session_id,
+        limit=limit + 1 if limit else None,
+        after=index_id_cursor(cursor),
+        columns=projected,
+    )
+
+    next_cursor = None
+    if limit and len(qs) > limit:
+        qs = qs[:limit]
+        next_cursor = encode_cursor(qs[-1].order_index, qs[-1].id)
+
+    if projected is None and next_cursor is None:
+        set_etag(response, etag)
+        return qs
+    return set_etag(page_response([project(q, projected or list(QUESTION_FIELDS)) for q in qs], next_cursor), etag)
 
 
 @router.post("/{session_id}/questions", response_model=schemas.QuestionOut)
 def create_question(
     session_id: uuid.UUID,
     payload: schemas.QuestionCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    s = crud.get_session(db, session_id=session_id)
+    if not s:
+        raise HTTPException(status_code=404, detail="Session not found")
+    row = crud.create_question(db, session_id=session_id, text=payload.text)
+    if row is None:
+        # deleted between the lookup above and the insert
+        raise HTTPException(status_code=404, detail="Session not found")
+    background_tasks.add_task(prefetch.schedule, [row.id])
+    return row
+
+
+@router.post("/{session_id}/questions:batch", response_model=list[schemas.QuestionOut])
+def create_questions_batch(
+    session_id: uuid.UUID,
+    payload: schemas.QuestionBatchCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     s = crud.get_session(db, session_id=session_id)
     if not s:
         raise HTTPException(status_code=404, detail="Session not found")
-    return crud.create_question(db, session_id=session_id, text=payload.text)
+    rows = crud.create_questions(db, session_id=session_id, texts=[q.text for q in payload.questions])
+    if not rows:
+        raise HTTPException(status_code=404, detail="Session not found")
+    background_tasks.add_task(prefetch.schedule, [r.id for r in rows])
+    return rows
@@ -0,0 +1,235 @@
+"""
+Resumable uploads for large lecture files.
+
+    POST   /api/sessions/{id}/uploads     {filename, size, mime_type?, sha256?} -> upload
+    PUT    /api/uploads/{id}              Content-Range: bytes start-end/size, raw body
+    GET    /api/uploads/{id}              offset / received ranges (where to resume)
+    POST   /api/uploads/{id}/complete     verify, extract, create the resource
+    DELETE /api/uploads/{id}              abort
+
+Parts go straight into the final file under UPLOAD_DIR at their offset
+(pwrite), hashed while they stream in; received ranges and part digests live
+in upload_parts, so any worker can take any part and parts can be sent in
+parallel. The upload checksum is built from those digests and the file is
+handed to extraction open, so completion neither re-reads nor buffers it.
+Once the session is deleted, the upload answers 404.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.db import SessionLocal, get_db
+from app.routers.resources import UPLOAD_DIR, create_extracted_resource, safe_filename
+
+router = APIRouter(prefix="/api", tags=["uploads"])
+
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))  # suggested to clients
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(2 * 1024 ** 3)))
+UPLOAD_TTL_H = float(os.getenv("UPLOAD_TTL_H", "24"))
+
+_WRITE_BUFFER = 1024 * 1024
+_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+def _upload_out(db: Session, u) -> schemas.UploadOut:
+    ranges = crud.list_upload_ranges(db, u.id) if u.status != "COMPLETE" else [(0, u.size)]
+    offset = ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+    return schemas.UploadOut(
+        id=u.id,
+        session_id=u.session_id,
+        filename=u.filename,
+        size=u.size,
+        status=u.status,
+        offset=offset,
+        received_bytes=sum(end - start for start, end in ranges),
+        ranges=[[start, end] for start, end in ranges],
+        part_size=UPLOAD_PART_SIZE,
+        resource_id=u.resource_id,
+        created_at=u.created_at,
+    )
+
+
+def _preallocate(path: Path, size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.truncate(size)  # sparse; parts fill it in any order
+
+
+def _remove(paths: list[str]) -> None:
+    for p in paths:
+        Path(p).unlink(missing_ok=True)
+
+
+def parts_digest(parts: list[tuple[int, int, str]], size: int) -> str | None:
+    """
+    Hex SHA-256 over the raw per-part SHA-256 digests in offset order (what a
+    client sends as `parts_sha256`). None when the parts don't tile
+    [0, size) exactly, i.e. some were re-sent with other boundaries.
+    """
+    h = hashlib.sha256()
+    pos = 0
+    for start, end, digest in parts:
+        if start != pos:
+            return None
+        h.update(bytes.fromhex(digest))
+        pos = end
+    return h.hexdigest() if pos == size else None
+
+
+def _extract(db: Session, u):
+    with open(u.storage_path, "rb") as f:
+        return create_extracted_resource(db, u.session_id, u.filename, u.mime_type, Path(u.storage_path), f)
+
+
+@router.post("/sessions/{session_id}/uploads", response_model=schemas.UploadOut, status_code=201)
+async def create_upload(session_id: uuid.UUID, payload: schemas.UploadCreate, db: Session = Depends(get_db)):
+    if not crud.get_session(db, session_id=session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    if payload.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds UPLOAD_MAX_BYTES ({UPLOAD_MAX_BYTES})")
+
+    # abandoned uploads are swept here rather than by a separate job
+    expired = crud.expire_uploads(db, datetime.now(timezone.utc) - timedelta(hours=UPLOAD_TTL_H))
+    if expired:
+        await run_in_threadpool(_remove, expired)
+
+    upload_id = uuid.uuid4()
+    original = safe_filename(payload.filename)
+    # same naming as direct uploads: the file is already at its final path
+    path = Path(UPLOAD_DIR) / str(session_id) / f"{upload_id}__{original}"
+    await run_in_threadpool(_preallocate, path, payload.size)
+
+    u = crud.create_upload(
+        db,
+        upload_id=upload_id,
+        session_id=session_id,
+        filename=original,
+        mime_type=payload.mime_type,
+        size=payload.size,
+        sha256=payload.parts_sha256.lower() if payload.parts_sha256 else None,
+        storage_path=str(path),
+    )
+    return _upload_out(db, u)
+
+
+@router.get("/uploads/{upload_id}", response_model=schemas.UploadOut)
+def get_upload(upload_id: uuid.UUID, response: Response, db: Session = Depends(get_db)):
+    u = crud.get_upload(db, upload_id=upload_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    out = _upload_out(db, u)
+    response.headers["Upload-Offset"] = str(out.offset)
+    return out
+
+
+@router.put("/uploads/{upload_id}", response_model=schemas.UploadOut)
+async def put_upload_part(upload_id: uuid.UUID, request: Request, response: Response):
+    match = _RANGE_RE.match(request.headers.get("content-range", ""))
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range: bytes <start>-<end>/<size> is required")
+    start, last = int(match.group(1)), int(match.group(2))
+    end = last + 1
+
+    # no pooled connection is held while the body streams in
+    with SessionLocal() as db:
+        u = crud.get_upload(db, upload_id=upload_id)
+        if not u:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if u.status != "UPLOADING":
+            raise HTTPException(status_code=409, detail=f"Upload is {u.status}")
+        path, size = u.storage_path, u.size
+    if match.group(3) != "*" and int(match.group(3)) != size:
+        raise HTTPException(status_code=400, detail=f"Content-Range size does not match upload size {size}")
+    if start > last or end > size:
+        raise HTTPException(status_code=416, detail=f"Range outside 0-{size - 1}")
+
+    h = hashlib.sha256()
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        pos, buf = start, bytearray()
+        async for block in request.stream():
+            if pos + len(buf) + len(block) > end:
+                raise HTTPException(status_code=400, detail="Body is longer than Content-Range")
+            h.update(block)
+            buf += block
+            if len(buf) >= _WRITE_BUFFER:
+                await run_in_threadpool(os.pwrite, fd, bytes(buf), pos)
+                pos += len(buf)
+                buf.clear()
+        if buf:
+            await run_in_threadpool(os.pwrite, fd, bytes(buf), pos)
+            pos += len(buf)
+    finally:
+        os.close(fd)
+    if pos != end:
+        # connection dropped mid-part: nothing recorded, the client re-sends this part
+        raise HTTPException(status_code=400, detail=f"Body has {pos - start} bytes, Content-Range says {end - start}")
+
+    digest = h.hexdigest()
+    expected = request.headers.get("x-part-sha256")
+    if expected and expected.lower() != digest:
+        raise HTTPException(status_code=400, detail="Part checksum mismatch")
+
+    with SessionLocal() as db:
+        crud.record_upload_part(db, upload_id, start, end, digest)
+        u = crud.get_upload(db, upload_id=upload_id)
+        if not u:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        out = _upload_out(db, u)
+    response.headers["Upload-Offset"] = str(out.offset)
+    return out
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=schemas.ResourceOut)
+async def complete_upload(upload_id: uuid.UUID, db: Session = Depends(get_db)):
+    u = crud.get_upload(db, upload_id=upload_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if u.status == "COMPLETE" and u.resource_id:
+        # retried completion (the client lost the first response)
+        return crud.get_resource(db, resource_id=u.resource_id)
+    if not crud.set_upload_status(db, upload_id, "COMPLETING", expect="UPLOADING"):
+        raise HTTPException(status_code=409, detail="Upload is already being completed")
+
+    try:
+        ranges = crud.list_upload_ranges(db, upload_id)
+        if ranges != [(0, u.size)]:
+            raise HTTPException(status_code=409, detail={"message": "Upload is incomplete", "ranges": ranges})
+        if u.sha256:
+            digest = parts_digest(crud.list_upload_parts(db, upload_id), u.size)
+            if digest is None:
+                raise HTTPException(status_code=409, detail="Parts overlap; re-send them with the boundaries used for parts_sha256")
+            if digest != u.sha256:
+                raise HTTPException(status_code=422, detail="Upload checksum mismatch; re-send parts (see X-Part-SHA256)")
+
+        r = await run_in_threadpool(_extract, db, u)
+    except BaseException:
+        db.rollback()
+        crud.set_upload_status(db, upload_id, "UPLOADING")
+        raise
+
+    crud.complete_upload(db, upload_id, r.id)
+    return r
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def abort_upload(upload_id: uuid.UUID, db: Session = Depends(get_db)):
+    u = crud.get_upload(db, upload_id=upload_id)
+    if not u:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if u.status != "UPLOADING":
+        raise HTTPException(status_code=409, detail=f"Upload is {u.status}")
+    path = u.storage_path
+    crud.delete_upload(db, upload_id)
+    await run_in_threadpool(_remove, [path])
+    return Response(status_code=204)
@@ -6,6 +6,8 @@ from pydantic import BaseModel, Field
 class SessionCreate(BaseModel):
     title: str = Field(min_length=1, max_length=200)
     topics: str | None = None
+    # max answers generated speculatively for this session (PREFETCH_ANSWERS=1); None = server default
+    prefetch_budget: int | None = Field(default=None, ge=0)
 
 
 class SessionOut(BaseModel):
@@ -14,6 +16,13 @@ class SessionOut(BaseModel):
     topics: str | None
     created_at: datetime
     question_count: int = 0
+    resource_count: int = 0
+    chunk_count: int = 0
+    answer_count: int = 0
+    prefetch_budget: int | None = None
+    prefetch_used: int = 0
+    # set while the session's chunks are in the cold tier; the next search brings them back
+    archived_at: datetime | None = None
 
     class Config:
         from_attributes = True
@@ -23,6 +32,10 @@ class QuestionCreate(BaseModel):
     text: str = Field(min_length=1)
 
 
+class QuestionBatchCreate(BaseModel):
+    questions: list[QuestionCreate] = Field(min_length=1, max_length=500)
+
+
 class QuestionOut(BaseModel):
     id: uuid.UUID
     session_id: uuid.UUID
@@ -46,6 +59,50 @@ class ResourceOut(BaseModel):
     class Config:
         from_attributes = True
 
+class DeletionOut(BaseModel):
+    id: uuid.UUID
+    kind: str
+    session_id: uuid.UUID
+    resource_id: uuid.UUID | None = None
+    # pending | running | done | failed; step = current purge step (app.deletion)
+    status: str
+    step: str | None = None
+    chunks_total: int | None = None
+    chunks_done: int = 0
+    files_total: int | None = None
+    files_done: int = 0
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+class UploadCreate(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(ge=1)
+    mime_type: str | None = Field(default=None, max_length=120)
+    # hex sha256 over the parts' raw sha256 digests, in offset order; verified
+    # on completion when given (app.routers.uploads.parts_digest)
+    parts_sha256: str | None = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class UploadOut(BaseModel):
+    id: uuid.UUID
+    session_id: uuid.UUID
+    filename: str
+    size: int
+    status: str
+    # contiguous bytes received from 0: where a sequential client resumes
+    offset: int
+    received_bytes: int
+    # received [start, end) ranges, merged; parallel clients re-send the gaps
+    ranges: list[list[int]]
+    part_size: int
+    resource_id: uuid.UUID | None = None
+    created_at: datetime
+
 class ChunkHitOut(BaseModel):
     chunk_id: uuid.UUID
     resource_id: uuid.UUID
@@ -61,6 +118,7 @@ class AnswerOut(BaseModel):
     answer_md: str
     sources_json: str
     created_at: datetime
+    stale_at: datetime | None = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,177 @@
+"""
+Hot / cold tiers for chunk storage.
+
+Sessions idle for TIER_IDLE_DAYS are archived by scripts.archive_sessions:
+their chunks move from resource_chunks / chunk_embeddings (FTS + vector
+indexes) into resource_chunks_cold (no search indexes, lz4-compressed). The
+first search, explain or re-chunk of an archived session moves them back
+(ensure_hot), so the hot indexes only hold sessions that are actually in use.
+
+sessions.chunk_count keeps counting archived chunks: the counter triggers see
+the move as a delete (or insert), so archive / rehydrate correct it in the
+same transaction.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Session
+
+from app.metrics import TIER_EVENTS, timed
+
+log = logging.getLogger(__name__)
+
+TIER_IDLE_DAYS = float(os.getenv("TIER_IDLE_DAYS", "120"))
+# last_active_at is bumped at most this often per session, so reads don't turn into writes
+TIER_TOUCH_INTERVAL_S = int(os.getenv("TIER_TOUCH_INTERVAL_S", "3600"))
+
+_CHUNK_COLUMNS = "id, session_id, resource_id, chunk_index, page_ref, page_num, source_type, text, created_at"
+
+_STATE_SQL = """
+    SELECT archived_at IS NOT NULL AS archived,
+           last_active_at < now() - make_interval(secs => :touch) AS stale_touch
+    FROM sessions WHERE id = :sid
+"""
+
+# only the active model's vectors go cold (inline, tagged with the model);
+# others are dropped by the FK cascade and re-made by `reembed` if still needed
+_ARCHIVE_SQL = f"""
+    WITH vec AS (
+      DELETE FROM chunk_embeddings e USING embedding_models m
+      WHERE e.session_id = :sid AND m.id = e.model_id AND m.status = 'active'
+      RETURNING e.chunk_id, e.model_id, e.embedding, e.embedding_half
+    ), moved AS (
+      DELETE FROM resource_chunks WHERE session_id = :sid RETURNING {_CHUNK_COLUMNS}
+    )
+    INSERT INTO resource_chunks_cold ({_CHUNK_COLUMNS}, embedding_model_id, embedding, embedding_half)
+    SELECT {_CHUNK_COLUMNS}, vec.model_id, vec.embedding, vec.embedding_half
+    FROM moved LEFT JOIN vec ON vec.chunk_id = moved.id
+"""
+
+# a vector of a since-retired model is dropped; `reembed --catch-up` fills the gap
+_REHYDRATE_SQL = f"""
+    WITH moved AS (
+      DELETE FROM resource_chunks_cold WHERE session_id = :sid
+      RETURNING {_CHUNK_COLUMNS}, embedding_model_id, embedding, embedding_half
+    ), chunks AS (
+      INSERT INTO resource_chunks ({_CHUNK_COLUMNS}) SELECT {_CHUNK_COLUMNS} FROM moved RETURNING 1
+    ), vec AS (
+      INSERT INTO chunk_embeddings (chunk_id, session_id, model_id, embedding, embedding_half)
+      SELECT id, session_id, embedding_model_id, embedding, embedding_half FROM moved
+      WHERE embedding_model_id IN (SELECT id FROM embedding_models WHERE status <> 'retired')
+    )
+    SELECT count(*) FROM chunks
+"""
+
+
+def _lock_archived_at(db: Session, session_id: uuid.UUID):
+    """
+    Row-locks the session (serialises archive / rehydrate) and returns
+    (exists, archived).
+    """
+    row = db.execute(
+        sql_text("SELECT archived_at FROM sessions WHERE id = :sid FOR UPDATE"), {"sid": session_id}
+    ).first()
+    return row is not None, row is not None and row.archived_at is not None
+
+
+@timed("archive_session")
+def archive_session(db: Session, session_id: uuid.UUID) -> int:
+    """
+    Moves the session's chunks to the cold tier. Returns the number moved
+    (0 when missing or already archived).
+    """
+    exists, archived = _lock_archived_at(db, session_id)
+    if not exists or archived:
+        db.rollback()
+        return 0
+    moved = db.execute(sql_text(_ARCHIVE_SQL), {"sid": session_id}).rowcount
+    db.execute(
+        sql_text("UPDATE sessions SET archived_at = now(), chunk_count = chunk_count + :n WHERE id = :sid"),
+        {"sid": session_id, "n": moved},
+    )
+    db.commit()
+    TIER_EVENTS.labels(action="archived").inc()
+    return moved
+
+
+@timed("rehydrate_session")
+def rehydrate_session(db: Session, session_id: uuid.UUID, commit: bool = True) -> int:
+    """
+    Moves an archived session's chunks back into resource_chunks.
+    commit=False leaves the move in the caller's transaction.
+    """
+    exists, archived = _lock_archived_at(db, session_id)
+    if not archived:
+        # another request got here first
+        if commit:
+            db.rollback()
+        return 0
+    moved = db.execute(sql_text(_REHYDRATE_SQL), {"sid": session_id}).scalar_one()
+    db.execute(
+        sql_text(
+            "UPDATE sessions SET archived_at = NULL, last_active_at = now(), chunk_count = chunk_count - :n "
+            "WHERE id = :sid"
+        ),
+        {"sid": session_id, "n": moved},
+    )
+    if commit:
+        db.commit()
+    TIER_EVENTS.labels(action="rehydrated").inc()
+    log.info("rehydrated session %s (%d chunks)", session_id, moved)
+    return moved
+
+
+def ensure_hot(db: Session, session_id: uuid.UUID) -> None:
+    """
+    Called before anything reads or rewrites a session's chunks. One
+    primary-key lookup per session per db Session (i.e. per request).
+
+    A rehydrate or last_active_at touch commits on its own connection, so a
+    search never commits the caller's transaction. Only a caller that has
+    already written (and so may hold the session's row lock) gets it done in
+    its own transaction, to be committed with its write.
+    """
+    checked = db.info.setdefault("tier_checked", set())
+    if session_id in checked:
+        return
+    row = db.execute(
+        sql_text(_STATE_SQL), {"sid": session_id, "touch": TIER_TOUCH_INTERVAL_S}
+    ).first()
+    checked.add(session_id)
+    if row is None or not (row.archived or row.stale_touch):
+        return
+
+    wrote = db.execute(sql_text("SELECT pg_current_xact_id_if_assigned() IS NOT NULL")).scalar_one()
+    if wrote:
+        _make_hot(db, session_id, row.archived)
+        return
+    with Session(bind=db.get_bind().engine) as own:
+        _make_hot(own, session_id, row.archived)
+        own.commit()
+
+
+def _make_hot(db: Session, session_id: uuid.UUID, archived: bool) -> None:
+    if archived:
+        rehydrate_session(db, session_id, commit=False)
+    else:
+        db.execute(sql_text("UPDATE sessions SET last_active_at = now() WHERE id = :sid"), {"sid": session_id})
+
+
+def list_cold_candidates(db: Session, idle_days: float = TIER_IDLE_DAYS, limit: int = 100) -> list[uuid.UUID]:
+    rows = db.execute(
+        sql_text(
+            """
+            SELECT id FROM sessions
+            WHERE archived_at IS NULL AND deleted_at IS NULL
+              AND last_active_at < now() - make_interval(secs => :idle)
+            ORDER BY last_active_at
+            LIMIT :lim
+            """
+        ),
+        {"idle": idle_days * 86400, "lim": limit},
+    ).all()
+    return [r.id for r in rows]
@@ -0,0 +1,143 @@
+"""
+Model warm-up and keep-alive.
+
+On startup each worker asks Ollama to load OLLAMA_MODEL and
+OLLAMA_EMBED_MODEL (an empty generate prompt / a one-word embedding), then
+keeps touching them every WARMUP_TOUCH_INTERVAL_S while the worker is
+active: a live event subscriber, or a model call within ACTIVE_WINDOW_S.
+Idle workers stop touching and let Ollama unload after OLLAMA_KEEP_ALIVE;
+set it to -1 to keep models resident.
+
+/ready is green once the database answers and the first warm-up finished.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+from sqlalchemy import text as sql_text
+
+from app import embeddings, llm_ollama
+from app.events import hub
+
+log = logging.getLogger(__name__)
+
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") == "1"
+WARMUP_TOUCH_INTERVAL_S = float(os.getenv("WARMUP_TOUCH_INTERVAL_S", "240"))
+ACTIVE_WINDOW_S = float(os.getenv("ACTIVE_WINDOW_S", "900"))
+
+
+class ModelState:
+    def __init__(self):
+        self.warmed = not WARMUP_ON_START
+        self.loaded: dict[str, bool] = {}
+        self.last_touch: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        return {
+            "warmed": self.warmed,
+            "models": {
+                m: {
+                    "loaded": self.loaded.get(m, False),
+                    "last_touch_s_ago": round(now - self.last_touch[m], 1) if m in self.last_touch else None,
+                    "error": self.errors.get(m),
+                }
+                for m in (llm_ollama.OLLAMA_MODEL, embeddings.EMBED_MODEL)
+            },
+        }
+
+
+state = ModelState()
+
+
+async def _touch_generate(client: httpx.AsyncClient) -> None:
+    # empty prompt = load the model (and reset its keep_alive timer) without generating
+    r = await client.post(
+        f"{llm_ollama.OLLAMA_URL}/api/generate",
+        json={"model": llm_ollama.OLLAMA_MODEL, "prompt": "", "stream": False, "keep_alive": llm_ollama.OLLAMA_KEEP_ALIVE},
+    )
+    r.raise_for_status()
+
+
+async def _touch_embed(client: httpx.AsyncClient) -> None:
+    r = await client.post(
+        f"{embeddings.OLLAMA_BASE}/api/embeddings",
+        json={"model": embeddings.EMBED_MODEL, "prompt": "warm-up", "keep_alive": embeddings.EMBED_KEEP_ALIVE},
+    )
+    r.raise_for_status()
+
+
+async def touch_models() -> bool:
+    """
+    Loads / refreshes both models. True when both succeeded.
+    """
+    ok = True
+    async with httpx.AsyncClient(timeout=300) as client:
+        for model, fn in ((llm_ollama.OLLAMA_MODEL, _touch_generate), (embeddings.EMBED_MODEL, _touch_embed)):
+            try:
+                await fn(client)
+                state.loaded[model] = True
+                state.last_touch[model] = time.time()
+                state.errors.pop(model, None)
+            except httpx.HTTPError as e:
+                ok = False
+                state.loaded[model] = False
+                state.errors[model] = str(e) or e.__class__.__name__
+    return ok
+
+
+async def refresh_loaded() -> None:
+    """
+    Reads which models Ollama currently has in memory (/api/ps), without loading anything.
+    """
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            r = await client.get(f"{llm_ollama.OLLAMA_URL}/api/ps")
+            r.raise_for_status()
+            running = r.json().get("models", [])
+    except (httpx.HTTPError, ValueError):
+        return
+    names = {m.get("name") for m in running} | {m.get("model") for m in running}
+    for model in (llm_ollama.OLLAMA_MODEL, embeddings.EMBED_MODEL):
+        # Ollama reports "llama3:latest" for "llama3"
+        state.loaded[model] = model in names or f"{model}:latest" in names
+
+
+def is_active() -> bool:
+    last = max(llm_ollama.last_used_at, embeddings.last_used_at)
+    return hub.stats()["subscribers"] > 0 or (time.time() - last) < ACTIVE_WINDOW_S
+
+
+async def keep_warm() -> None:
+    """
+    Lifespan task: initial warm-up with backoff, then periodic touches while active.
+    """
+    if WARMUP_ON_START:
+        backoff = 2.0
+        while not await touch_models():
+            log.warning("model warm-up failed (%s); retrying in %.0fs", state.errors, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+        state.warmed = True
+        log.info("models warm: %s, %s", llm_ollama.OLLAMA_MODEL, embeddings.EMBED_MODEL)
+
+    while True:
+        await asyncio.sleep(WARMUP_TOUCH_INTERVAL_S)
+        if is_active():
+            await touch_models()
+        else:
+            await refresh_loaded()
+
+
+def database_ready(engine) -> tuple[bool, str | None]:
+    try:
+        with engine.connect() as conn:
+            conn.execute(sql_text("SELECT 1"))
+        return True, None
+    except Exception as e:
+        return False, e.__class__.__name__
@@ -0,0 +1,36 @@
+"""
+Multi-worker mode:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Workers share nothing in-process: live events and cache invalidations go
+through Postgres LISTEN/NOTIFY (app.events, app.cache), and Prometheus
+metrics are aggregated through PROMETHEUS_MULTIPROC_DIR.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+# explain / chunk-all can legitimately run for minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "600"))
+graceful_timeout = 30
+keepalive = 5
+
+# prometheus_client reads this at import time, so it must be set before workers load the app
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "lc_prometheus"))
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
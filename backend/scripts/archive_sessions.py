@@ -0,0 +1,83 @@
+"""
+Move idle sessions' chunks to the cold tier (see app.tiering), or bring one back.
+
+Reports the hot table / index sizes before and after, so the effect on what
+has to stay in RAM is visible. Dead index entries are only reclaimed by
+VACUUM; pass --vacuum to run it right away instead of waiting for autovacuum.
+
+Usage (inside the backend container, e.g. nightly from cron):
+    python -m scripts.archive_sessions --idle-days 120 --limit 500 --vacuum
+    python -m scripts.archive_sessions --dry-run
+    python -m scripts.archive_sessions --session <id>      # archive one now
+    python -m scripts.archive_sessions --rehydrate <id>    # bring one back now
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import uuid
+
+from sqlalchemy import text as sql_text
+
+from app.db import SessionLocal, engine
+from app.tiering import TIER_IDLE_DAYS, archive_session, list_cold_candidates, rehydrate_session
+
+
+def tier_sizes(db) -> dict:
+    row = db.execute(
+        sql_text(
+            """
+            WITH hot AS (
+              SELECT relid FROM pg_partition_tree('resource_chunks')
+              UNION ALL SELECT relid FROM pg_partition_tree('chunk_embeddings')
+            )
+            SELECT (SELECT sum(pg_table_size(relid)) FROM hot) AS hot_table,
+                   (SELECT sum(pg_indexes_size(relid)) FROM hot) AS hot_indexes,
+                   pg_total_relation_size('resource_chunks_cold') AS cold_total,
+                   (SELECT count(*) FROM sessions WHERE archived_at IS NOT NULL) AS archived_sessions
+            """
+        )
+    ).mappings().one()
+    return {k: int(v) for k, v in row.items()}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--idle-days", type=float, default=TIER_IDLE_DAYS)
+    p.add_argument("--limit", type=int, default=100, help="max sessions to archive in this run")
+    p.add_argument("--session", type=uuid.UUID, help="archive this session regardless of activity")
+    p.add_argument("--rehydrate", type=uuid.UUID, help="move this session back to the hot tier")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--vacuum", action="store_true", help="VACUUM ANALYZE the hot tables afterwards")
+    args = p.parse_args()
+
+    with SessionLocal() as db:
+        before = tier_sizes(db)
+        if args.rehydrate:
+            result = {"rehydrated": str(args.rehydrate), "chunks": rehydrate_session(db, args.rehydrate)}
+        else:
+            ids = [args.session] if args.session else list_cold_candidates(db, args.idle_days, args.limit)
+            if args.dry_run:
+                print(json.dumps({"candidates": [str(i) for i in ids], "sizes": before}, indent=2))
+                return
+            started = time.perf_counter()
+            moved = {str(sid): archive_session(db, sid) for sid in ids}
+            result = {
+                "archived": len([n for n in moved.values() if n]),
+                "chunks": sum(moved.values()),
+                "seconds": round(time.perf_counter() - started, 2),
+            }
+
+    if args.vacuum:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(sql_text("VACUUM (ANALYZE) resource_chunks, chunk_embeddings"))
+
+    with SessionLocal() as db:
+        result["sizes_before"] = before
+        result["sizes_after"] = tier_sizes(db)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Compare float32 (`vector`) and float16 (`halfvec`) chunk embedding storage.
+
+Reports, for the active embedding model, per-row column size, index size
+(what has to stay in RAM for fast ANN search) and semantic-search latency /
+recall@k for:
+  - full        exact float32 search
+  - half        halfvec HNSW search
+  - half+rescore halfvec candidates re-scored with float32 vectors
+
+Usage (inside the backend container):
+    python -m scripts.bench_embedding_storage --queries 50 --limit 6 --rescore 40
+    python -m scripts.bench_embedding_storage --backfill   # fill embedding_half first
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import text as sql_text
+
+from app import crud, embed_models
+from app.db import SessionLocal
+from scripts.common import percentile
+
+
+def storage_report(db, model_id: int) -> dict:
+    col = db.execute(
+        sql_text(
+            """
+            SELECT
+              count(*) AS rows,
+              coalesce(avg(pg_column_size(embedding)), 0) AS full_bytes,
+              coalesce(avg(pg_column_size(embedding_half)), 0) AS half_bytes,
+              coalesce(sum(pg_column_size(embedding)), 0) AS full_total,
+              coalesce(sum(pg_column_size(embedding_half)), 0) AS half_total
+            FROM chunk_embeddings
+            WHERE model_id = :mid
+            """
+        ),
+        {"mid": model_id},
+    ).mappings().one()
+
+    idx = db.execute(
+        sql_text(
+            """
+            -- chunk_embeddings is partitioned: sum each index over its partitions
+            SELECT i.indexrelid::regclass::text AS name, sum(pg_relation_size(t.relid)) AS bytes
+            FROM pg_index i
+            CROSS JOIN LATERAL pg_partition_tree(i.indexrelid) t
+            WHERE i.indrelid = 'chunk_embeddings'::regclass
+            GROUP BY 1
+            ORDER BY 1
+            """
+        )
+    ).mappings().all()
+
+    return {
+        "rows": int(col["rows"]),
+        "avg_bytes_full": float(col["full_bytes"]),
+        "avg_bytes_half": float(col["half_bytes"]),
+        "total_bytes_full": int(col["full_total"]),
+        "total_bytes_half": int(col["half_total"]),
+        "table_bytes": int(db.execute(sql_text("SELECT sum(pg_total_relation_size(relid)) FROM pg_partition_tree('chunk_embeddings')")).scalar_one()),
+        "indexes": {r["name"]: int(r["bytes"]) for r in idx},
+    }
+
+
+def sample_queries(db, model_id: int, n: int) -> list[tuple[str, list[float]]]:
+    rows = db.execute(
+        sql_text(
+            """
+            SELECT session_id, embedding::text AS emb
+            FROM chunk_embeddings
+            WHERE model_id = :mid AND embedding IS NOT NULL
+            ORDER BY random()
+            LIMIT :n
+            """
+        ),
+        {"mid": model_id, "n": n},
+    ).mappings().all()
+    return [(r["session_id"], json.loads(r["emb"])) for r in rows]
+
+
+def run_mode(db, queries, limit: int, storage: str, rescore_k: int) -> tuple[list[float], list[list[str]]]:
+    latencies: list[float] = []
+    results: list[list[str]] = []
+    for sid, vec in queries:
+        t0 = time.perf_counter()
+        hits = crud.search_chunks_semantic(
+            db, session_id=sid, query_vec=vec, limit=limit, storage=storage, rescore_k=rescore_k, exact=False
+        )
+        latencies.append((time.perf_counter() - t0) * 1000)
+        results.append([str(h["chunk_id"]) for h in hits])
+    return latencies, results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--limit", type=int, default=6)
+    ap.add_argument("--rescore", type=int, default=40, help="candidates re-scored in half+rescore mode")
+    ap.add_argument("--backfill", action="store_true", help="copy float32 vectors into embedding_half first")
+    ap.add_argument("--json", action="store_true", help="print a single JSON document")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            n = crud.backfill_half_embeddings(db)
+            if not args.json:
+                print(f"backfilled {n} rows")
+
+        model = embed_models.active(db)
+        report: dict = {"model": model.name, "storage": storage_report(db, model.id), "search": {}}
+        queries = sample_queries(db, model.id, args.queries)
+
+        base_lat, base_res = run_mode(db, queries, args.limit, "full", 0)
+        modes = [("full", "full", 0), ("half", "half", 0), ("half+rescore", "half", args.rescore)]
+        for name, storage, k in modes:
+            lat, res = (base_lat, base_res) if name == "full" else run_mode(db, queries, args.limit, storage, k)
+            recalls = [
+                len(set(a) & set(b)) / max(1, len(b))
+                for a, b in zip(res, base_res)
+            ]
+            report["search"][name] = {
+                "p50_ms": round(percentile(lat, 50), 3),
+                "p95_ms": round(percentile(lat, 95), 3),
+                "mean_ms": round(statistics.fmean(lat), 3) if lat else 0.0,
+                f"recall@{args.limit}": round(statistics.fmean(recalls), 4) if recalls else 0.0,
+            }
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    st = report["storage"]
+    print(f"model: {report['model']}  rows: {st['rows']}  table+indexes: {st['table_bytes'] / 1e6:.1f} MB")
+    print(f"avg vector bytes: full={st['avg_bytes_full']:.0f}  half={st['avg_bytes_half']:.0f}")
+    print(f"total vector MB: full={st['total_bytes_full'] / 1e6:.1f}  half={st['total_bytes_half'] / 1e6:.1f}")
+    for name, size in st["indexes"].items():
+        print(f"index {name}: {size / 1e6:.1f} MB")
+    for name, m in report["search"].items():
+        print(f"{name:>14}: " + "  ".join(f"{k}={v}" for k, v in m.items()))
+
+
+if __name__ == "__main__":
+    main()
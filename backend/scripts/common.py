@@ -0,0 +1,61 @@
+"""
+Small helpers shared by the benchmark / load-test scripts.
+"""
+from __future__ import annotations
+
+import json
+import statistics
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, round(p / 100 * (len(s) - 1))))
+    return s[k]
+
+
+def latency_summary(values_ms: list[float]) -> dict:
+    return {
+        "count": len(values_ms),
+        "p50_ms": round(percentile(values_ms, 50), 3),
+        "p95_ms": round(percentile(values_ms, 95), 3),
+        "p99_ms": round(percentile(values_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(values_ms), 3) if values_ms else 0.0,
+    }
+
+
+@contextmanager
+def capture_statements(conn):
+    """
+    Records every (statement, parameters) the driver executes on `conn`.
+    """
+    captured: list[tuple[str, object]] = []
+
+    def before(conn_, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", before)
+    try:
+        yield captured
+    finally:
+        event.remove(conn, "before_cursor_execute", before)
+
+
+def explain(conn, statement: str, params) -> dict:
+    """
+    EXPLAIN ANALYZE executes the statement, so run it inside a savepoint.
+    """
+    nested = conn.begin_nested()
+    try:
+        raw = conn.exec_driver_sql(
+            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, params
+        ).scalar_one()
+    finally:
+        nested.rollback()
+    doc = raw if isinstance(raw, list) else json.loads(raw)
+    return doc[0]
@@ -0,0 +1,164 @@
+"""
+Deterministic stand-in for the Ollama HTTP API, for load and performance tests.
+
+Implements the endpoints the backend uses:
+  POST /api/embeddings   {"model", "prompt"}            -> {"embedding": [...]}
+  POST /api/embed        {"model", "input": str|[str]}  -> {"embeddings": [[...], ...]}
+  POST /api/generate     {"model", "prompt", "stream"}  -> NDJSON stream or single JSON
+  GET  /api/tags, GET /api/ps
+
+Embeddings are hashed bag-of-words vectors (same text -> same vector, shared
+words -> higher cosine similarity), so retrieval behaves plausibly.
+
+Configuration (env):
+  FAKE_OLLAMA_LATENCY_MS      base latency per call (default 20)
+  FAKE_OLLAMA_TOKENS_PER_S    generation speed (default 50)
+  FAKE_OLLAMA_MODEL_SPEEDS    per-model overrides, e.g. "llama3.2:1b=200,llama3=50"
+  FAKE_OLLAMA_OUTPUT_TOKENS   tokens per generated answer (default 120)
+  FAKE_OLLAMA_FAILURE_RATE    probability of an HTTP 500 (default 0)
+  FAKE_OLLAMA_STALL_RATE      probability of stalling FAKE_OLLAMA_STALL_S before answering (default 0)
+  FAKE_OLLAMA_STALL_S         (default 30)
+  FAKE_OLLAMA_EMBED_DIM       (default 768)
+  FAKE_OLLAMA_EMBED_DIMS      per-model overrides, e.g. "mxbai-embed-large=1024" (re-embedding tests)
+  FAKE_OLLAMA_SEED            RNG seed for failure injection (default 0)
+
+Run:
+    uvicorn scripts.fake_ollama:app --host 0.0.0.0 --port 11434
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY_MS = float(os.getenv("FAKE_OLLAMA_LATENCY_MS", "20"))
+TOKENS_PER_S = float(os.getenv("FAKE_OLLAMA_TOKENS_PER_S", "50"))
+MODEL_SPEEDS = {
+    name.strip(): float(speed)
+    for name, _, speed in (p.partition("=") for p in os.getenv("FAKE_OLLAMA_MODEL_SPEEDS", "").split(",") if "=" in p)
+}
+OUTPUT_TOKENS = int(os.getenv("FAKE_OLLAMA_OUTPUT_TOKENS", "120"))
+FAILURE_RATE = float(os.getenv("FAKE_OLLAMA_FAILURE_RATE", "0"))
+STALL_RATE = float(os.getenv("FAKE_OLLAMA_STALL_RATE", "0"))
+STALL_S = float(os.getenv("FAKE_OLLAMA_STALL_S", "30"))
+EMBED_DIM = int(os.getenv("FAKE_OLLAMA_EMBED_DIM", "768"))
+EMBED_DIMS = {
+    name.strip(): int(dim)
+    for name, _, dim in (p.partition("=") for p in os.getenv("FAKE_OLLAMA_EMBED_DIMS", "").split(",") if "=" in p)
+}
+
+_rng = random.Random(int(os.getenv("FAKE_OLLAMA_SEED", "0")))
+_loaded: set[str] = set()
+
+app = FastAPI(title="fake-ollama")
+
+WORD_RE = re.compile(r"\w+")
+
+
+def fake_embedding(text: str, dim: int = EMBED_DIM) -> list[float]:
+    vec = [0.0] * dim
+    for word in WORD_RE.findall(text.lower()):
+        h = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        idx = int.from_bytes(h[:4], "little") % dim
+        sign = 1.0 if h[4] & 1 else -1.0
+        vec[idx] += sign
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def fake_tokens(prompt: str, n: int) -> list[str]:
+    seed = int.from_bytes(hashlib.sha256(prompt.encode()).digest()[:8], "little")
+    r = random.Random(seed)
+    words = WORD_RE.findall(prompt) or ["lecture"]
+    out = ["## TL;DR\n"]
+    if "[1]" in prompt:
+        out.append("[1] ")  # cite like a real model would when given context
+    while len(out) < n:
+        out.append(r.choice(words) + " ")
+    return out[:n]
+
+
+async def inject_faults() -> None:
+    await asyncio.sleep(LATENCY_MS / 1000)
+    if STALL_RATE and _rng.random() < STALL_RATE:
+        await asyncio.sleep(STALL_S)
+    if FAILURE_RATE and _rng.random() < FAILURE_RATE:
+        raise HTTPException(status_code=500, detail="injected failure")
+
+
+@app.post("/api/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    await inject_faults()
+    _loaded.add(body.get("model", ""))
+    return {"embedding": fake_embedding(body.get("prompt", ""), EMBED_DIMS.get(body.get("model"), EMBED_DIM))}
+
+
+@app.post("/api/embed")
+async def embed(request: Request):
+    body = await request.json()
+    await inject_faults()
+    _loaded.add(body.get("model", ""))
+    inputs = body.get("input", "")
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dim = EMBED_DIMS.get(body.get("model"), EMBED_DIM)
+    return {"model": body.get("model"), "embeddings": [fake_embedding(t, dim) for t in inputs]}
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+    prompt = body.get("prompt", "")
+    await inject_faults()
+    _loaded.add(model)
+
+    num_predict = (body.get("options") or {}).get("num_predict")
+    n = min(OUTPUT_TOKENS, num_predict) if num_predict and num_predict > 0 else OUTPUT_TOKENS
+    if not prompt:
+        n = 0  # load / keep-alive request
+    tokens = fake_tokens(prompt, n)
+    prompt_tokens = len(WORD_RE.findall(prompt))
+    speed = MODEL_SPEEDS.get(model, TOKENS_PER_S)
+    delay = 1.0 / speed if speed > 0 else 0.0
+
+    def final(text: str = "") -> dict:
+        return {
+            "model": model,
+            "done": True,
+            "done_reason": "length" if n < OUTPUT_TOKENS and prompt else "stop",
+            "response": text,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(tokens),
+            "eval_duration": int(len(tokens) * delay * 1e9),
+        }
+
+    if body.get("stream", True):
+        async def stream():
+            for t in tokens:
+                await asyncio.sleep(delay)
+                yield json.dumps({"model": model, "response": t, "done": False}) + "\n"
+            yield json.dumps(final()) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    await asyncio.sleep(delay * len(tokens))
+    return final("".join(tokens))
+
+
+@app.get("/api/tags")
+def tags():
+    return {"models": [{"name": m, "model": m} for m in sorted(_loaded)]}
+
+
+@app.get("/api/ps")
+def ps():
+    return {"models": [{"name": m, "model": m} for m in sorted(_loaded)]}
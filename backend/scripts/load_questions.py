@@ -0,0 +1,92 @@
+"""
+Concurrent question-capture load test.
+
+Simulates the end-of-lecture burst: many writers posting questions to one
+session at once, either one by one (POST /questions) or in batches
+(POST /questions:batch). Afterwards it checks that order_index values are
+unique and contiguous, and reports throughput and latency.
+
+    python -m scripts.load_questions --base-url http://localhost:8000 --writers 50 --questions 20
+    python -m scripts.load_questions --writers 50 --questions 200 --batch-size 25
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from scripts.common import latency_summary
+
+
+async def writer(client: httpx.AsyncClient, sid: str, wid: int, n: int, batch_size: int, latencies: list[float]):
+    texts = [f"writer {wid} question {i}" for i in range(n)]
+    if batch_size > 0:
+        groups = [texts[i:i + batch_size] for i in range(0, n, batch_size)]
+        for g in groups:
+            t0 = time.perf_counter()
+            r = await client.post(
+                f"/api/sessions/{sid}/questions:batch",
+                json={"questions": [{"text": t} for t in g]},
+            )
+            r.raise_for_status()
+            latencies.append((time.perf_counter() - t0) * 1000)
+    else:
+        for t in texts:
+            t0 = time.perf_counter()
+            r = await client.post(f"/api/sessions/{sid}/questions", json={"text": t})
+            r.raise_for_status()
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.writers, max_keepalive_connections=args.writers)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        r = await client.post("/api/sessions", json={"title": "load test", "topics": None})
+        r.raise_for_status()
+        sid = r.json()["id"]
+
+        latencies: list[float] = []
+        t0 = time.perf_counter()
+        await asyncio.gather(
+            *[writer(client, sid, w, args.questions, args.batch_size, latencies) for w in range(args.writers)]
+        )
+        elapsed = time.perf_counter() - t0
+
+        r = await client.get(f"/api/sessions/{sid}/questions", params={"summary": "true"})
+        r.raise_for_status()
+        indexes = sorted(q["order_index"] for q in r.json())
+
+    expected = args.writers * args.questions
+    return {
+        "session_id": sid,
+        "mode": "batch" if args.batch_size > 0 else "single",
+        "questions": expected,
+        "elapsed_s": round(elapsed, 3),
+        "questions_per_s": round(expected / elapsed, 1) if elapsed else 0.0,
+        "requests": latency_summary(latencies),
+        "stored": len(indexes),
+        "duplicates": len(indexes) - len(set(indexes)),
+        "contiguous": indexes == list(range(1, expected + 1)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-url", default="http://localhost:8000")
+    ap.add_argument("--writers", type=int, default=50)
+    ap.add_argument("--questions", type=int, default=20, help="per writer")
+    ap.add_argument("--batch-size", type=int, default=0, help="0 = one request per question")
+    args = ap.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if report["duplicates"] or not report["contiguous"] or report["stored"] != report["questions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+End-to-end load test: upload -> chunk -> search -> explain-all.
+
+Each virtual user creates a session, uploads synthetic PPTX decks, posts a
+batch of questions, chunks the decks, runs searches and finally explain-all.
+Per-endpoint throughput and p50/p95/p99 latency are printed as JSON.
+
+Point the backend at the fake Ollama first so results don't depend on GPUs:
+
+    uvicorn scripts.fake_ollama:app --port 11434 &
+    OLLAMA_BASE=http://localhost:11434 OLLAMA_URL=http://localhost:11434 uvicorn app.main:app &
+    python -m scripts.loadtest --base-url http://localhost:8000 --users 8 --decks 2 --slides 40 --questions 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+from pptx import Presentation
+from pptx.util import Inches
+
+from scripts.common import latency_summary
+
+TOPICS = [
+    "process scheduling", "FIFO queues", "round robin", "virtual memory", "page tables",
+    "TLB misses", "deadlock avoidance", "semaphores", "mutual exclusion", "file systems",
+    "journaling", "B-trees", "hash joins", "query planning", "gradient descent",
+    "backpropagation", "convolution", "attention", "dynamic programming", "graph search",
+]
+FILLER = (
+    "definition example property theorem proof complexity tradeoff latency throughput "
+    "invariant algorithm structure policy mechanism overhead bound worst case average case"
+).split()
+
+
+def make_deck(rng: random.Random, slides: int) -> bytes:
+    prs = Presentation()
+    layout = prs.slide_layouts[5]  # title only
+    for i in range(slides):
+        topic = rng.choice(TOPICS)
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"{topic.title()} ({i + 1})"
+        box = slide.shapes.add_textbox(Inches(0.5), Inches(1.5), Inches(9), Inches(5))
+        words = [rng.choice(FILLER) for _ in range(rng.randint(60, 160))]
+        box.text_frame.text = f"{topic}: " + " ".join(words)
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, name: str, coro):
+        t0 = time.perf_counter()
+        try:
+            r = await coro
+            r.raise_for_status()
+            return r
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        finally:
+            self.latencies[name].append((time.perf_counter() - t0) * 1000)
+
+
+async def virtual_user(client: httpx.AsyncClient, rec: Recorder, uid: int, args) -> None:
+    rng = random.Random(args.seed + uid)
+
+    r = await rec.call("POST /sessions", client.post("/api/sessions", json={"title": f"load user {uid}", "topics": None}))
+    if r is None:
+        return
+    sid = r.json()["id"]
+
+    for d in range(args.decks):
+        deck = make_deck(rng, args.slides)
+        files = {"files": (f"deck{d}.pptx", deck, "application/vnd.openxmlformats-officedocument.presentationml.presentation")}
+        await rec.call("POST /sessions/{id}/resources", client.post(f"/api/sessions/{sid}/resources", files=files))
+
+    questions = [{"text": f"Can you explain {rng.choice(TOPICS)} and its {rng.choice(FILLER)}?"} for _ in range(args.questions)]
+    await rec.call("POST /sessions/{id}/questions:batch", client.post(f"/api/sessions/{sid}/questions:batch", json={"questions": questions}))
+
+    await rec.call("POST /sessions/{id}/chunk-all", client.post(f"/api/sessions/{sid}/chunk-all"))
+
+    for _ in range(args.searches):
+        q = rng.choice(TOPICS)
+        await rec.call("GET /sessions/{id}/chunks/search", client.get(f"/api/sessions/{sid}/chunks/search", params={"q": q}))
+        await rec.call("GET /sessions/{id}/chunks/semantic-search", client.get(f"/api/sessions/{sid}/chunks/semantic-search", params={"q": q}))
+
+    await rec.call("POST /sessions/{id}/explain-all", client.post(f"/api/sessions/{sid}/explain-all"))
+    await rec.call("GET /sessions/{id}/answers", client.get(f"/api/sessions/{sid}/answers"))
+
+
+async def run(args) -> dict:
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*[virtual_user(client, rec, u, args) for u in range(args.users)])
+        elapsed = time.perf_counter() - t0
+
+    endpoints = {}
+    for name, lat in sorted(rec.latencies.items()):
+        endpoints[name] = {
+            **latency_summary(lat),
+            "errors": rec.errors.get(name, 0),
+            "throughput_rps": round(len(lat) / elapsed, 3) if elapsed else 0.0,
+        }
+    return {
+        "users": args.users,
+        "elapsed_s": round(elapsed, 3),
+        "requests": sum(len(v) for v in rec.latencies.values()),
+        "errors": sum(rec.errors.values()),
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-url", default="http://localhost:8000")
+    ap.add_argument("--users", type=int, default=8, help="concurrent virtual users (one session each)")
+    ap.add_argument("--decks", type=int, default=2, help="decks per session")
+    ap.add_argument("--slides", type=int, default=40, help="slides per deck")
+    ap.add_argument("--questions", type=int, default=20, help="questions per session")
+    ap.add_argument("--searches", type=int, default=10, help="search queries per session")
+    ap.add_argument("--timeout", type=float, default=600)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="also write the JSON report to this file")
+    args = ap.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Run the batched purge of deleted sessions / resources (see app.deletion).
+
+API workers already do this in the background unless PURGE_WORKER=0; use
+this to drain the queue from cron or a one-off container instead, to look
+at open jobs, or to requeue failed ones after fixing the cause (usually
+file permissions under UPLOAD_DIR).
+
+Usage (inside the backend container):
+    python -m scripts.purge_deleted                 # run until the queue is empty
+    python -m scripts.purge_deleted --max-jobs 10
+    python -m scripts.purge_deleted --status
+    python -m scripts.purge_deleted --retry-failed
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from sqlalchemy import text as sql_text
+
+from app import crud, schemas
+from app.db import SessionLocal
+from app.deletion import run_pending
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--status", action="store_true", help="list pending / running / failed jobs")
+    mode.add_argument("--retry-failed", action="store_true", help="requeue failed jobs; they resume at their step")
+    p.add_argument("--max-jobs", type=int, default=None)
+    args = p.parse_args()
+
+    if args.status:
+        with SessionLocal() as db:
+            jobs = crud.list_deletions(db, open_only=True, limit=500)
+            failed = db.execute(sql_text("SELECT id FROM deletions WHERE status = 'failed' ORDER BY created_at")).scalars().all()
+            out = {
+                "open": [schemas.DeletionOut.model_validate(j).model_dump(mode="json") for j in jobs],
+                "failed": [str(i) for i in failed],
+            }
+        print(json.dumps(out, indent=2))
+        return
+
+    if args.retry_failed:
+        with SessionLocal() as db:
+            n = db.execute(
+                sql_text("UPDATE deletions SET status = 'pending', error = NULL, finished_at = NULL WHERE status = 'failed'")
+            ).rowcount
+            db.commit()
+        print(json.dumps({"requeued": n}))
+        return
+
+    started = time.perf_counter()
+    ran = run_pending(max_jobs=args.max_jobs)
+    print(json.dumps({"jobs": ran, "seconds": round(time.perf_counter() - started, 2)}))
+
+
+if __name__ == "__main__":
+    main()
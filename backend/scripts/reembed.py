@@ -0,0 +1,393 @@
+"""
+Re-embed every chunk with a new embedding model, online.
+
+    python -m scripts.reembed --model mxbai-embed-large --rate 20     # build, then switch
+    python -m scripts.reembed --model mxbai-embed-large --no-switch   # build only ...
+    python -m scripts.reembed --model mxbai-embed-large               # ... switch on a later run
+    python -m scripts.reembed --status
+    python -m scripts.reembed --catch-up     # active model: chunks without a vector (rehydrated sessions)
+    python -m scripts.reembed --purge        # drop retired models' vectors and indexes
+    python -m scripts.reembed --abort        # give up on the model being built
+
+1. Registers the model as "building" (dimension probed with one call). From
+   then on new chunks are embedded with it as well (app.embed_models).
+2. Embeds the hot chunks that have no vector for it yet, session by session,
+   at most --rate calls per second, --concurrency at a time, committing
+   every --batch chunks. Progress goes to embedding_models (GET
+   /embeddings/models) and stderr.
+3. Builds the model's HNSW index one partition at a time (CREATE INDEX
+   CONCURRENTLY + ATTACH), so chunk writes are never blocked.
+4. Switches: one transaction re-checks that no hot chunk lacks a vector,
+   retires the old model and activates the new one. Search uses the old
+   vectors until that commit, and workers drop their cached model on the
+   NOTIFY that goes out with it. A last catch-up pass picks up uploads that
+   were already being embedded when the model was registered.
+
+Archived sessions (app.tiering) keep the old model's vector in the cold tier
+and come back without one after the switch (FTS still finds them): run
+--catch-up from cron. Interrupted runs resume where they stopped; retired
+vectors stay until --purge, so switching back is just another run.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sqlalchemy import text as sql_text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+
+from app import cache, embed_models
+from app.db import SessionLocal, engine
+from app.embed_models import EMBED_MODEL_REFRESH_S, EmbedModel
+from app.embeddings import embed_text, vector_columns
+from app.models import ChunkEmbedding
+
+PROGRESS_EVERY_S = 10
+
+_MISSING_SQL = """
+    SELECT c.id, c.text FROM resource_chunks c
+    JOIN resources r ON r.id = c.resource_id AND r.deleted_at IS NULL
+    WHERE c.session_id = :sid
+      AND NOT EXISTS (
+        SELECT 1 FROM chunk_embeddings e
+        WHERE e.session_id = :sid AND e.chunk_id = c.id AND e.model_id = :mid
+      )
+    ORDER BY c.id
+    LIMIT :lim
+"""
+
+# chunks waiting for the purge (app.deletion) don't hold up the switch
+_MISSING_COUNT_SQL = """
+    SELECT count(*) FROM resource_chunks c
+    JOIN resources r ON r.id = c.resource_id AND r.deleted_at IS NULL
+    JOIN sessions s ON s.id = c.session_id AND s.deleted_at IS NULL
+    WHERE NOT EXISTS (
+      SELECT 1 FROM chunk_embeddings e
+      WHERE e.session_id = c.session_id AND e.chunk_id = c.id AND e.model_id = :mid
+    )
+"""
+
+_RECOUNT_SQL = """
+    UPDATE embedding_models SET
+      chunks_total = (SELECT count(*) FROM resource_chunks),
+      chunks_done = (SELECT count(*) FROM chunk_embeddings WHERE model_id = :mid)
+    WHERE id = :mid
+    RETURNING chunks_total, chunks_done
+"""
+
+
+def _model(row) -> EmbedModel:
+    return EmbedModel(row.id, row.name, row.dim, row.status)
+
+
+class RateLimiter:
+    def __init__(self, per_second: float):
+        self.interval = 1 / per_second if per_second > 0 else 0.0
+        self.next_at = time.monotonic()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_at > now:
+            await asyncio.sleep(self.next_at - now)
+        self.next_at = max(self.next_at, now) + self.interval
+
+
+class Progress:
+    def __init__(self, model: EmbedModel, total: int, done: int):
+        self.model, self.total, self.done = model, total, done
+        self.started = self.last = time.monotonic()
+        self.embedded = 0
+
+    def add(self, n: int) -> None:
+        self.done += n
+        self.embedded += n
+        now = time.monotonic()
+        if now - self.last >= PROGRESS_EVERY_S:
+            self.last = now
+            rate = self.embedded / (now - self.started)
+            left = max(0, self.total - self.done)
+            eta = f"{left / rate / 60:.1f} min" if rate else "?"
+            print(
+                f"{self.model.name}: {self.done}/{self.total} chunks, {rate:.1f}/s, eta {eta}",
+                file=sys.stderr,
+            )
+
+
+def register(db, name: str, dim: int) -> tuple[EmbedModel, bool]:
+    """
+    Returns (model, newly_building). An active model is returned as is
+    (catch-up); a retired one goes back to building and keeps its vectors.
+    """
+    db.execute(sql_text("LOCK TABLE embedding_models IN SHARE ROW EXCLUSIVE MODE"))
+    row = db.execute(
+        sql_text("SELECT id, name, dim, status FROM embedding_models WHERE name = :name"), {"name": name}
+    ).first()
+    if row is not None and row.dim != dim:
+        sys.exit(f"{name} returned {dim}-d vectors, registered as {row.dim}-d")
+    if row is not None and row.status in ("active", "building"):
+        db.rollback()
+        return _model(row), False
+
+    other = db.execute(sql_text("SELECT name FROM embedding_models WHERE status = 'building'")).scalar()
+    if other:
+        sys.exit(f"{other} is still being built: finish it or run --abort first")
+    if row is None:
+        row = db.execute(
+            sql_text(
+                "INSERT INTO embedding_models (name, dim, status) VALUES (:name, :dim, 'building') "
+                "RETURNING id, name, dim, status"
+            ),
+            {"name": name, "dim": dim},
+        ).one()
+    else:
+        row = db.execute(
+            sql_text(
+                "UPDATE embedding_models SET status = 'building', retired_at = NULL WHERE id = :id "
+                "RETURNING id, name, dim, status"
+            ),
+            {"id": row.id},
+        ).one()
+    # workers start writing both vectors for new chunks
+    cache.invalidate(db, "model", None)
+    db.commit()
+    return _model(row), True
+
+
+def _write(db, model: EmbedModel, session_id, vectors: list[tuple]) -> int:
+    for _, vec in vectors:
+        if len(vec) != model.dim:
+            sys.exit(f"{model.name} returned a {len(vec)}-d vector, registered as {model.dim}-d")
+    stmt = pg_insert(ChunkEmbedding).values(
+        [
+            {"session_id": session_id, "chunk_id": cid, "model_id": model.id, **vector_columns(vec)}
+            for cid, vec in vectors
+        ]
+    ).on_conflict_do_nothing().returning(ChunkEmbedding.chunk_id)
+    try:
+        n = len(db.execute(stmt).all())
+        db.execute(
+            sql_text("UPDATE embedding_models SET chunks_done = chunks_done + :n WHERE id = :mid"),
+            {"n": n, "mid": model.id},
+        )
+        db.commit()
+    except IntegrityError:
+        # a chunk was deleted / archived meanwhile; the next query skips it
+        db.rollback()
+        return 0
+    return n
+
+
+async def fill(model: EmbedModel, rate: float, concurrency: int, batch: int) -> int:
+    """
+    Embeds hot chunks that have no vector for `model`. Returns how many were written.
+    """
+    limiter = RateLimiter(rate)
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(row):
+        async with slots:
+            await limiter.wait()
+            return row.id, await embed_text(row.text, model.name)
+
+    with SessionLocal() as db:
+        total, done = db.execute(sql_text(_RECOUNT_SQL), {"mid": model.id}).one()
+        sessions = db.execute(sql_text("SELECT id FROM sessions WHERE archived_at IS NULL AND deleted_at IS NULL ORDER BY id")).scalars().all()
+        db.commit()
+        progress = Progress(model, total, done)
+        for sid in sessions:
+            while True:
+                rows = db.execute(sql_text(_MISSING_SQL), {"sid": sid, "mid": model.id, "lim": batch}).all()
+                # no snapshot held open while Ollama works
+                db.rollback()
+                if not rows:
+                    break
+                vectors = await asyncio.gather(*(one(r) for r in rows))
+                progress.add(_write(db, model, sid, vectors))
+    return progress.embedded
+
+
+def build_index(model: EmbedModel) -> None:
+    """
+    The model's partial HNSW index, built partition by partition without
+    blocking writes; the parent index becomes valid once all are attached.
+    """
+    spec = f"USING hnsw ((embedding_half::halfvec({model.dim})) halfvec_cosine_ops) WHERE model_id = {model.id}"
+    parent = model.index_name
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(sql_text(f"CREATE INDEX IF NOT EXISTS {parent} ON ONLY chunk_embeddings {spec}"))
+        partitions = conn.execute(
+            sql_text(
+                "SELECT inhrelid::regclass::text FROM pg_inherits "
+                "WHERE inhparent = 'chunk_embeddings'::regclass ORDER BY 1"
+            )
+        ).scalars().all()
+        # partitions that already have their index attached (whatever its name)
+        covered = set(
+            conn.execute(
+                sql_text(
+                    "SELECT i.indrelid::regclass::text FROM pg_inherits h JOIN pg_index i ON i.indexrelid = h.inhrelid "
+                    "WHERE h.inhparent = to_regclass(:idx)"
+                ),
+                {"idx": parent},
+            ).scalars()
+        )
+        for part in partitions:
+            name = f"{part}_m{model.id}_half_hnsw"
+            if part in covered:
+                continue
+            valid = conn.execute(
+                sql_text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:idx)"), {"idx": name}
+            ).scalar()
+            if valid is False:
+                # left behind by an interrupted CREATE INDEX CONCURRENTLY
+                conn.execute(sql_text(f"DROP INDEX CONCURRENTLY {name}"))
+            if not valid:
+                started = time.monotonic()
+                conn.execute(sql_text(f"CREATE INDEX CONCURRENTLY {name} ON {part} {spec}"))
+                print(f"index {name}: {time.monotonic() - started:.1f}s", file=sys.stderr)
+            conn.execute(sql_text(f"ALTER INDEX {parent} ATTACH PARTITION {name}"))
+
+
+def switch(db, model: EmbedModel) -> bool:
+    """
+    Activates `model` if every hot chunk has a vector for it; one transaction.
+    """
+    db.execute(sql_text("LOCK TABLE embedding_models IN SHARE ROW EXCLUSIVE MODE"))
+    missing = db.execute(sql_text(_MISSING_COUNT_SQL), {"mid": model.id}).scalar_one()
+    if missing:
+        db.rollback()
+        print(f"{missing} chunks still without a {model.name} vector", file=sys.stderr)
+        return False
+    valid = db.execute(
+        sql_text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:idx)"), {"idx": model.index_name}
+    ).scalar()
+    if not valid:
+        sys.exit(f"index {model.index_name} is not valid; re-run to rebuild it")
+    db.execute(sql_text("UPDATE embedding_models SET status = 'retired', retired_at = now() WHERE status = 'active'"))
+    db.execute(
+        sql_text("UPDATE embedding_models SET status = 'active', activated_at = now() WHERE id = :mid"),
+        {"mid": model.id},
+    )
+    cache.invalidate(db, "model", None)
+    db.commit()
+    return True
+
+
+def purge(grace_s: float) -> list[str]:
+    """
+    Drops the vectors and index of models retired more than `grace_s` ago.
+    """
+    with SessionLocal() as db:
+        models = [
+            _model(r)
+            for r in db.execute(
+                sql_text(
+                    "SELECT id, name, dim, status FROM embedding_models "
+                    "WHERE status = 'retired' AND retired_at < now() - make_interval(secs => :grace)"
+                ),
+                {"grace": grace_s},
+            ).all()
+        ]
+        sessions = db.execute(sql_text("SELECT id FROM sessions ORDER BY id")).scalars().all()
+        db.rollback()
+        for m in models:
+            db.execute(sql_text(f"DROP INDEX IF EXISTS {m.index_name}"))
+            db.commit()
+            # per session: short transactions, primary-key prefix deletes
+            for sid in sessions:
+                db.execute(
+                    sql_text("DELETE FROM chunk_embeddings WHERE session_id = :sid AND model_id = :mid"),
+                    {"sid": sid, "mid": m.id},
+                )
+                db.execute(
+                    sql_text(
+                        "UPDATE resource_chunks_cold SET embedding = NULL, embedding_half = NULL, embedding_model_id = NULL "
+                        "WHERE session_id = :sid AND embedding_model_id = :mid"
+                    ),
+                    {"sid": sid, "mid": m.id},
+                )
+                db.commit()
+            db.execute(sql_text("UPDATE embedding_models SET chunks_done = 0 WHERE id = :mid"), {"mid": m.id})
+            db.commit()
+    return [m.name for m in models]
+
+
+async def run(args) -> dict:
+    started = time.perf_counter()
+    fill_args = (args.rate, args.concurrency, args.batch)
+
+    if args.catch_up:
+        with SessionLocal() as db:
+            model = embed_models.active(db)
+        return {"model": model.name, "embedded": await fill(model, *fill_args)}
+
+    dim = len(await embed_text("dimension probe", args.model))
+    with SessionLocal() as db:
+        model, fresh = register(db, args.model, dim)
+    registered_at = time.monotonic()
+    out = {"model": model.name, "dim": model.dim, "embedded": await fill(model, *fill_args), "switched": False}
+    if model.status == "active":
+        return out
+
+    build_index(model)
+    if not args.no_switch:
+        if fresh:
+            # every worker has re-read the registry (TTL) by now
+            await asyncio.sleep(max(0.0, registered_at + 2 * EMBED_MODEL_REFRESH_S - time.monotonic()))
+        for _ in range(3):
+            with SessionLocal() as db:
+                if switch(db, model):
+                    out["switched"] = True
+                    break
+            out["embedded"] += await fill(model, *fill_args)
+        else:
+            sys.exit(f"{model.name}: chunks keep arriving without a vector; re-run to retry the switch")
+        out["embedded"] += await fill(model, *fill_args)
+    out["seconds"] = round(time.perf_counter() - started, 2)
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    action = p.add_mutually_exclusive_group(required=True)
+    action.add_argument("--model", help="Ollama embedding model to build and switch to")
+    action.add_argument("--catch-up", action="store_true", help="embed hot chunks missing an active-model vector")
+    action.add_argument("--status", action="store_true", help="print embedding_models and exit")
+    action.add_argument("--purge", action="store_true", help="drop retired models' vectors and indexes")
+    action.add_argument("--abort", action="store_true", help="retire the model being built")
+    p.add_argument("--rate", type=float, default=10.0, help="max embedding calls per second (0 = unlimited)")
+    p.add_argument("--concurrency", type=int, default=2, help="embedding calls in flight")
+    p.add_argument("--batch", type=int, default=64, help="chunks per commit")
+    p.add_argument("--no-switch", action="store_true", help="build vectors and index, keep the current model active")
+    p.add_argument("--grace-s", type=float, default=3600, help="--purge: keep vectors retired less than this long")
+    args = p.parse_args()
+
+    if args.status:
+        with SessionLocal() as db:
+            out = embed_models.stats(db)
+    elif args.purge:
+        out = {"purged": purge(args.grace_s)}
+    elif args.abort:
+        with SessionLocal() as db:
+            names = db.execute(
+                sql_text(
+                    "UPDATE embedding_models SET status = 'retired', retired_at = now() "
+                    "WHERE status = 'building' RETURNING name"
+                )
+            ).scalars().all()
+            cache.invalidate(db, "model", None)
+            db.commit()
+        out = {"aborted": names}
+    else:
+        out = asyncio.run(run(args))
+    print(json.dumps(out, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
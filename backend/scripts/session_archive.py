@@ -0,0 +1,379 @@
+"""
+Export / import a session as a columnar archive, embeddings included, so a
+course can be copied between environments without re-extracting and
+re-embedding through Ollama.
+
+An archive is a directory:
+  manifest.json       format version, session title/topics, embedding model + dim, row counts
+  resources.parquet   resource rows + extracted text
+  chunks.parquet      text, page_ref, embedding as fixed_size_list<float32, dim>
+                      (the active model's; zeros + has_embedding=false for
+                      chunks not embedded with it yet)
+  questions.parquet
+  answers.parquet     answer_md, sources_json (chunk ids inside are remapped on import)
+Original upload files are not included.
+
+Import loads each table with binary COPY inside one transaction (the
+statement-level counter / version triggers fire once per table). Chunks are
+COPYed into a temp table first and split into resource_chunks and
+chunk_embeddings with two INSERT ... SELECTs, so EMBED_STORAGE=half can fill
+embedding_half on the way. Ids are regenerated unless --keep-ids.
+
+Usage (inside the backend container):
+    python -m scripts.session_archive export <session_id> /backups/os-week3
+    python -m scripts.session_archive import /backups/os-week3 [--title "..."] [--keep-ids]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pgvector.psycopg import register_vector
+
+from app import crud, embed_models
+from app.db import engine
+from app.embeddings import EMBED_KEEP_FULL, EMBED_STORAGE
+
+FORMAT_VERSION = 1
+BATCH_ROWS = 5000
+
+TABLES = {
+    "resources": """
+        SELECT r.id, r.filename, r.mime_type, r.storage_path, r.status, r.error,
+               r.created_at, r.extracted_at, t.extracted_text
+        FROM resources r LEFT JOIN resource_texts t ON t.resource_id = r.id
+        WHERE r.session_id = %(sid)s AND r.deleted_at IS NULL ORDER BY r.created_at, r.id
+    """,
+    "chunks": """
+        WITH deleted AS (SELECT id FROM resources WHERE session_id = %(sid)s AND deleted_at IS NOT NULL)
+        SELECT c.id, c.resource_id, c.chunk_index, c.page_ref, c.text, c.created_at,
+               COALESCE(e.embedding, e.embedding_half::vector) AS embedding
+        FROM resource_chunks c
+        LEFT JOIN chunk_embeddings e
+          ON e.session_id = %(sid)s AND e.chunk_id = c.id AND e.model_id = %(mid)s
+        WHERE c.session_id = %(sid)s AND c.resource_id NOT IN (SELECT id FROM deleted)
+        UNION ALL  -- archived sessions (app.tiering) are exported without rehydrating
+        SELECT id, resource_id, chunk_index, page_ref, text, created_at,
+               CASE WHEN embedding_model_id = %(mid)s THEN COALESCE(embedding, embedding_half::vector) END
+        FROM resource_chunks_cold WHERE session_id = %(sid)s AND resource_id NOT IN (SELECT id FROM deleted)
+        ORDER BY resource_id, chunk_index
+    """,
+    "questions": """
+        SELECT id, text, asked_at, order_index
+        FROM questions WHERE session_id = %(sid)s ORDER BY order_index
+    """,
+    "answers": """
+        SELECT id, question_id, answer_md, sources_json, created_at, stale_at
+        FROM answers WHERE session_id = %(sid)s ORDER BY created_at, id
+    """,
+}
+
+_TS = pa.timestamp("us", tz="UTC") if pa else None
+SCHEMAS = {
+    "resources": [
+        ("id", "string"), ("filename", "string"), ("mime_type", "string"), ("storage_path", "string"),
+        ("status", "string"), ("error", "string"), ("created_at", "ts"), ("extracted_at", "ts"),
+        ("extracted_text", "string"),
+    ],
+    "chunks": [
+        ("id", "string"), ("resource_id", "string"), ("chunk_index", "int32"), ("page_ref", "string"),
+        ("text", "string"), ("created_at", "ts"), ("embedding", "vector"),
+    ],
+    # computed in _to_batch: Parquet can't store null fixed-size lists
+    "chunks_extra": [("has_embedding", "bool")],
+    "questions": [("id", "string"), ("text", "string"), ("asked_at", "ts"), ("order_index", "int32")],
+    "answers": [
+        ("id", "string"), ("question_id", "string"), ("answer_md", "string"), ("sources_json", "string"),
+        ("created_at", "ts"), ("stale_at", "ts"),
+    ],
+}
+
+
+def _arrow_schema(table: str, dim: int):
+    types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "bool": pa.bool_(),
+        "ts": _TS,
+        "vector": pa.list_(pa.float32(), dim),
+    }
+    fields = SCHEMAS[table] + SCHEMAS.get(f"{table}_extra", [])
+    return pa.schema([(name, types[kind]) for name, kind in fields])
+
+
+def _to_batch(table: str, rows: list[tuple], schema):
+    cols = list(zip(*rows))
+    arrays = []
+    for (name, kind), values in zip(SCHEMAS[table], cols):
+        if kind == "vector":
+            # one contiguous float32 buffer
+            dim = schema.field(name).type.list_size
+            flat = np.stack([np.zeros(dim, np.float32) if v is None else np.asarray(v, np.float32) for v in values])
+            arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(flat.reshape(-1)), dim))
+            has_embedding = pa.array([v is not None for v in values], pa.bool_())
+        elif kind == "string":
+            arrays.append(pa.array([None if v is None else str(v) for v in values], pa.string()))
+        else:
+            arrays.append(pa.array(values, schema.field(name).type))
+    if table == "chunks":
+        arrays.append(has_embedding)
+    return pa.record_batch(arrays, schema=schema)
+
+
+# --------------------
+# Export
+# --------------------
+
+def export_session(session_id: uuid.UUID, out_dir: Path) -> dict:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    with engine.connect() as conn:
+        model = embed_models.active(conn)
+        raw = conn.connection.driver_connection
+        register_vector(raw)
+        row = raw.execute(
+            "SELECT title, topics FROM sessions WHERE id = %s AND deleted_at IS NULL", (session_id,)
+        ).fetchone()
+        if row is None:
+            sys.exit(f"session {session_id} not found")
+        title, topics = row
+
+        for table, sql in TABLES.items():
+            schema = _arrow_schema(table, model.dim)
+            counts[table] = 0
+            with pq.ParquetWriter(out_dir / f"{table}.parquet", schema, compression="zstd") as writer:
+                # named (server-side) cursor: 100k chunks never sit in memory at once
+                with raw.cursor(name=f"export_{table}", binary=True) as cur:
+                    cur.execute(sql, {"sid": session_id, "mid": model.id})
+                    while True:
+                        rows = cur.fetchmany(BATCH_ROWS)
+                        if not rows:
+                            break
+                        writer.write_batch(_to_batch(table, rows, schema))
+                        counts[table] += len(rows)
+        raw.rollback()
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "session": {"id": str(session_id), "title": title, "topics": topics},
+        "embed_model": model.name,
+        "embed_dim": model.dim,
+        "counts": counts,
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+# --------------------
+# Import
+# --------------------
+
+_STAGE_CHUNKS_SQL = """
+    CREATE TEMP TABLE import_chunks (
+      id uuid, resource_id uuid, chunk_index int, page_ref varchar(50), text text,
+      created_at timestamptz, embedding vector
+    ) ON COMMIT DROP
+"""
+
+# page_num / source_type are derived here (as in migration d6e7f8a9b0c1), not archived
+_INSERT_CHUNKS_SQL = """
+    INSERT INTO resource_chunks
+      (id, session_id, resource_id, chunk_index, page_ref, page_num, source_type, text, created_at)
+    SELECT c.id, %(sid)s, c.resource_id, c.chunk_index, c.page_ref,
+           substring(c.page_ref FROM '(\\d+)')::int,
+           CASE
+             WHEN lower(r.filename) LIKE '%%.pdf' OR r.mime_type = 'application/pdf' THEN 'pdf'
+             WHEN lower(r.filename) LIKE '%%.pptx'
+               OR r.mime_type = 'application/vnd.openxmlformats-officedocument.presentationml.presentation' THEN 'pptx'
+           END,
+           c.text, c.created_at
+    FROM import_chunks c
+    JOIN resources r ON r.id = c.resource_id
+"""
+
+_INSERT_EMBEDDINGS_SQL = """
+    INSERT INTO chunk_embeddings (chunk_id, session_id, model_id, embedding, embedding_half)
+    SELECT id, %(sid)s, %(mid)s,
+           CASE WHEN %(full)s THEN embedding END,
+           CASE WHEN %(half)s THEN embedding::halfvec END
+    FROM import_chunks
+    WHERE embedding IS NOT NULL
+"""
+
+# same shape as the answer_sources backfill (d0e1f2a3b4c5), for this session only
+def _copy(cur, sql: str, types: list[str], rows) -> int:
+    n = 0
+    with cur.copy(sql) as copy:
+        copy.set_types(types)
+        for row in rows:
+            copy.write_row(row)
+            n += 1
+    return n
+
+
+def _remap_sources(sources_json: str, ids: dict) -> str:
+    try:
+        sources = json.loads(sources_json)
+    except ValueError:
+        return sources_json
+    if isinstance(sources, list):
+        for s in sources:
+            if isinstance(s, dict) and s.get("chunk_id") in ids:
+                s["chunk_id"] = str(ids[s["chunk_id"]])
+    return json.dumps(sources)
+
+
+def import_session(in_dir: Path, title: str | None, keep_ids: bool, drop_embeddings: bool) -> dict:
+    manifest = json.loads((in_dir / "manifest.json").read_text())
+    if manifest.get("format") != FORMAT_VERSION:
+        sys.exit(f"unsupported archive format {manifest.get('format')}")
+    dim = manifest["embed_dim"]
+
+    # old id (str) -> new uuid; identity with --keep-ids
+    ids: dict[str, uuid.UUID] = {}
+
+    def new_id(old: str) -> uuid.UUID:
+        if old not in ids:
+            ids[old] = uuid.UUID(old) if keep_ids else uuid.uuid4()
+        return ids[old]
+
+    def read(table: str):
+        pf = pq.ParquetFile(in_dir / f"{table}.parquet")
+        if pf.num_row_groups == 0:  # empty table: iter_batches raises
+            return
+        yield from pf.iter_batches(batch_size=BATCH_ROWS)
+
+    sid = new_id(manifest["session"]["id"])
+    counts = {}
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        model = embed_models.active(conn)
+        if manifest["embed_model"] != model.name and not drop_embeddings:
+            sys.exit(
+                f"archive embeddings come from {manifest['embed_model']!r}, this server uses {model.name!r}; "
+                "pass --drop-embeddings to import text only and re-embed"
+            )
+        conn.rollback()
+        raw = conn.connection.driver_connection
+        register_vector(raw)
+        with raw.transaction(), raw.cursor() as cur:
+            cur.execute(
+                "INSERT INTO sessions (id, title, topics, created_at) VALUES (%s, %s, %s, now())",
+                (sid, title or manifest["session"]["title"], manifest["session"]["topics"]),
+            )
+
+            def resource_rows():
+                for b in read("resources"):
+                    for r in b.to_pylist():
+                        yield (new_id(r["id"]), sid, r["filename"], r["mime_type"], r["storage_path"], r["status"],
+                               r["error"], r["created_at"], r["extracted_at"])
+
+            counts["resources"] = _copy(
+                cur,
+                "COPY resources (id, session_id, filename, mime_type, storage_path, status, error, created_at, extracted_at) "
+                "FROM STDIN (FORMAT BINARY)",
+                ["uuid", "uuid", "varchar", "varchar", "varchar", "varchar", "text", "timestamptz", "timestamptz"],
+                resource_rows(),
+            )
+
+            def text_rows():
+                for b in read("resources"):
+                    for rid, text in zip(b.column("id").to_pylist(), b.column("extracted_text").to_pylist()):
+                        if text is not None:
+                            yield (ids[rid], text)
+
+            _copy(cur, "COPY resource_texts (resource_id, extracted_text) FROM STDIN (FORMAT BINARY)", ["uuid", "text"], text_rows())
+
+            def chunk_rows():
+                for b in read("chunks"):
+                    emb = b.column("embedding")
+                    # zero-copy view of the float32 buffer, sliced per row
+                    flat = emb.values.to_numpy(zero_copy_only=False).reshape(-1, dim)
+                    valid = b.column("has_embedding").to_numpy(zero_copy_only=False)
+                    cols = [b.column(c).to_pylist() for c in ("id", "resource_id", "chunk_index", "page_ref", "text", "created_at")]
+                    for i, (cid, rid, idx, page_ref, text, created_at) in enumerate(zip(*cols)):
+                        vec = flat[emb.offset + i] if valid[i] and not drop_embeddings else None
+                        yield (new_id(cid), ids[rid], idx, page_ref, text, created_at, vec)
+
+            cur.execute(_STAGE_CHUNKS_SQL)
+            counts["chunks"] = _copy(
+                cur,
+                "COPY import_chunks (id, resource_id, chunk_index, page_ref, text, created_at, embedding) FROM STDIN (FORMAT BINARY)",
+                ["uuid", "uuid", "int4", "varchar", "text", "timestamptz", "vector"],
+                chunk_rows(),
+            )
+            cur.execute(_INSERT_CHUNKS_SQL, {"sid": sid})
+            cur.execute(
+                _INSERT_EMBEDDINGS_SQL,
+                {"sid": sid, "mid": model.id, "full": EMBED_STORAGE != "half" or EMBED_KEEP_FULL, "half": EMBED_STORAGE == "half"},
+            )
+
+            def question_rows():
+                for b in read("questions"):
+                    for q in b.to_pylist():
+                        yield (new_id(q["id"]), sid, q["text"], q["asked_at"], q["order_index"])
+
+            counts["questions"] = _copy(
+                cur,
+                "COPY questions (id, session_id, text, asked_at, order_index) FROM STDIN (FORMAT BINARY)",
+                ["uuid", "uuid", "text", "timestamptz", "int4"],
+                question_rows(),
+            )
+
+            def answer_rows():
+                for b in read("answers"):
+                    for a in b.to_pylist():
+                        sources = a["sources_json"] if keep_ids else _remap_sources(a["sources_json"], ids)
+                        yield (new_id(a["id"]), sid, ids[a["question_id"]], a["answer_md"], sources,
+                               a["created_at"], a["stale_at"])
+
+            counts["answers"] = _copy(
+                cur,
+                "COPY answers (id, session_id, question_id, answer_md, sources_json, created_at, stale_at) "
+                "FROM STDIN (FORMAT BINARY)",
+                ["uuid", "uuid", "uuid", "text", "text", "timestamptz", "timestamptz"],
+                answer_rows(),
+            )
+            cur.execute(crud.backfill_sources_sql("a.session_id = %(sid)s"), {"sid": sid})
+            cur.execute(
+                "UPDATE sessions SET question_seq = (SELECT coalesce(max(order_index), 0) FROM questions WHERE session_id = %(sid)s) "
+                "WHERE id = %(sid)s",
+                {"sid": sid},
+            )
+            cur.execute("ANALYZE resource_chunks")
+            cur.execute("ANALYZE chunk_embeddings")
+
+    return {"session_id": str(sid), "counts": counts, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = p.add_subparsers(dest="cmd", required=True)
+    e = sub.add_parser("export", help="write a session to an archive directory")
+    e.add_argument("session_id", type=uuid.UUID)
+    e.add_argument("out", type=Path)
+    i = sub.add_parser("import", help="load an archive as a new session")
+    i.add_argument("src", type=Path)
+    i.add_argument("--title", help="title for the imported session (default: the archived one)")
+    i.add_argument("--keep-ids", action="store_true", help="reuse the archived ids (restore into an empty database)")
+    i.add_argument("--drop-embeddings", action="store_true", help="import without embeddings (different embedding model)")
+    args = p.parse_args()
+
+    if args.cmd == "export":
+        started = time.perf_counter()
+        out = export_session(args.session_id, args.out)
+        out["seconds"] = round(time.perf_counter() - started, 2)
+    else:
+        out = import_session(args.src, args.title, args.keep_ids, args.drop_embeddings)
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+API tests against a real, migrated Postgres (pgvector): set DATABASE_URL and
+run `alembic upgrade head` first. Without DATABASE_URL only the pure-Python
+tests in NO_DB are collected. Each test works in its own session, removed
+afterwards.
+"""
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+NO_DB = {"test_llm_router.py"}
+
+if not os.getenv("DATABASE_URL"):
+    collect_ignore = [p.name for p in Path(__file__).parent.glob("test_*.py") if p.name not in NO_DB]
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text as sql_text
+    from sqlalchemy.exc import OperationalError
+
+    from app.db import engine
+    from app.main import app
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(sql_text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"database not reachable: {e.orig}")
+    # no `with`: the lifespan (warm-up, listeners, purge loop) is not needed here
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(client):
+    from app.db import SessionLocal
+
+    with SessionLocal() as s:
+        yield s
+
+
+@pytest.fixture
+def session_id(client, db):
+    from sqlalchemy import text as sql_text
+
+    sid = uuid.UUID(client.post("/api/sessions", json={"title": "test session"}).json()["id"])
+    yield sid
+    db.rollback()
+    db.execute(sql_text("DELETE FROM sessions WHERE id = :sid"), {"sid": sid})
+    db.commit()
+
+
+@pytest.fixture
+def answered(db, session_id):
+    """
+    Five questions, each with an answer; returns the answer ids.
+    """
+    from app import crud
+
+    questions = crud.create_questions(db, session_id=session_id, texts=[f"question {i}" for i in range(5)])
+    return [
+        crud.upsert_answer(db, session_id=session_id, question_id=q.id, answer_md=f"answer {i}", sources_json=json.dumps([])).id
+        for i, q in enumerate(questions)
+    ]
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+
+def test_list_answers_pages(client, session_id, answered):
+    url = f"/api/sessions/{session_id}/answers"
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        r = client.get(url, params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        body = r.json()
+        assert len(body) <= 2
+        seen += [a["id"] for a in body]
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert sorted(seen) == sorted(str(a) for a in answered)
+
+
+def test_list_answers_summary_skips_bodies(client, session_id, answered):
+    body = client.get(f"/api/sessions/{session_id}/answers", params={"summary": "true"}).json()
+    assert len(body) == len(answered)
+    assert all("answer_md" not in a and "sources_json" not in a for a in body)
+
+
+def test_list_answers_etag(client, db, session_id, answered):
+    from app import crud
+
+    url = f"/api/sessions/{session_id}/answers"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+
+    # a new answer moves answers_version
+    q = crud.create_question(db, session_id=session_id, text="one more")
+    crud.upsert_answer(db, session_id=session_id, question_id=q.id, answer_md="more", sources_json="[]")
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert len(r.json()) == len(answered) + 1
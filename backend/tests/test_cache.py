@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import uuid
+
+from app import cache
+
+
+def test_rolled_back_invalidation_is_not_applied_on_a_later_commit(db):
+    qid = str(uuid.uuid4())
+    cache.answers.set(qid, {"id": "cached"})
+
+    cache.invalidate(db, "answer", qid)
+    db.rollback()
+    assert cache.answers.get(qid) == {"id": "cached"}
+
+    # an unrelated commit on the same Session
+    db.commit()
+    assert cache.answers.get(qid) == {"id": "cached"}
+
+    cache.invalidate(db, "answer", qid)
+    db.commit()
+    assert cache.answers.get(qid) is None
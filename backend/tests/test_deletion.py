@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text as sql_text
+
+from app import crud
+
+
+@pytest.fixture
+def deleted(client, db, session_id):
+    """
+    A session with a chunked resource, deleted through the API (the purge
+    worker does not run in tests, so its rows are still there).
+    """
+    r = crud.create_resource(
+        db, session_id=session_id, filename="deck.pdf", mime_type="application/pdf",
+        storage_path="", status="EXTRACTED", extracted_text="x", error=None,
+    )
+    crud.create_chunks_for_resource(
+        db, session_id=session_id, resource_id=r.id,
+        chunks=[(f"p.{i}", f"virtual memory paging part {i}") for i in range(1, 6)],
+    )
+    assert crud.search_chunks_fts(db, session_id=session_id, query="paging", limit=10)
+    assert client.delete(f"/api/sessions/{session_id}").status_code == 202
+    yield session_id
+    db.execute(sql_text("DELETE FROM deletions WHERE session_id = :sid"), {"sid": session_id})
+    db.commit()
+
+
+def test_deleted_session_chunks_are_not_searchable(db, deleted):
+    assert crud.search_chunks_fts(db, session_id=deleted, query="paging", limit=10) == []
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("GET", "/api/sessions/{sid}/chunks/search?q=paging"),
+        ("GET", "/api/sessions/{sid}/chunks/semantic-search?q=paging"),
+        ("GET", "/api/sessions/{sid}/answers"),
+        ("POST", "/api/sessions/{sid}/explain-all"),
+    ],
+)
+def test_deleted_session_routes_404(client, deleted, method, path):
+    assert client.request(method, path.format(sid=deleted)).status_code == 404
+
+
+def test_questions_are_not_added_to_a_deleted_session(db, deleted):
+    assert crud.create_questions(db, session_id=deleted, texts=["late", "later"]) == []
+    assert crud.create_question(db, session_id=deleted, text="late") is None
+    assert crud.list_questions(db, session_id=deleted) == []
+
+
+@pytest.mark.parametrize(
+    "path, body",
+    [
+        ("/api/sessions/{sid}/questions", {"text": "late"}),
+        ("/api/sessions/{sid}/questions:batch", {"questions": [{"text": "late"}]}),
+    ],
+)
+def test_question_routes_404_when_delete_lands_after_the_lookup(client, monkeypatch, deleted, path, body):
+    from app.routers import sessions
+
+    # the session lookup saw it alive; the delete committed before the insert
+    monkeypatch.setattr(sessions.crud, "get_session", lambda db, session_id: object())
+    assert client.post(path.format(sid=deleted), json=body).status_code == 404
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import event
+
+
+def test_question_batch_notifies_once_per_question_in_one_statement(client, db, session_id):
+    import psycopg
+
+    from app import crud
+    from app.db import DATABASE_URL, engine
+    from app.events import EVENTS_CHANNEL, _conninfo
+
+    notify_statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "pg_notify" in statement:
+            notify_statements.append(statement)
+
+    with psycopg.connect(_conninfo(DATABASE_URL), autocommit=True) as listener:
+        listener.execute(f"LISTEN {EVENTS_CHANNEL}")
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            crud.create_questions(db, session_id=session_id, texts=["a", "b", "c"])
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        received = [json.loads(n.payload) for n in listener.notifies(timeout=2, stop_after=3)]
+
+    assert len(notify_statements) == 1
+    ours = [e for e in received if e["session_id"] == str(session_id)]
+    assert [e["type"] for e in ours] == ["question.created"] * 3
+    assert [e["data"]["text"] for e in ours] == ["a", "b", "c"]
+    assert [e["data"]["order_index"] for e in ours] == sorted(e["data"]["order_index"] for e in ours)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+
+import pytest
+
+from app import llm_router
+from app.llm_router import classify, validate
+
+GOOD = "**TL;DR** Paging maps virtual pages to physical frames [1].\n\nExplanation ..."
+HITS = [{"chunk_id": f"c{i}", "filename": "os.pdf", "text": f"chunk {i}"} for i in range(8)]
+
+
+def _prompt(question, contexts, brief=False):
+    return "brief" if brief else "full"
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """
+    Replaces the Ollama call; queue results in `replies`, inspect `calls`.
+    """
+    class Fake:
+        replies: list[dict] = []
+        calls: list[dict] = []
+
+    async def generate(prompt, session_id=None, priority=None, idle_only=False, model=None, options=None):
+        Fake.calls.append({"prompt": prompt, "model": model, "options": options})
+        return {"model": model, "text": GOOD, "done_reason": "stop", **(Fake.replies.pop(0) if Fake.replies else {})}
+
+    monkeypatch.setattr(llm_router, "ollama_generate_full", generate)
+    monkeypatch.setattr(llm_router, "LLM_ROUTING", True)
+    monkeypatch.setattr(llm_router, "_baseline_s", 0.0)
+    return Fake
+
+
+def _answer(question, hits=HITS):
+    return asyncio.run(llm_router.generate_answer(question, hits, _prompt))
+
+
+@pytest.mark.parametrize(
+    "question, route",
+    [
+        ("What is a TLB?", "short"),
+        ("What does DMA stand for?", "short"),
+        ("define thrashing", "short"),
+        ("page table", "short"),
+        ("Why does the TLB need to be flushed on a context switch?", "full"),
+        ("How does the clock algorithm approximate LRU?", "full"),
+        ("Compare paging and segmentation", "full"),
+        ("What is x^2 at x = 3", "full"),
+        ("What is the difference between a process and a thread in the scheduler", "full"),
+        ("Explain the working set model used by the scheduler here", "full"),
+    ],
+)
+def test_classify(question, route):
+    assert classify(question) == route
+
+
+@pytest.mark.parametrize(
+    "result, n_contexts, reason",
+    [
+        ({"text": GOOD, "done_reason": "stop"}, 3, None),
+        ({"text": "TL;DR", "done_reason": "stop"}, 3, "empty"),
+        ({"text": GOOD, "done_reason": "length"}, 3, "truncated"),
+        ({"text": "Paging maps virtual pages to physical frames [1], see the notes.", "done_reason": "stop"}, 3, "format"),
+        ({"text": GOOD + " I don't know the rest.", "done_reason": "stop"}, 3, "unsure"),
+        ({"text": GOOD.replace(" [1]", ""), "done_reason": "stop"}, 3, "no_citation"),
+        ({"text": GOOD.replace(" [1]", ""), "done_reason": "stop"}, 0, None),
+    ],
+)
+def test_validate(result, n_contexts, reason):
+    assert validate(result, n_contexts) == reason
+
+
+def test_defaults_keep_the_unrouted_behaviour(monkeypatch):
+    for var in ("LLM_ROUTING", "LLM_FULL_NUM_PREDICT", "LLM_FULL_NUM_CTX", "LLM_MODEL_LADDER"):
+        monkeypatch.delenv(var, raising=False)
+    router = importlib.reload(llm_router)
+    try:
+        assert router.LLM_ROUTING is False
+        assert router.attempts("full") == [(router.OLLAMA_MODEL, "full")]
+        assert router._options("full", router.OLLAMA_MODEL) == {}
+    finally:
+        monkeypatch.undo()
+        importlib.reload(llm_router)
+
+
+def test_short_answer_escalates_up_the_ladder(ollama, monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_MODEL_LADDER", ["small", "big"])
+    ollama.replies = [{"done_reason": "length"}]
+
+    text, contexts = _answer("What is a TLB?")
+
+    assert [(c["model"], c["prompt"]) for c in ollama.calls] == [("small", "brief"), ("big", "full")]
+    assert ollama.calls[0]["options"]["num_predict"] == llm_router.ROUTES["short"]["num_predict"]
+    assert text == GOOD
+    assert len(contexts) == llm_router.ROUTES["full"]["contexts"]
+
+
+def test_single_model_retries_a_failed_short_answer_on_the_full_route(ollama, monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_MODEL_LADDER", ["only"])
+    ollama.replies = [{"text": "Cut off mid", "done_reason": "length"}]
+
+    text, contexts = _answer("What is a TLB?")
+
+    assert [(c["model"], c["prompt"]) for c in ollama.calls] == [("only", "brief"), ("only", "full")]
+    assert text == GOOD
+    assert len(contexts) == llm_router.ROUTES["full"]["contexts"]
+
+
+def test_single_model_keeps_a_valid_short_answer(ollama, monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_MODEL_LADDER", ["only"])
+
+    _, contexts = _answer("What is a TLB?")
+
+    assert [c["prompt"] for c in ollama.calls] == ["brief"]
+    assert len(contexts) == llm_router.ROUTES["short"]["contexts"]
+
+
+def test_last_attempt_is_kept_without_validation(ollama, monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_MODEL_LADDER", ["small", "big"])
+    ollama.replies = [{"text": ""}, {"text": "I don't know"}]
+
+    text, _ = _answer("What is a TLB?")
+
+    assert len(ollama.calls) == 2
+    assert text == "I don't know"
+
+
+def test_full_route_goes_straight_to_the_top_model(ollama, monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_MODEL_LADDER", ["small", "big"])
+    ollama.replies = [{"text": ""}]
+
+    _answer("Why does the TLB need to be flushed on a context switch?")
+
+    assert [(c["model"], c["prompt"]) for c in ollama.calls] == [("big", "full")]
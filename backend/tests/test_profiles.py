@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+
+from app import main, profiling
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("path", ["/profiles", "/profiles/20260101T000000-abc"])
+def test_profiles_are_closed_without_a_token(client, monkeypatch, profile_dir, path):
+    monkeypatch.setattr(main, "PROFILE_TOKEN", "")
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={profiling.PROFILE_HEADER: ""}).status_code == 403
+
+
+def test_profiles_need_the_token(client, monkeypatch, profile_dir):
+    monkeypatch.setattr(main, "PROFILE_TOKEN", "s3cret")
+    assert client.get("/profiles").status_code == 403
+    assert client.get("/profiles", headers={profiling.PROFILE_HEADER: "wrong"}).status_code == 403
+    r = client.get("/profiles", headers={profiling.PROFILE_HEADER: "s3cret"})
+    assert r.status_code == 200 and r.json() == []
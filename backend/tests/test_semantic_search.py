@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import random
+import uuid
+
+import pytest
+from sqlalchemy import text as sql_text
+
+from app import crud, embed_models
+
+PARTITIONS = 16
+
+
+def _vector(dim: int, axis: int, rng: random.Random) -> str:
+    v = [rng.uniform(-0.01, 0.01) for _ in range(dim)]
+    v[axis] = 1.0
+    return "[" + ",".join(f"{x:.5f}" for x in v) + "]"
+
+
+def _partition(db, session_id) -> int:
+    return db.execute(
+        sql_text(
+            "SELECT k FROM generate_series(0, :n - 1) k "
+            "WHERE satisfies_hash_partition('resource_chunks'::regclass, :n, k, CAST(:sid AS uuid))"
+        ),
+        {"n": PARTITIONS, "sid": str(session_id)},
+    ).scalar_one()
+
+
+def _add_chunks(db, session_id, axis: int, n: int, source_type: str = "pdf") -> uuid.UUID:
+    """
+    A resource with n chunks (page i) whose vectors point along `axis`.
+    """
+    model = embed_models.active(db)
+    rng = random.Random(axis * 1000 + n)
+    r = crud.create_resource(
+        db, session_id=session_id, filename=f"deck{axis}.pdf", mime_type="application/pdf",
+        storage_path="", status="EXTRACTED", extracted_text="x", error=None,
+    )
+    for i in range(1, n + 1):
+        cid = uuid.uuid4()
+        db.execute(
+            sql_text(
+                "INSERT INTO resource_chunks (id, session_id, resource_id, chunk_index, page_ref, page_num, source_type, text, created_at) "
+                "VALUES (:cid, :sid, :rid, :i, :ref, :i, :type, :text, now())"
+            ),
+            {"cid": cid, "sid": session_id, "rid": r.id, "i": i, "ref": f"p.{i}", "type": source_type, "text": f"chunk {i}"},
+        )
+        db.execute(
+            sql_text(
+                "INSERT INTO chunk_embeddings (chunk_id, session_id, model_id, embedding, embedding_half, created_at) "
+                "VALUES (:cid, :sid, :mid, CAST(:v AS vector), CAST(:v AS halfvec), now())"
+            ),
+            {"cid": cid, "sid": session_id, "mid": model.id, "v": _vector(model.dim, axis, rng)},
+        )
+    db.commit()
+    return r.id
+
+
+def _query(db, axis: int) -> list[float]:
+    model = embed_models.active(db)
+    return [1.0 if i == axis else 0.0 for i in range(model.dim)]
+
+
+@pytest.fixture
+def crowded_partition(db, session_id):
+    """
+    A session with 400 chunks close to the query, and a small session with 10
+    chunks further away in the same chunk partition.
+    """
+    created = []
+    try:
+        small = None
+        for _ in range(64):
+            s = crud.create_session(db, title="small session", topics=None)
+            created.append(s.id)
+            if _partition(db, s.id) == _partition(db, session_id):
+                small = s.id
+                break
+        _add_chunks(db, session_id, axis=0, n=400)
+        _add_chunks(db, small, axis=1, n=10)
+        yield small
+    finally:
+        db.rollback()
+        db.execute(sql_text("DELETE FROM sessions WHERE id = ANY(:ids)"), {"ids": created})
+        db.commit()
+
+
+def _prefer_index_order(db) -> None:
+    # the plan the planner picks once partitions are large: walk the HNSW
+    # index instead of sorting the session's rows (this transaction only)
+    db.execute(sql_text("SELECT set_config('enable_sort', 'off', true)"))
+
+
+def test_small_session_is_searched_exactly(db, crowded_partition, monkeypatch):
+    monkeypatch.setattr(crud, "_iterative_scan", "")
+    # query between both clusters, nearer the big session's
+    qvec = [0.9 if i == 0 else 0.4 if i == 1 else 0.0 for i in range(len(_query(db, 0)))]
+    _prefer_index_order(db)
+    hnsw = crud.search_chunks_semantic(db, session_id=crowded_partition, query_vec=qvec, limit=10, storage="half", exact=False)
+    hits = crud.search_chunks_semantic(db, session_id=crowded_partition, query_vec=qvec, limit=10, storage="half")
+    db.rollback()
+    # the index walk only sees the big session's neighbours
+    assert len(hnsw) < 10
+    assert len(hits) == 10
+
+
+@pytest.fixture
+def two_decks(db, session_id, monkeypatch):
+    """
+    A "large" session (exact search for small sessions off): 400 chunks near
+    the query in one deck, 20 further away in another.
+    """
+    monkeypatch.setattr(crud, "EMBED_EXACT_MAX_CHUNKS", 0)
+    near = _add_chunks(db, session_id, axis=0, n=400)
+    far = _add_chunks(db, session_id, axis=1, n=20, source_type="pptx")
+    return near, far
+
+
+@pytest.mark.parametrize("iterative", ["", "relaxed_order"])
+def test_narrow_filter_returns_limit_hits(db, session_id, two_decks, monkeypatch, iterative):
+    monkeypatch.setattr(crud, "_iterative_scan", iterative)
+    _, far = two_decks
+    qvec = _query(db, 0)
+    _prefer_index_order(db)
+    by_resource = crud.search_chunks_semantic(
+        db, session_id=session_id, query_vec=qvec, limit=10, storage="half", filters=crud.ChunkFilter(resource_ids=(far,))
+    )
+    by_pages = crud.search_chunks_semantic(
+        db, session_id=session_id, query_vec=qvec, limit=10, storage="half",
+        filters=crud.ChunkFilter(resource_ids=(far,), page_from=5, page_to=12),
+    )
+    db.rollback()
+    assert len(by_resource) == 10
+    assert {h["resource_id"] for h in by_resource} == {far}
+    assert len(by_pages) == 8
+
+
+def test_filter_without_iterative_scan_is_ranked_exactly(db, session_id, two_decks, monkeypatch):
+    monkeypatch.setattr(crud, "_iterative_scan", "")
+    _, far = two_decks
+    _prefer_index_order(db)
+    hits = crud.search_chunks_semantic(
+        db, session_id=session_id, query_vec=_query(db, 0), limit=10, storage="half",
+        filters=crud.ChunkFilter(source_type="pptx"),
+    )
+    db.rollback()
+    assert len(hits) == 10
+    assert {h["resource_id"] for h in hits} == {far}
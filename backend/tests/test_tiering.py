@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy import event, text as sql_text
+
+from app import crud, tiering
+from app.db import SessionLocal, engine
+from app.models import Question as QuestionModel
+
+
+@pytest.fixture
+def archived(db, session_id):
+    r = crud.create_resource(
+        db, session_id=session_id, filename="deck.pdf", mime_type="application/pdf",
+        storage_path="", status="EXTRACTED", extracted_text="x", error=None,
+    )
+    crud.create_chunks_for_resource(
+        db, session_id=session_id, resource_id=r.id,
+        chunks=[(f"p.{i}", f"virtual memory paging part {i}") for i in range(1, 6)],
+    )
+    assert tiering.archive_session(db, session_id) == 5
+    return session_id
+
+
+def _state_lookups():
+    seen = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "archived_at IS NOT NULL AS archived" in statement:
+            seen.append(statement)
+
+    return seen, count
+
+
+def test_search_rehydrates_without_committing_the_callers_transaction(archived):
+    with SessionLocal() as db:
+        qid = uuid.uuid4()
+        db.add(QuestionModel(id=qid, session_id=archived, text="pending", order_index=999))
+        hits = crud.search_chunks_fts(db, session_id=archived, query="paging", limit=10)
+        assert len(hits) == 5
+        db.rollback()
+        assert db.get(QuestionModel, qid) is None
+        assert db.execute(sql_text("SELECT archived_at FROM sessions WHERE id = :sid"), {"sid": archived}).scalar() is None
+
+
+def test_tier_state_checked_once_per_db_session(archived):
+    seen, count = _state_lookups()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with SessionLocal() as db:
+            for _ in range(3):
+                crud.search_chunks_fts(db, session_id=archived, query="paging", limit=3)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert len(seen) == 1
+
+
+def test_writer_rehydrates_inside_its_transaction(archived):
+    with SessionLocal() as db:
+        # the insert's counter trigger locks the session row for this transaction
+        db.execute(
+            sql_text("INSERT INTO questions (id, session_id, text, asked_at, order_index) VALUES (gen_random_uuid(), :sid, 'w', now(), 998)"),
+            {"sid": archived},
+        )
+        hits = crud.search_chunks_fts(db, session_id=archived, query="paging", limit=10)
+        assert len(hits) == 5
+        db.rollback()
+    with SessionLocal() as db:
+        assert db.execute(sql_text("SELECT archived_at FROM sessions WHERE id = :sid"), {"sid": archived}).scalar() is not None
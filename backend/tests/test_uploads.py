@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+from sqlalchemy import text as sql_text
+
+from app.routers import resources, uploads
+
+DATA = bytes(range(256)) * 40  # 10 KiB, sent as parts of 4 KiB
+PART = 4096
+
+
+def _parts_sha256(data: bytes, part: int = PART) -> str:
+    return hashlib.sha256(
+        b"".join(hashlib.sha256(data[i : i + part]).digest() for i in range(0, len(data), part))
+    ).hexdigest()
+
+
+@pytest.fixture
+def extracted(monkeypatch, tmp_path):
+    """
+    Uploads land in tmp_path; extraction records what it was handed.
+    """
+    seen = []
+
+    def extract_text(filename, mime_type, data):
+        seen.append(data)
+        return "EXTRACTED", f"{len(data.read())} bytes"
+
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(resources, "extract_text", extract_text)
+    return seen
+
+
+def _upload(client, session_id, **extra) -> str:
+    r = client.post(f"/api/sessions/{session_id}/uploads", json={"filename": "deck.pdf", "size": len(DATA), **extra})
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def _put(client, upload_id, start, data=DATA, part=PART):
+    chunk = data[start : start + part]
+    return client.put(
+        f"/api/uploads/{upload_id}",
+        content=chunk,
+        headers={"Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{len(data)}"},
+    )
+
+
+def _put_all(client, upload_id):
+    for start in range(0, len(DATA), PART):
+        assert _put(client, upload_id, start).status_code == 200
+
+
+def test_complete_checks_parts_digest_and_streams_the_file(client, session_id, extracted):
+    uid = _upload(client, session_id, parts_sha256=_parts_sha256(DATA))
+    _put_all(client, uid)
+
+    r = client.post(f"/api/uploads/{uid}/complete")
+
+    assert r.status_code == 200
+    assert r.json()["status"] == "EXTRACTED"
+    # the open file, not its bytes
+    assert len(extracted) == 1 and not isinstance(extracted[0], bytes)
+
+
+def test_complete_rejects_a_wrong_parts_digest(client, session_id, extracted):
+    uid = _upload(client, session_id, parts_sha256=_parts_sha256(DATA[::-1]))
+    _put_all(client, uid)
+
+    assert client.post(f"/api/uploads/{uid}/complete").status_code == 422
+    assert extracted == []
+
+
+def test_complete_rejects_overlapping_parts(client, session_id, extracted):
+    uid = _upload(client, session_id, parts_sha256=_parts_sha256(DATA))
+    _put_all(client, uid)
+    assert _put(client, uid, 100).status_code == 200  # re-sent with another boundary
+
+    assert client.post(f"/api/uploads/{uid}/complete").status_code == 409
+
+
+def test_parts_digest_needs_exact_tiling():
+    digest = hashlib.sha256(b"x").hexdigest()
+    assert uploads.parts_digest([(0, 5, digest), (5, 10, digest)], 10) is not None
+    assert uploads.parts_digest([(0, 5, digest), (4, 10, digest)], 10) is None
+    assert uploads.parts_digest([(0, 5, digest)], 10) is None
+
+
+def test_deleted_session_refuses_parts_and_completion(client, db, session_id, extracted):
+    uid = _upload(client, session_id)
+    assert _put(client, uid, 0).status_code == 200
+    assert client.delete(f"/api/sessions/{session_id}").status_code == 202
+
+    assert _put(client, uid, PART).status_code == 404
+    assert client.post(f"/api/uploads/{uid}/complete").status_code == 404
+    assert extracted == []
+    db.execute(sql_text("DELETE FROM deletions WHERE session_id = :sid"), {"sid": session_id})
+    db.commit()
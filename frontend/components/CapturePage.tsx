@@ -6,6 +6,9 @@ import type { QuestionOut, ResourceOut, ChunkHitOut, AnswerOut } from "../lib/ty
 import ReactMarkdown from "react-markdown";
 import remarkGfm from "remark-gfm";
 
+// files above this use the resumable, parallel-part upload
+const RESUMABLE_UPLOAD_BYTES = 32 * 1024 * 1024;
+
 function toSearchQuery(s: string) {
   const stop = new Set([
     "the","a","an","and","or","but","so","to","of","in","on","for","with","as","at","by",
@@ -88,6 +91,7 @@ export default function CapturePage({ sessionId }: { sessionId: string }) {
   const [loadingR, setLoadingR] = useState(true);
 
   const [uploading, setUploading] = useState(false);
+  const [chunking, setChunking] = useState<Record<string, { done: number; total: number }>>({});
 
   const endRef = useRef<HTMLDivElement | null>(null);
 
@@ -155,6 +159,55 @@ export default function CapturePage({ sessionId }: { sessionId: string }) {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [sessionId]);
 
+  // Live updates instead of re-fetching the full lists
+  useEffect(() => {
+    const es = api.sessionEvents(sessionId);
+
+    es.addEventListener("question.created", (e) => {
+      const q: QuestionOut = JSON.parse((e as MessageEvent).data);
+      setQuestions((prev) => {
+        if (prev.some((p) => p.id === q.id)) return prev;
+        // replace our own optimistic row if this is the echo of it
+        const tmp = prev.findIndex((p) => p.id.startsWith("temp-") && p.text === q.text);
+        const next = tmp >= 0 ? prev.filter((_, i) => i !== tmp) : prev;
+        return [...next, q].sort((a, b) => a.order_index - b.order_index);
+      });
+    });
+
+    es.addEventListener("resource.extracted", (e) => {
+      const r: ResourceOut = JSON.parse((e as MessageEvent).data);
+      setResources((prev) => [r, ...prev.filter((p) => p.id !== r.id)]);
+    });
+
+    es.addEventListener("chunking.progress", (e) => {
+      const p: { resource_id: string; done: number; total: number } = JSON.parse((e as MessageEvent).data);
+      setChunking((prev) => ({ ...prev, [p.resource_id]: { done: p.done, total: p.total } }));
+    });
+
+    es.addEventListener("answer.ready", (e) => {
+      const a = JSON.parse((e as MessageEvent).data);
+      if (a.truncated) {
+        refreshAnswers();
+        return;
+      }
+      setAnswers((prev) => ({ ...prev, [a.question_id]: a as AnswerOut }));
+    });
+
+    es.addEventListener("answer.stale", (e) => {
+      const { question_id } = JSON.parse((e as MessageEvent).data);
+      setAnswers((prev) =>
+        prev[question_id] ? { ...prev, [question_id]: { ...prev[question_id], stale_at: new Date().toISOString() } } : prev
+      );
+    });
+
+    es.addEventListener("resync", () => {
+      refreshAll();
+    });
+
+    return () => es.close();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [sessionId]);
+
   useEffect(() => {
     endRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [questions.length]);
@@ -199,14 +252,19 @@ export default function CapturePage({ sessionId }: { sessionId: string }) {
     setUploading(true);
 
     try {
-      const created = await api.uploadResources(sessionId, files);
-      setResources((prev) => [...created, ...prev]);
-      await refreshResources();
-
-      // auto-chunk best-effort
+      // big decks go through the resumable protocol, the rest in one multipart request
+      const large = files.filter((f) => f.size > RESUMABLE_UPLOAD_BYTES);
+      const small = files.filter((f) => f.size <= RESUMABLE_UPLOAD_BYTES);
+      const created = [
+        ...(small.length ? await api.uploadResources(sessionId, small) : []),
+        ...(await Promise.all(large.map((f) => api.uploadResumable(sessionId, f)))),
+      ];
+      const ids = new Set(created.map((r) => r.id));
+      setResources((prev) => [...created, ...prev.filter((p) => !ids.has(p.id))]);
+
+      // auto-chunk best-effort; progress arrives over the event stream
       try {
         await api.chunkAll(sessionId);
-        await refreshResources();
       } catch (e) {
         console.warn("Auto-chunk failed:", e);
       }
@@ -359,6 +417,11 @@ export default function CapturePage({ sessionId }: { sessionId: string }) {
               <div style={{ marginTop: 6, opacity: 0.7, fontSize: 12 }}>
                 Uploaded: {new Date(r.created_at).toLocaleString()}
                 {r.extracted_at ? ` • Processed: ${new Date(r.extracted_at).toLocaleString()}` : ""}
+                {chunking[r.id]
+                  ? chunking[r.id].done < chunking[r.id].total
+                    ? ` • Indexing ${chunking[r.id].done}/${chunking[r.id].total}`
+                    : ` • Indexed ${chunking[r.id].total} chunk(s)`
+                  : ""}
               </div>
 
               {r.status === "FAILED" && r.error ? (
@@ -545,7 +608,14 @@ export default function CapturePage({ sessionId }: { sessionId: string }) {
 
                 {answer?.answer_md ? (
                   <div style={{ marginTop: 12, border: "1px solid #eee", borderRadius: 12, padding: 12, background: "white" }}>
-                    <div style={{ fontWeight: 750, marginBottom: 6 }}>Answer</div>
+                    <div style={{ fontWeight: 750, marginBottom: 6 }}>
+                      Answer
+                      {answer.stale_at ? (
+                        <span style={{ marginLeft: 8, fontWeight: 500, fontSize: 12, color: "#8a5a00" }}>
+                          slides changed since this answer — regenerate to refresh sources
+                        </span>
+                      ) : null}
+                    </div>
                     <div style={{ fontSize: 13, lineHeight: 1.55 }}>
                       <ReactMarkdown remarkPlugins={[remarkGfm]}>
                         {answer.answer_md}
@@ -1,4 +1,4 @@
-import type { ResourceOut } from "./types";
+import type { ResourceOut, UploadOut } from "./types";
 import type {
   SessionCreate,
   SessionOut,
@@ -18,7 +18,8 @@ async function http<T>(path: string, init?: RequestInit): Promise<T> {
       "Content-Type": "application/json",
       ...(init?.headers || {}),
     },
-    cache: "no-store",
+    // revalidate with If-None-Match: unchanged lists come back as a cheap 304
+    cache: "no-cache",
   });
 
   if (!res.ok) {
@@ -71,6 +72,54 @@ export const api = {
     return res.json();
   },
 
+  // Resumable upload for large files: parts are PUT in parallel and retried individually;
+  // passing a previous uploadId resumes by sending only the missing ranges.
+  uploadResumable: async (
+    sessionId: string,
+    file: File,
+    opts: { parallel?: number; uploadId?: string; onProgress?: (sent: number, total: number) => void } = {}
+  ): Promise<ResourceOut> => {
+    const upload = opts.uploadId
+      ? await http<UploadOut>(`/api/uploads/${opts.uploadId}`)
+      : await http<UploadOut>(`/api/sessions/${sessionId}/uploads`, {
+          method: "POST",
+          body: JSON.stringify({ filename: file.name, size: file.size, mime_type: file.type || null }),
+        });
+
+    const partSize = upload.part_size;
+    const missing: [number, number][] = [];
+    for (let start = 0; start < file.size; start += partSize) {
+      const end = Math.min(start + partSize, file.size);
+      if (!upload.ranges.some(([s, e]) => s <= start && end <= e)) missing.push([start, end]);
+    }
+
+    let sent = upload.received_bytes;
+    async function putPart([start, end]: [number, number]) {
+      for (let attempt = 0; ; attempt++) {
+        const res = await fetch(`${API_BASE}/api/uploads/${upload.id}`, {
+          method: "PUT",
+          headers: { "Content-Range": `bytes ${start}-${end - 1}/${file.size}` },
+          body: file.slice(start, end),
+        }).catch(() => null);
+        if (res?.ok) break;
+        if (attempt >= 4 || (res && res.status < 500 && res.status !== 408)) {
+          throw new Error(`Upload part ${start}-${end - 1} failed (${res?.status ?? "network"})`);
+        }
+        await new Promise((r) => setTimeout(r, 500 * 2 ** attempt));
+      }
+      sent += end - start;
+      opts.onProgress?.(sent, file.size);
+    }
+
+    const queue = [...missing];
+    const workers = Array.from({ length: Math.min(opts.parallel ?? 4, queue.length) }, async () => {
+      for (let part = queue.shift(); part; part = queue.shift()) await putPart(part);
+    });
+    await Promise.all(workers);
+
+    return http<ResourceOut>(`/api/uploads/${upload.id}/complete`, { method: "POST" });
+  },
+
   searchChunks: (sessionId: string, query: string, limit = 6) =>
     http<ChunkHitOut[]>(
       `/api/sessions/${sessionId}/chunks/search?q=${encodeURIComponent(
@@ -105,4 +154,8 @@ export const api = {
       `/api/sessions/${sessionId}/explain-all${force ? "?force=1" : ""}`,
       { method: "POST" }
     ),
+
+  // Live deltas (SSE): question.created, resource.extracted, chunking.progress, answer.ready, resync
+  sessionEvents: (sessionId: string) =>
+    new EventSource(`${API_BASE}/api/sessions/${sessionId}/events`),
 };
@@ -4,11 +4,18 @@ export type SessionOut = {
   topics: string | null;
   created_at: string;
   question_count: number;
+  resource_count: number;
+  chunk_count: number;
+  answer_count: number;
+  prefetch_budget: number | null;
+  prefetch_used: number;
+  archived_at?: string | null; // chunks in the cold tier; the next search rehydrates them
 };
 
 export type SessionCreate = {
   title: string;
   topics?: string | null;
+  prefetch_budget?: number | null;
 };
 
 export type QuestionOut = {
@@ -34,6 +41,20 @@ export type ResourceOut = {
   error: string | null;
 };
 
+export type UploadOut = {
+  id: string;
+  session_id: string;
+  filename: string;
+  size: number;
+  status: string; // UPLOADING | COMPLETING | COMPLETE
+  offset: number;
+  received_bytes: number;
+  ranges: [number, number][]; // received [start, end)
+  part_size: number;
+  resource_id: string | null;
+  created_at: string;
+};
+
 export type ChunkHitOut = {
   chunk_id: string;
   resource_id: string;
@@ -50,6 +71,7 @@ export type AnswerOut = {
   answer_md: string;
   sources_json: string;
   created_at: string;
+  stale_at?: string | null; // a cited resource was re-chunked
 };
 
 export type AnswerListOut = AnswerOut[];